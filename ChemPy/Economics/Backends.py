@@ -0,0 +1,541 @@
+import functools
+import re
+
+from ChemPy.Economics.Formula import Evaluator, FormulaError, cell_index, parse_literal
+
+
+def _counted(f):
+    # every backend entry point bumps Sheet.calls, which is what the buffered layer is measured by
+    @functools.wraps(f)
+    def counted(self,*args,**kwargs):
+        self.calls += 1
+        return f(self,*args,**kwargs)
+    return counted
+
+
+def _col_letter(col):
+    # 0 based column -> A, B, ..., AA
+    res = ''
+    col += 1
+    while col:
+        col,rem = divmod(col-1,26)
+        res = chr(65+rem)+res
+    return res
+
+
+def _address(r0,c0,r1,c1):
+    start = f'{_col_letter(c0)}{r0+1}'
+    return start if (r0,c0) == (r1,c1) else f'{start}:{_col_letter(c1)}{r1+1}'
+
+
+def _rectangles(cells):
+    # (row,col) cells -> (r0,c0,r1,c1) blocks: consecutive rows of a column first, then equal row spans of
+    # neighbouring columns, which is the shape write_row leaves behind
+    runs = {}
+    byCol = {}
+    for r,c in cells: byCol.setdefault(c,[]).append(r)
+    for c in sorted(byCol):
+        rows = sorted(byCol[c])
+        start = prev = rows[0]
+        for r in rows[1:]+[None]:
+            if r is not None and r == prev+1:
+                prev = r
+                continue
+            runs.setdefault((start,prev),[]).append(c)
+            if r is not None: start = prev = r
+    res = []
+    for (r0,r1),cols in runs.items():
+        start = prev = cols[0]
+        for c in cols[1:]+[None]:
+            if c is not None and c == prev+1:
+                prev = c
+                continue
+            res.append((r0,start,r1,prev))
+            if c is not None: start = prev = c
+    return sorted(res)
+
+
+def _union_addresses(cells,limit=255):
+    # Excel refuses union references longer than 255 characters, so long unions come back in pieces
+    chunk = ''
+    for rect in _rectangles(cells):
+        addr = _address(*rect)
+        if chunk and len(chunk)+1+len(addr) > limit:
+            yield chunk
+            chunk = ''
+        chunk = f'{chunk},{addr}' if chunk else addr
+    if chunk: yield chunk
+
+
+def _plain(value):
+    return value if value is None or isinstance(value,(str,int,float)) else float(value)
+
+
+class Sheet:
+    # rows and columns are 0 based like xlwings' sheet.cells, ranges are A1 references
+
+    name = ''
+    calls = 0
+
+    def write(self,row,col,value):
+        raise NotImplementedError
+
+    def write_formula(self,row,col,formula):
+        raise NotImplementedError
+
+    def write_block(self,row,col,values:list[list],formulas:list[list[bool]]|None=None):
+        # values is a 2-D list anchored at (row,col); formulas flags the entries that go through write_formula
+        for i,line in enumerate(values):
+            for j,value in enumerate(line):
+                if formulas is not None and formulas[i][j]: self.write_formula(row+i,col+j,value)
+                elif value is not None: self.write(row+i,col+j,value)
+
+    def set_number_format(self,row,col,fmt):
+        raise NotImplementedError
+
+    def set_number_format_range(self,cells,fmt):
+        for row,col in cells: self.set_number_format(row,col,fmt)
+
+    def set_bold(self,row,col,bold=True):
+        raise NotImplementedError
+
+    def set_bold_range(self,cells,bold=True):
+        for row,col in cells: self.set_bold(row,col,bold)
+
+    def name_range(self,ref,name):
+        raise NotImplementedError
+
+    def name_ranges(self,names:list[tuple[str,str]]):
+        for ref,name in names: self.name_range(ref,name)
+
+    def set_number_format_from_value(self,row,col,fmt):
+        # fmt maps the computed value of the cell to its number format
+        self.set_number_format(row,col,fmt(self.read(row,col)))
+
+    def read(self,row,col):
+        # computed value of a cell, None when the backend has no calculation engine
+        raise NotImplementedError
+
+    def read_block(self,row,col,nrows,ncols):
+        return [[self.read(row+i,col+j) for j in range(ncols)] for i in range(nrows)]
+
+    def autofit(self):
+        pass
+
+    def flush(self):
+        pass
+
+
+class Workbook:
+
+    def add_sheet(self,name) -> Sheet:
+        raise NotImplementedError
+
+    def save(self,path=None):
+        raise NotImplementedError
+
+
+def as_workbook(wb):
+    # lets callers keep handing an xlwings Book to build_sheet
+    return wb if isinstance(wb,Workbook) else XlwingsWorkbook(wb)
+
+
+class BufferedSheet(Sheet):
+    # keeps every write in memory and hands it to the backend sheet in bulk on flush: one 2-D write per block of
+    # consecutive rows, one call per number format and per bold state (split at 255 character unions), one call
+    # for all the names. Everything written is mirrored into a local evaluator, so computed values never have to
+    # be read back from the backend
+
+    def __init__(self,sheet:Sheet):
+        self.sheet = sheet
+        self.name = sheet.name
+        self.cells = {}  # (row,col) -> (value, is formula)
+        self.formats = {}
+        self.bold = {}
+        self.names = []
+        self.valueFormats = {}  # (row,col) -> fmt(value), resolved on flush
+        self.model = Evaluator()
+        self._boldOnSheet = set()
+
+    @property
+    def calls(self):
+        return self.sheet.calls
+
+    def write(self,row,col,value):
+        self.cells[row,col] = (value,False)
+        self.model.set(row,col,_plain(value))
+
+    def write_formula(self,row,col,formula):
+        self.cells[row,col] = (formula,True)
+        self.model.set(row,col,_plain(formula),True)
+
+    def set_number_format(self,row,col,fmt):
+        self.formats[row,col] = fmt
+
+    def set_bold(self,row,col,bold=True):
+        self.bold[row,col] = bold
+
+    def set_number_format_from_value(self,row,col,fmt):
+        self.valueFormats[row,col] = fmt
+
+    def name_range(self,ref,name):
+        self.names.append((ref,name))
+        self.model.name(ref,name)
+
+    def read(self,row,col):
+        try:
+            return self.model.value(row,col)
+        except FormulaError:
+            # outside what the evaluator covers, let the backend work it out
+            if (row,col) in self.cells: self.flush()
+            return self.sheet.read(row,col)
+
+    def read_block(self,row,col,nrows,ncols):
+        self.flush()
+        return self.sheet.read_block(row,col,nrows,ncols)
+
+    def autofit(self):
+        self.flush()
+        self.sheet.autofit()
+
+    @staticmethod
+    def _blocks(cells):
+        # runs of consecutive rows, each spanning the columns used in it
+        rows = sorted({r for r,c in cells})
+        start = 0
+        for i in range(1,len(rows)+1):
+            if i < len(rows) and rows[i] == rows[i-1]+1: continue
+            cols = [c for r,c in cells if rows[start] <= r <= rows[i-1]]
+            yield rows[start],rows[i-1],min(cols),max(cols)
+            start = i
+
+    def flush(self):
+
+        for r0,r1,c0,c1 in self._blocks(self.cells):
+            values = [[None]*(c1-c0+1) for _ in range(r0,r1+1)]
+            formulas = [[False]*(c1-c0+1) for _ in range(r0,r1+1)]
+            for (r,c),(value,isFormula) in self.cells.items():
+                if r0 <= r <= r1:
+                    values[r-r0][c-c0] = _plain(value)
+                    formulas[r-r0][c-c0] = isFormula
+            self.sheet.write_block(r0,c0,values,formulas if any(map(any,formulas)) else None)
+
+        unresolved = {}
+        for cell,fmt in self.valueFormats.items():
+            try:
+                self.formats[cell] = fmt(self.model.value(*cell))
+            except FormulaError:
+                unresolved[cell] = fmt
+        for r0,r1,c0,c1 in self._blocks(unresolved):
+            values = self.sheet.read_block(r0,c0,r1-r0+1,c1-c0+1)
+            for (r,c),fmt in unresolved.items():
+                if r0 <= r <= r1: self.formats[r,c] = fmt(values[r-r0][c-c0])
+
+        byFormat = {}
+        for cell,fmt in self.formats.items(): byFormat.setdefault(fmt,[]).append(cell)
+        for fmt,cells in byFormat.items(): self.sheet.set_number_format_range(cells,fmt)
+
+        bold = [cell for cell,b in self.bold.items() if b]
+        # a new sheet is not bold anywhere, so only cells bolded by an earlier flush need switching back
+        plain = [cell for cell,b in self.bold.items() if not b and cell in self._boldOnSheet]
+        if bold: self.sheet.set_bold_range(bold,True)
+        if plain: self.sheet.set_bold_range(plain,False)
+        self._boldOnSheet.update(bold)
+        self._boldOnSheet.difference_update(plain)
+
+        if self.names: self.sheet.name_ranges(self.names)
+
+        self.cells = {}
+        self.formats = {}
+        self.bold = {}
+        self.names = []
+        self.valueFormats = {}
+
+
+# region in memory
+class MemorySheet(Sheet):
+    # no file and no Excel, just the evaluator; used to check the formula sheets against the Python costs
+
+    def __init__(self,name):
+        self.name = name
+        self.model = Evaluator()
+        self.formats = {}
+        self.bold = {}
+        self.calls = 0
+
+    @_counted
+    def write(self,row,col,value):
+        self.model.set(row,col,_plain(value))
+
+    @_counted
+    def write_formula(self,row,col,formula):
+        self.model.set(row,col,_plain(formula),True)
+
+    @_counted
+    def write_block(self,row,col,values,formulas=None):
+        for i,line in enumerate(values):
+            for j,value in enumerate(line):
+                if value is not None: self.model.set(row+i,col+j,value,formulas is not None and formulas[i][j])
+
+    @_counted
+    def set_number_format(self,row,col,fmt):
+        self.formats[row,col] = fmt
+
+    @_counted
+    def set_number_format_range(self,cells,fmt):
+        for cell in cells: self.formats[cell] = fmt
+
+    @_counted
+    def set_bold(self,row,col,bold=True):
+        self.bold[row,col] = bold
+
+    @_counted
+    def set_bold_range(self,cells,bold=True):
+        for cell in cells: self.bold[cell] = bold
+
+    @_counted
+    def name_range(self,ref,name):
+        self.model.name(ref,name)
+
+    @_counted
+    def name_ranges(self,names):
+        for ref,name in names: self.model.name(ref,name)
+
+    @_counted
+    def read(self,row,col):
+        # errors come back as their Excel error value, the way xlwings reads them
+        try:
+            return self.model.value(row,col)
+        except FormulaError as err:
+            return str(err).split()[0]
+
+
+class MemoryWorkbook(Workbook):
+
+    def __init__(self):
+        self.sheets = {}
+
+    def add_sheet(self,name):
+        self.sheets[name] = MemorySheet(name)
+        return self.sheets[name]
+
+    def save(self,path=None):
+        pass
+# endregion
+
+
+# region xlwings
+class XlwingsSheet(Sheet):
+
+    def __init__(self,sh):
+        self.sh = sh
+        self.name = sh.name
+        self.calls = 0
+
+    @_counted
+    def write(self,row,col,value):
+        self.sh.cells[row,col].value = value
+
+    @_counted
+    def write_formula(self,row,col,formula):
+        self.sh.cells[row,col].formula = formula
+
+    @_counted
+    def write_block(self,row,col,values,formulas=None):
+        # Range.Formula takes constants as well, so a block with any formula in it goes in as formulas
+        rng = self.sh.range((row+1,col+1),(row+len(values),col+len(values[0])))
+        if formulas is None: rng.value = values
+        else: rng.formula = [['' if v is None else v for v in line] for line in values]
+
+    @_counted
+    def set_number_format(self,row,col,fmt):
+        self.sh.cells[row,col].number_format = fmt
+
+    def set_number_format_range(self,cells,fmt):
+        for addr in _union_addresses(cells): self._format_union(addr,fmt)
+
+    @_counted
+    def _format_union(self,addr,fmt):
+        self.sh.range(addr).number_format = fmt
+
+    @_counted
+    def set_bold(self,row,col,bold=True):
+        self.sh.cells[row,col].font.bold = bold
+
+    def set_bold_range(self,cells,bold=True):
+        for addr in _union_addresses(cells): self._bold_union(addr,bold)
+
+    @_counted
+    def _bold_union(self,addr,bold):
+        self.sh.range(addr).font.bold = bold
+
+    @_counted
+    def name_range(self,ref,name):
+        self.sh.range(ref).name = name
+
+    @_counted
+    def read(self,row,col):
+        return self.sh.cells[row,col].value
+
+    @_counted
+    def read_block(self,row,col,nrows,ncols):
+        return self.sh.range((row+1,col+1),(row+nrows,col+ncols)).options(ndim=2).value
+
+    @_counted
+    def autofit(self):
+        self.sh.autofit(axis='columns')
+
+
+class XlwingsWorkbook(Workbook):
+
+    def __init__(self,book=None):
+        if book is None:
+            import xlwings as xl
+            book = xl.Book()
+        self.book = book
+
+    def add_sheet(self,name):
+        return XlwingsSheet(self.book.sheets.add(name,after=self.book.sheets[-1]))
+
+    def save(self,path=None):
+        self.book.save(path)
+# endregion
+
+
+# region xlsx
+# functions newer than the 2007 file format have to be written with their future-function prefix
+_XLFN = re.compile(r'(?<![\w.])(TEXTJOIN|CONCAT|IFS|MAXIFS|MINIFS|SWITCH|XLOOKUP)\(',re.IGNORECASE)
+
+
+class XlsxSheet(Sheet):
+    # openpyxl only edits an in-memory model, so the bulk methods are plain loops counted as one call
+
+    def __init__(self,book,ws):
+        self.book = book
+        self.ws = ws
+        self.name = ws.title
+        self.calls = 0
+
+    def _cell(self,row,col):
+        return self.ws.cell(row=row+1,column=col+1)
+
+    def _write(self,row,col,value):
+        if isinstance(value,str) and not value:
+            value = None  # typing nothing into Excel leaves the cell empty
+        elif isinstance(value,str) and value.startswith('\''):
+            value = value[1:]  # Excel's force-text prefix, the cell is stored as text anyway
+        self._cell(row,col).value = value
+
+    def _write_formula(self,row,col,formula):
+        # write_row_form passes labels, numbers and percentages through the formula channel as Excel would
+        # parse them when typed in
+        if not isinstance(formula,str):
+            return self._write(row,col,_plain(formula))
+        if formula.startswith('='):
+            self._cell(row,col).value = _XLFN.sub(lambda m: f'_xlfn.{m.group(1).upper()}(',formula)
+            return
+        value = parse_literal(formula)
+        if isinstance(value,float) and formula.rstrip().endswith('%'):
+            self._cell(row,col).number_format = '0%'
+        self._cell(row,col).value = value
+
+    def _set_bold(self,row,col,bold):
+        from openpyxl.styles import Font
+        cell = self._cell(row,col)
+        if cell.font.b != bold:
+            cell.font = Font(bold=bold)
+
+    def _name_range(self,ref,name):
+        from openpyxl.workbook.defined_name import DefinedName
+        row,col = cell_index(ref)
+        dn = DefinedName(name,attr_text=f'\'{self.ws.title}\'!${_col_letter(col)}${row+1}')
+        if hasattr(self.book.defined_names,'add'):
+            self.book.defined_names.add(dn)  # openpyxl >= 3.1
+        else:
+            self.book.defined_names.append(dn)
+
+    @_counted
+    def write(self,row,col,value):
+        self._write(row,col,value)
+
+    @_counted
+    def write_formula(self,row,col,formula):
+        self._write_formula(row,col,formula)
+
+    @_counted
+    def write_block(self,row,col,values,formulas=None):
+        for i,line in enumerate(values):
+            for j,value in enumerate(line):
+                if formulas is not None and formulas[i][j]: self._write_formula(row+i,col+j,value)
+                elif value is not None: self._write(row+i,col+j,value)
+
+    @_counted
+    def set_number_format(self,row,col,fmt):
+        self._cell(row,col).number_format = fmt
+
+    @_counted
+    def set_number_format_range(self,cells,fmt):
+        for row,col in cells: self._cell(row,col).number_format = fmt
+
+    @_counted
+    def set_bold(self,row,col,bold=True):
+        self._set_bold(row,col,bold)
+
+    @_counted
+    def set_bold_range(self,cells,bold=True):
+        for row,col in cells: self._set_bold(row,col,bold)
+
+    @_counted
+    def name_range(self,ref,name):
+        self._name_range(ref,name)
+
+    @_counted
+    def name_ranges(self,names):
+        for ref,name in names: self._name_range(ref,name)
+
+    def _read(self,row,col):
+        value = self._cell(row,col).value
+        return None if isinstance(value,str) and value.startswith('=') else value
+
+    @_counted
+    def read(self,row,col):
+        return self._read(row,col)
+
+    @_counted
+    def read_block(self,row,col,nrows,ncols):
+        return [[self._read(row+i,col+j) for j in range(ncols)] for i in range(nrows)]
+
+    @_counted
+    def autofit(self):
+        from openpyxl.utils import get_column_letter
+        widths = {}
+        for row in self.ws.iter_rows():
+            for cell in row:
+                if cell.value is None or (isinstance(cell.value,str) and cell.value.startswith('=')):
+                    continue
+                widths[cell.column] = max(widths.get(cell.column,0),len(str(cell.value)))
+        for col,width in widths.items():
+            self.ws.column_dimensions[get_column_letter(col)].width = min(width+2,60)
+
+
+class XlsxWorkbook(Workbook):
+
+    def __init__(self,path=None):
+        from openpyxl import Workbook as _Book
+        self.path = path
+        self.book = _Book()
+        self._blank = self.book.active  # openpyxl starts with an empty sheet, dropped on the first add
+
+    def add_sheet(self,name):
+        ws = self.book.create_sheet(name)
+        if self._blank is not None:
+            self.book.remove(self._blank)
+            self._blank = None
+        return XlsxSheet(self.book,ws)
+
+    def save(self,path=None):
+        path = path if path else self.path
+        if not path:
+            raise ValueError('no path to save the workbook to')
+        self.book.save(path)
+# endregion
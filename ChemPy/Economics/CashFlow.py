@@ -0,0 +1,186 @@
+import numpy as np
+
+from ChemPy.Economics.Currency import Currency, CurrencyArray
+
+
+# IRS half-year convention, fraction of the depreciable capital written off in each year of the recovery period
+MACRS = {
+    3: (0.3333,0.4445,0.1481,0.0741),
+    5: (0.2000,0.3200,0.1920,0.1152,0.1152,0.0576),
+    7: (0.1429,0.2449,0.1749,0.1249,0.0893,0.0892,0.0893,0.0446),
+    10: (0.1000,0.1800,0.1440,0.1152,0.0922,0.0737,0.0655,0.0655,0.0656,0.0655,0.0328),
+    15: (0.0500,0.0950,0.0855,0.0770,0.0693,0.0623,0.0590,0.0590,0.0591,0.0590,0.0591,0.0590,0.0591,0.0590,
+         0.0591,0.0295),
+    20: (0.03750,0.07219,0.06677,0.06177,0.05713,0.05285,0.04888,0.04522,0.04462,0.04461,0.04462,0.04461,
+         0.04462,0.04461,0.04462,0.04461,0.04462,0.04461,0.04462,0.04461,0.02231),
+}
+
+
+def _values(x):
+    return np.asarray(x.value if isinstance(x,Currency) else x,dtype=float)
+
+
+def _get(source,key,default=None):
+    # a result dict (escalate, investment_chain, OperatingCosts.hourly, Monte Carlo samples) or the object itself
+    if hasattr(source,'__getitem__'):
+        try:
+            return source[key]
+        except KeyError:
+            return default
+    return getattr(source,key,default)
+
+
+def depreciation_schedule(method='MACRS',recovery=5,life=15):
+    # fraction of the depreciable capital written off in each of the `life` production years
+    if method == 'MACRS':
+        if recovery not in MACRS:
+            raise KeyError(f'no MACRS class of {recovery} years, pick one of {sorted(MACRS)}')
+        rates = np.array(MACRS[recovery])
+    elif method == 'straight-line':
+        rates = np.full(recovery,1/recovery)
+    else:
+        raise ValueError(f'unknown depreciation method {method}')
+    res = np.zeros(life)
+    res[:min(life,len(rates))] = rates[:life]
+    return res
+
+
+class CashFlow:
+    # yearly after tax cash flows of a plant: the construction years, then `life` production years. Every money
+    # input and both rates may be a scalar or an array of scenarios; the cash flows are then a (scenarios, years)
+    # table and every result an array over the scenarios.
+    #
+    # year k (0 based, construction first) is discounted by (1+rate)^-k. The fixed capital is spent over the
+    # construction years in the `construction` fractions and the depreciable part of it (all of it unless given)
+    # written off by `depreciation` over `recovery` years. Working capital goes in with the first production year
+    # and comes back with the last, and a year at a loss earns a tax credit. Sales and costs of the first
+    # production years follow `ramp`, fractions of the full rate.
+
+    def __init__(self,fixed_capital,sales,costs,working_capital=0.,life=15,tax_rate=0.37,rate=0.15,
+                 depreciation='MACRS',recovery=5,construction=(1.,),ramp=(),salvage=0.,depreciable=None):
+
+        depreciable = fixed_capital if depreciable is None else depreciable
+        inputs = [fixed_capital,sales,costs,working_capital,tax_rate,rate,salvage,depreciable]
+        self.scalar = all(np.ndim(_values(a)) == 0 for a in inputs)
+        inputs = [np.atleast_1d(_values(a)) for a in inputs]
+        n = np.broadcast(*inputs).shape[0]
+        fixed,sales,costs,wc,tax,rate,salvage,depreciable = (np.broadcast_to(a,(n,))[:,None] for a in inputs)
+
+        self.life = life
+        nc = self.nConstruction = len(construction)
+        self.rate = rate[:,0]
+        self.fixedCapital = fixed[:,0]
+        self.workingCapital = wc[:,0]
+
+        load = np.ones(life)
+        load[:min(life,len(ramp))] = np.asarray(ramp,dtype=float)[:life]
+
+        self.depreciation = depreciable*depreciation_schedule(depreciation,recovery,life)
+        self.grossProfit = (sales-costs)*load
+        taxable = self.grossProfit-self.depreciation
+        taxable[:,-1:] += salvage  # fully written off by then, so all of it is a taxable gain
+        self.netEarnings = taxable*(1-tax)
+
+        self.cashFlow = np.zeros((n,nc+life))
+        self.cashFlow[:,:nc] = -fixed*np.asarray(construction,dtype=float)
+        self.cashFlow[:,nc:] = self.netEarnings+self.depreciation
+        self.cashFlow[:,nc:nc+1] -= wc
+        self.cashFlow[:,-1:] += wc
+
+    @classmethod
+    def from_costs(cls,capital,operating,**kwargs):
+        # from a CapitalCostBuildUp (or its escalate / investment_chain dict, or Monte Carlo samples) and an
+        # OperatingCosts (or its hourly dict). Costs are raw materials plus utilities; the fixed capital is the TDC
+        # plus land, royalties and startup, and the TDC is what gets depreciated. investment_chain's TPI holds only
+        # those three additions, so it is summed here rather than taken from TCI
+        costs = _values(_get(operating,'costValue'))
+        for key in ('elecCost','twCost','ngCost','steamCost'):
+            costs = costs+_values(_get(operating,key,0.))
+        TDC = _values(_get(capital,'TDC'))
+        fixed = TDC+sum(_values(_get(capital,key)) for key in ('land','royalties','startup'))
+        kwargs.setdefault('depreciable',TDC)
+        return cls(fixed,_get(operating,'saleValue'),costs,_get(capital,'wc'),**kwargs)
+
+    def _out(self,res,money=True):
+        if self.scalar:
+            return Currency(res[0]) if money else float(res[0])
+        return CurrencyArray(res) if money else res
+
+    @property
+    def years(self):
+        return np.arange(self.cashFlow.shape[1])
+
+    @property
+    def cumulative(self):
+        return np.cumsum(self.cashFlow,axis=1)
+
+    def _npv(self,rate):
+        # rate: (scenarios,) -> NPV per scenario
+        return np.sum(self.cashFlow*(1+rate[:,None])**-self.years,axis=1)
+
+    def npv(self,rate=None):
+        rate = self.rate if rate is None else np.broadcast_to(np.asarray(rate,dtype=float),self.rate.shape)
+        return self._out(self._npv(rate))
+
+    def irr(self,low=-0.99,high=10.,tol=1e-10,max_iter=100):
+        # Newton on every scenario at once, kept inside a bracket that bisection falls back on whenever a step
+        # leaves it. NaN where the NPV does not change sign between low and high
+        n = len(self.rate)
+        lo,hi = np.full(n,low),np.full(n,high)
+        f_lo,f_hi = self._npv(lo),self._npv(hi)
+        ok = np.sign(f_lo) != np.sign(f_hi)
+        # orient the brackets so the NPV is positive at lo
+        flip = f_lo < 0
+        lo[flip],hi[flip] = hi[flip],lo[flip]
+
+        k = self.years
+        r = np.where(ok,0.1,np.nan)
+        r = np.where((r-lo)*(r-hi) < 0,r,(lo+hi)/2)
+        for _ in range(max_iter):
+            x = (1+r[:,None])**-k
+            f = np.sum(self.cashFlow*x,axis=1)
+            df = np.sum(-k*self.cashFlow*x/(1+r[:,None]),axis=1)
+
+            pos = f > 0
+            lo,hi = np.where(pos,r,lo),np.where(pos,hi,r)
+            with np.errstate(divide='ignore',invalid='ignore'):
+                step = r-f/df
+            inside = (step-lo)*(step-hi) < 0
+            new = np.where(inside,step,(lo+hi)/2)
+            done = np.abs(new-r) <= tol*(1+np.abs(r))
+            r = new
+            if np.all(done | ~ok):
+                break
+        return self._out(np.where(ok,r,np.nan),money=False)
+
+    def payback(self):
+        # years from start-up until the cumulative cash flow stops being negative, interpolated within the year;
+        # NaN if it never does
+        cum = np.concatenate([np.zeros((len(self.cashFlow),1)),self.cumulative],axis=1)
+        nc = self.nConstruction
+        paid = cum[:,nc+1:] >= 0
+        first = np.argmax(paid,axis=1)
+        rows = np.arange(len(cum))
+        with np.errstate(divide='ignore',invalid='ignore'):
+            res = first-cum[rows,nc+first]/self.cashFlow[rows,nc+first]
+        return self._out(np.where(paid.any(axis=1),res,np.nan),money=False)
+
+    def roi(self):
+        # average yearly net earnings over the total capital investment
+        return self._out(self.netEarnings.mean(axis=1)/(self.fixedCapital+self.workingCapital),money=False)
+
+    def summary(self):
+        return {'NPV': self.npv(),'IRR': self.irr(),'payback': self.payback(),'ROI': self.roi()}
+
+    def to_frame(self,scenario=0):
+        import pandas as pd
+        nc = self.nConstruction
+        pad = lambda a: np.concatenate([np.zeros(nc),a[scenario]])
+        return pd.DataFrame({
+            'Year': self.years-nc+1,
+            'Depreciation': pad(self.depreciation),
+            'Gross Profit': pad(self.grossProfit),
+            'Net Earnings': pad(self.netEarnings),
+            'Cash Flow': self.cashFlow[scenario],
+            'Cumulative': self.cumulative[scenario],
+        })
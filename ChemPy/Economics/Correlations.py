@@ -0,0 +1,195 @@
+import numpy as np
+
+
+class Correlation:
+    # a cost (or sizing) correlation stored once as coefficients, rendered both as a numpy kernel and as an Excel
+    # formula. The generated numpy source keeps the operation order the hand written kernels had, so costs do not
+    # move by a single ulp.
+    #
+    # forms, with t the (optionally scaled) first variable:
+    #   exp-poly-ln   exp(c0 + c1*ln t + c2*ln t^2 + ...)
+    #   poly-ln       c0 + c1*ln t + c2*ln t^2 + ...
+    #   poly          c0 + c1*t + c2*t^2 + ...
+    #   power         c0 * t^c1 * x2^c2 * ...   (one exponent per variable)
+    #   exp-linear    c0 * exp(c1*t)
+    #   zero          0, for the abstract module families
+
+    forms = ('exp-poly-ln','poly-ln','poly','power','exp-linear','zero')
+
+    def __init__(self,key:str,form:str,coefs:tuple=(),variables:tuple=('x',),scale:tuple|None=None,
+                 bounds:dict|None=None,units:str=''):
+
+        if form not in self.forms:
+            raise ValueError(f'unknown correlation form {form}')
+        if form == 'power' and len(coefs) != len(variables)+1:
+            raise ValueError(f'{key}: power needs one exponent per variable')
+
+        self.key = key
+        self.form = form
+        self.coefs = tuple(float(c) for c in coefs)
+        self.variables = tuple(variables)
+        self.scale = scale  # ('*',c) or ('/',c) applied to the first variable
+        self.bounds = bounds if bounds else {}  # variable -> (low, high) of the data the fit came from
+        self.units = units
+        self._kernel = None
+
+    def __repr__(self):
+        return f'Correlation({self.key!r}, {self.form!r})'
+
+    # region rendering
+    @staticmethod
+    def _num(c):
+        return str(int(c)) if c.is_integer() and abs(c) < 1e15 else repr(c)
+
+    def _poly(self,t,pow_op):
+        res = self._num(self.coefs[0])
+        for k,c in enumerate(self.coefs[1:],start=1):
+            res += f'-{self._num(-c)}' if c < 0 else f'+{self._num(c)}'
+            res += f'*{t}' if k == 1 else f'*{t}{pow_op}{k}'
+        return res
+
+    def _render(self,refs,ln,exp,pow_op):
+        if self.form == 'zero':
+            return '0'
+        refs = list(refs)
+        if self.scale:
+            refs[0] = f'({refs[0]}{self.scale[0]}{self._num(float(self.scale[1]))})'
+        t = refs[0]
+        if self.form == 'exp-poly-ln':
+            return f'{exp}({self._poly(f"{ln}({t})",pow_op)})'
+        if self.form == 'poly-ln':
+            return self._poly(f'{ln}({t})',pow_op)
+        if self.form == 'poly':
+            return self._poly(t,pow_op)
+        if self.form == 'power':
+            return self._num(self.coefs[0])+''.join(f'*{x}{pow_op}{self._num(e)}' for x,e in zip(refs,self.coefs[1:]))
+        if self.form == 'exp-linear':
+            return f'{self._num(self.coefs[0])}*{exp}({self._num(self.coefs[1])}*{t})'
+
+    @property
+    def source(self):
+        # python source of the numpy kernel
+        return self._render(self.variables,'np.log','np.exp','**')
+
+    def formula(self,*refs):
+        # Excel expression (no leading '=') with the variables replaced by cell references or names
+        if len(refs) != len(self.variables):
+            raise ValueError(f'{self.key} takes {len(self.variables)} references')
+        return self._render(refs,'LN','EXP','^')
+    # endregion
+
+    @property
+    def kernel(self):
+        # compiled on first use and kept, every later call is a single numpy expression
+        if self._kernel is None:
+            if self.form == 'zero':
+                self._kernel = lambda x,*args: np.zeros_like(x)
+            else:
+                code = compile(f'lambda {",".join(self.variables)}: {self.source}',f'<correlation {self.key}>','eval')
+                self._kernel = eval(code,{'np':np})
+        return self._kernel
+
+    def __call__(self,*args):
+        return self.kernel(*args)
+
+    def in_range(self,*args):
+        # True where every bounded variable lies inside the fitted range, elementwise over array arguments
+        res = np.ones(np.broadcast(*[np.asarray(a) for a in args]).shape,dtype=bool)
+        for var,val in zip(self.variables,args):
+            if var in self.bounds:
+                low,high = self.bounds[var]
+                res &= (np.asarray(val) >= low) & (np.asarray(val) <= high)
+        return res
+
+
+class CorrelationRegistry:
+
+    def __init__(self,correlations=()):
+        self.correlations = {}
+        for corr in correlations: self.add(corr)
+
+    def add(self,corr:Correlation):
+        if corr.key in self.correlations:
+            raise KeyError(f'{corr.key} is already registered')
+        self.correlations[corr.key] = corr
+        return corr
+
+    def __getitem__(self, key):
+        return self.correlations[key]
+
+    def __contains__(self, key):
+        return key in self.correlations
+
+    def __iter__(self):
+        return iter(self.correlations.values())
+
+    def __len__(self):
+        return len(self.correlations)
+
+
+# Seider, Seader, Lewin, Widagdo -- Product and Process Design Principles, CE = 567
+correlations = CorrelationRegistry([
+    Correlation('none','zero'),
+
+    # pumps and motors
+    Correlation('pump.efficiency','poly-ln',(-0.316,0.24015,-0.01199),('Q',),bounds={'Q':(50,5000)},units='gpm'),
+    Correlation('motor.efficiency','poly-ln',(0.8,0.0319,-0.00182),('Pb',),bounds={'Pb':(1,1500)},units='Hp'),
+    Correlation('motor.cost','exp-poly-ln',(5.9332,0.16829,-0.110056,0.071413,-0.0063788),('Pc',),
+                bounds={'Pc':(1,700)},units='Hp'),
+    Correlation('pump.centrifugal','exp-poly-ln',(12.1656,-1.1448,0.0862),('S',),bounds={'S':(400,100_000)},
+                units='gpm*ft^0.5'),
+    Correlation('pump.external_gear','exp-poly-ln',(8.2816,-0.2918,0.0743),('Q',),bounds={'Q':(10,900)},
+                units='gpm'),
+    Correlation('pump.reciprocating_plunger','exp-poly-ln',(7.9361,0.26986,0.06718),('Pb',),bounds={'Pb':(1,200)},
+                units='Hp'),
+
+    # compressors
+    Correlation('compressor.centrifugal','exp-poly-ln',(9.1553,0.63),('Pc',),bounds={'Pc':(200,30_000)},units='Hp'),
+    Correlation('compressor.reciprocating','exp-poly-ln',(4.6762,1.23),('Pc',),bounds={'Pc':(100,20_000)},
+                units='Hp'),
+    Correlation('compressor.screw','exp-poly-ln',(8.2496,0.7243),('Pc',),bounds={'Pc':(10,900)},units='Hp'),
+
+    # fans
+    Correlation('fan.centrifugal_backward','exp-poly-ln',(11.4152,-1.3805,0.1139),('Q',),bounds={'Q':(1000,100_000)},
+                units='ft3/min'),
+    Correlation('fan.centrifugal_straight','exp-poly-ln',(12.1667,-1.6407,0.1328),('Q',),bounds={'Q':(1000,20_000)},
+                units='ft3/min'),
+    Correlation('fan.vane_axial','exp-poly-ln',(9.6487,-0.97566,0.08532),('Q',),bounds={'Q':(1000,800_000)},
+                units='ft3/min'),
+    Correlation('fan.propeller','exp-poly-ln',(6.16328,-0.28635,0.04866),('Q',),bounds={'Q':(1000,50_000)},
+                units='ft3/min'),
+
+    # heat exchangers and fired heaters
+    Correlation('hx.pressure_factor','poly',(0.9803,0.018,0.0017),('P',),scale=('/',100),units='psig'),
+    Correlation('hx.floating_head','exp-poly-ln',(12.0310,-0.8709,0.09005),('A',),bounds={'A':(150,12_000)},
+                units='ft2'),
+    Correlation('hx.fixed_head','exp-poly-ln',(11.4185,-0.9228,0.09861),('A',),bounds={'A':(150,12_000)},
+                units='ft2'),
+    Correlation('hx.u_tube','exp-poly-ln',(11.5510,-0.9186,0.09790),('A',),bounds={'A':(150,12_000)},units='ft2'),
+    Correlation('hx.kettle','exp-poly-ln',(12.3310,-0.8709,0.09005),('A',),bounds={'A':(150,12_000)},units='ft2'),
+    Correlation('fired_heater.pressure_factor','poly',(0.986,-0.0035,0.0175),('P',),scale=('/',500),units='psig'),
+    Correlation('fired_heater','exp-poly-ln',(-0.15241,0.785),('Q',),bounds={'Q':(20e6,500e6)},units='Btu/h'),
+
+    # vessels and columns
+    Correlation('vessel.horizontal.shell','exp-poly-ln',(5.6336,0.4599,0.00582),('W',),bounds={'W':(1000,920_000)},
+                units='lb'),
+    Correlation('vessel.horizontal.platform','power',(2275,0.2094),('Di',),bounds={'Di':(3,12)},units='ft'),
+    Correlation('vessel.vertical.shell','exp-poly-ln',(7.1390,0.18255,0.02297),('W',),bounds={'W':(4200,1_000_000)},
+                units='lb'),
+    Correlation('vessel.vertical.platform','power',(410,0.7396,0.70684),('Di','L'),bounds={'Di':(3,21),'L':(12,40)},
+                units='ft'),
+    Correlation('column.shell','exp-poly-ln',(10.5449,-0.4672,0.05482),('W',),bounds={'W':(9000,2_500_000)},
+                units='lb'),
+    Correlation('column.platform','power',(341,0.63316,0.80161),('Di','L'),bounds={'Di':(3,24),'L':(27,170)},
+                units='ft'),
+    Correlation('column.trays','exp-linear',(468,0.1482),('Di',),bounds={'Di':(2,16)},units='ft'),
+
+    # storage tanks
+    Correlation('tank.open','power',(18,0.73),('V',),bounds={'V':(1000,1_000_000)},units='gal'),
+    Correlation('tank.cone_roof','power',(265,0.513),('V',),bounds={'V':(10_000,1_000_000)},units='gal'),
+    Correlation('tank.floating_roof','power',(475,0.507),('V',),bounds={'V':(30_000,1_000_000)},units='gal'),
+    Correlation('tank.spherical_lp','power',(68,0.72),('V',),bounds={'V':(10_000,1_000_000)},units='gal'),
+    Correlation('tank.spherical_hp','power',(53,0.78),('V',),bounds={'V':(10_000,750_000)},units='gal'),
+    Correlation('tank.gas_holder','power',(3595,0.43),('V',),scale=('*',7.48052),bounds={'V':(4000,400_000)},
+                units='ft3'),
+])
@@ -1,59 +1,98 @@
+import math
+
 import numpy as np
 
 
+_LOG_1E3 = math.log(1e3)
+
+
 class Currency:
 
-    mode = None
-    unit = '$'
+    __slots__ = ('value','unit','_mode')
+
+    # as in CurrencyArray: ndarray (op) Currency goes to the reflected operators below rather than element by element
+    __array_ufunc__ = None
 
     def __init__(self, value, unit:str|None=None, mode:int|None=None):
 
         if isinstance(value,Currency):
             self.value=value.value
             self.unit=value.unit
-            self.mode=value.mode
+            self._mode=value._mode
             return
 
-        self.value = value
-        if unit: self.unit = unit
-        if mode: self.mode = mode
-        elif not self.mode: self.mode = int(np.log(np.abs(self.value))//np.log(1e3)) if self.value != 0 else 0
+        self.value = float(value)
+        self.unit = unit if unit else '$'
+        self._mode = mode if mode else None
+
+    @property
+    def mode(self):
+        # only the sheet formats and __repr__ need this, so it is worked out on first use
+        if self._mode is None:
+            mag = abs(self.value)
+            self._mode = int(math.log(mag)//_LOG_1E3) if mag != 0 else 0
+        return self._mode
 
     def __repr__(self):
         return f'{self.unit}{self.value / 10 ** (3 * self.mode):0.2f} {"".join(self.mode * ["M"])}' \
             if self.value >= 0 else f'({self.unit}{self.value / 10 ** (3 * self.mode):0.2f}) {"".join(self.mode * ["M"])}'
 
     def __add__(self, other):
-        if isinstance(other, Currency):
+        if type(other) is Currency:
             if self.unit != other.unit:
                 raise ValueError()
-            return Currency(self.value + other.value)
-        return Currency(self.value + float(other), self.unit)
+            return _new_currency(self.value + other.value,self.unit)
+        if isinstance(other, CurrencyArray):
+            return NotImplemented
+        if isinstance(other, np.ndarray):
+            return CurrencyArray(self.value + other, self.unit)
+        return _new_currency(self.value + float(other),self.unit)
 
     def __radd__(self, other):
         return self.__add__(other)
 
     def __mul__(self, other):
-        return Currency(self.value * other, self.unit)
+        if type(other) is float or type(other) is int:
+            return _new_currency(self.value * other,self.unit)
+        if isinstance(other, CurrencyArray):
+            return NotImplemented
+        if isinstance(other, np.ndarray):
+            return CurrencyArray(self.value * other, self.unit)
+        return _new_currency(self.value * _scalar(other),self.unit)
 
     def __rmul__(self, other):
         return self.__mul__(other)
 
     def __sub__(self,other):
-        return Currency(self.value-other.value,self.unit) if isinstance(other,Currency) else\
-            Currency(self.value-other,self.unit)
+        if type(other) is Currency:
+            return _new_currency(self.value - other.value,self.unit)
+        if isinstance(other,CurrencyArray):
+            return NotImplemented
+        if isinstance(other,np.ndarray):
+            return CurrencyArray(self.value - other,self.unit)
+        return _new_currency(self.value - float(other),self.unit)
 
     def __float__(self):
-        return float(self.value)
+        return self.value
 
     def __truediv__(self, other):
-        return Currency(self.value/other,self.unit)
+        if type(other) is float or type(other) is int:
+            return _new_currency(self.value / other,self.unit)
+        if isinstance(other,CurrencyArray):
+            return NotImplemented
+        if isinstance(other,np.ndarray):
+            return CurrencyArray(self.value/other,self.unit)
+        return _new_currency(self.value / _scalar(other),self.unit)
 
     def __rtruediv__(self, other):
-        return Currency(other/self.value,self.unit)
+        if isinstance(other,np.ndarray):
+            return CurrencyArray(other/self.value,self.unit)
+        return _new_currency(_scalar(other) / self.value,self.unit)
 
     def update_cost(self,newCE,baseCE):
-        return self*newCE/baseCE
+        if isinstance(newCE,np.ndarray):
+            return CurrencyArray(self.value*newCE/baseCE,self.unit)
+        return _new_currency(self.value*_scalar(newCE)/_scalar(baseCE),self.unit)
 
     @classmethod
     def Economize(cls,f):
@@ -69,3 +108,146 @@ class Currency:
             return cls(f(*args))
 
         return new_f
+
+
+def _scalar(x):
+    return x.value if type(x) is Currency else float(x)
+
+
+def _new_currency(value, unit):
+    # skips __init__ for results whose value is already a float
+    res = object.__new__(Currency)
+    res.value = value
+    res.unit = unit
+    res._mode = None
+    return res
+
+
+class CurrencyArray:
+
+    unit = '$'
+
+    # keep numpy from broadcasting over this object element by element, so ndarray (op) CurrencyArray
+    # falls through to the reflected operators below
+    __array_ufunc__ = None
+
+    def __init__(self, values, unit:str|None=None):
+
+        if isinstance(values,CurrencyArray):
+            self.values = values.values
+            self.unit = unit if unit else values.unit
+            return
+
+        self.values = np.asarray(values,dtype=float)
+        if unit: self.unit = unit
+
+    @classmethod
+    def from_currencies(cls,costs):
+        costs = list(costs)
+        units = {c.unit for c in costs if isinstance(c,Currency)}
+        if len(units) > 1:
+            raise ValueError()
+        return cls(np.fromiter((float(c) for c in costs),dtype=float,count=len(costs)),units.pop() if units else None)
+
+    @property
+    def mode(self):
+        mag = np.abs(self.values)
+        with np.errstate(divide='ignore',invalid='ignore'):
+            mode = np.log(mag)//np.log(1e3)
+        return np.where(mag > 0,mode,0).astype(int)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def size(self):
+        return self.values.size
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        for v in self.values.flat:
+            yield Currency(float(v),self.unit)
+
+    def __getitem__(self, item):
+        return self._reduced(self.values[item])
+
+    def __repr__(self):
+        return f'CurrencyArray({self.unit}, {self.values!r})'
+
+    def __array__(self, dtype=None, copy=None):
+        return self.values if dtype is None else self.values.astype(dtype)
+
+    def _other_values(self, other):
+        if isinstance(other,(CurrencyArray,Currency)):
+            if self.unit != other.unit:
+                raise ValueError()
+            return other.values if isinstance(other,CurrencyArray) else other.value
+        return np.asarray(other,dtype=float)
+
+    def __add__(self, other):
+        return CurrencyArray(self.values + self._other_values(other),self.unit)
+
+    def __radd__(self, other):
+        return CurrencyArray(self._other_values(other) + self.values,self.unit)
+
+    def __sub__(self, other):
+        return CurrencyArray(self.values - self._other_values(other),self.unit)
+
+    def __rsub__(self, other):
+        return CurrencyArray(self._other_values(other) - self.values,self.unit)
+
+    def __neg__(self):
+        return CurrencyArray(-self.values,self.unit)
+
+    def __mul__(self, other):
+        return CurrencyArray(self.values * self._other_values(other),self.unit)
+
+    def __rmul__(self, other):
+        return CurrencyArray(self._other_values(other) * self.values,self.unit)
+
+    def __truediv__(self, other):
+        return CurrencyArray(self.values / self._other_values(other),self.unit)
+
+    def __rtruediv__(self, other):
+        return CurrencyArray(self._other_values(other) / self.values,self.unit)
+
+    def __eq__(self, other):
+        return self.values == self._other_values(other)
+
+    def __lt__(self, other):
+        return self.values < self._other_values(other)
+
+    def __le__(self, other):
+        return self.values <= self._other_values(other)
+
+    def __gt__(self, other):
+        return self.values > self._other_values(other)
+
+    def __ge__(self, other):
+        return self.values >= self._other_values(other)
+
+    __hash__ = None
+
+    def _reduced(self, res):
+        return Currency(float(res),self.unit) if np.ndim(res) == 0 else CurrencyArray(res,self.unit)
+
+    def sum(self, axis=None):
+        return self._reduced(self.values.sum(axis=axis))
+
+    def mean(self, axis=None):
+        return self._reduced(self.values.mean(axis=axis))
+
+    def min(self, axis=None):
+        return self._reduced(self.values.min(axis=axis))
+
+    def max(self, axis=None):
+        return self._reduced(self.values.max(axis=axis))
+
+    def percentile(self, q, axis=None):
+        return self._reduced(np.percentile(self.values,q,axis=axis))
+
+    def update_cost(self,newCE,baseCE):
+        return self*newCE/baseCE
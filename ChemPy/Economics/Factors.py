@@ -0,0 +1,81 @@
+import numpy as np
+
+from ChemPy.Economics.Correlations import CorrelationRegistry
+
+
+class FactorTable:
+    # a factor tabulated against one variable (tube length, tray spacing, steam pressure, ...). The listed points are
+    # returned exactly; in between either a curve fitted to the points once, on first use, or straight lines between
+    # neighbouring points. Outside the points a fit extrapolates and an interpolation holds the end value, unless
+    # outside='raise'.
+    #
+    # the fit is a function of the sorted (x, y) points returning a vectorized curve. `special` values (e.g. 0 for
+    # "no steam") are returned exactly too but stay out of the curve, so nothing is interpolated towards them
+
+    def __init__(self,key:str,points:dict,fit=None,decimals:int|None=None,units:str='',special:dict|None=None,
+                 outside='hold'):
+        if outside not in ('hold','raise'):
+            raise ValueError(f'outside is hold or raise, not {outside}')
+        self.key = key
+        self.special = special if special else {}
+        self.points = {**points,**self.special}
+        self.x = np.array(sorted(points),dtype=float)
+        self.y = np.array([points[x] for x in sorted(points)],dtype=float)
+        self.fit = fit
+        self.decimals = decimals  # rounding of the fitted values, the way the factor is quoted
+        self.units = units
+        self.outside = outside
+        self._curve = None
+
+    def __repr__(self):
+        return f'FactorTable({self.key!r})'
+
+    @property
+    def curve(self):
+        if self._curve is None:
+            self._curve = self.fit(self.x,self.y) if self.fit else lambda x: np.interp(x,self.x,self.y)
+        return self._curve
+
+    def __call__(self,x):
+        x = np.asarray(x,dtype=float)
+        flat = np.atleast_1d(x)
+        res = np.atleast_1d(self.curve(flat)).astype(float)
+
+        if self.fit is not None:
+            if self.decimals is not None: res = np.round(res,self.decimals)
+            # listed points win over the fit
+            k = np.clip(np.searchsorted(self.x,flat),0,len(self.x)-1)
+            hit = self.x[k] == flat
+            res[hit] = self.y[k[hit]]
+
+        special = np.zeros(flat.shape,dtype=bool)
+        for value,factor in self.special.items():
+            hit = flat == value
+            res[hit] = factor
+            special |= hit
+
+        if self.outside == 'raise':
+            bad = ~(special | self.in_range(flat))
+            if bad.any():
+                raise ValueError(f'{self.key}: {flat[bad][0]} {self.units} is outside {self.x[0]} .. {self.x[-1]}')
+        return res.reshape(x.shape)[()]
+
+    def in_range(self,x):
+        return (np.asarray(x) >= self.x[0]) & (np.asarray(x) <= self.x[-1])
+
+
+def _rational(x,y):
+    # y = a + b/(x + c), linearised as x*y = a*x + (b + a*c) - c*y and solved by least squares
+    A = np.array([x,np.ones_like(x),-y]).T
+    a,bc,c = np.linalg.solve(A.T @ A,A.T @ (x*y))
+    b = bc-a*c
+    return lambda L: a+b/(L+c)
+
+
+factors = CorrelationRegistry([
+    FactorTable('hx.tube_length',{8:1.25,12:1.12,16:1.05,20:1.0},fit=_rational,decimals=2,units='ft'),
+    FactorTable('column.tray_spacing',{24:1,18:1.4,12:2.2},units='in'),
+    # 0 psig is no steam at all, not a header: it costs nothing, and a pressure under the lowest header is
+    # charged the lowest header's price
+    FactorTable('steam.price',{1200:11.02,600:8.91,300:7.81,150:7.10,90:6.7,30:6.07},units='psig',special={0:0}),
+])
@@ -0,0 +1,333 @@
+import functools
+import math
+import re
+
+
+class FormulaError(ValueError):
+    # an Excel error value (#DIV/0!, #NAME?, ...) or something outside the supported subset
+    pass
+
+
+_TOKEN = re.compile(r'''
+    \s*(?:
+      (?P<num>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+     |"(?P<str>(?:[^"]|"")*)"
+     |(?P<ref>\$?[A-Za-z]{1,3}\$?\d+)(?![\w.(])
+     |(?P<name>[A-Za-z_\\][\w.]*)
+     |(?P<op><>|<=|>=|[-+*/^&=<>%(),:])
+    )''',re.VERBOSE)
+
+_PERCENT = re.compile(r'^\s*([-+]?\d*\.?\d+)\s*%\s*$')
+
+
+def col_index(letters):
+    res = 0
+    for ch in letters.upper(): res = res*26+ord(ch)-64
+    return res-1
+
+
+def cell_index(ref):
+    # 'C5' / '$c$5' -> (4,2), 0 based like the sheets
+    m = re.fullmatch(r'\$?([A-Za-z]{1,3})\$?(\d+)',ref.strip())
+    if not m:
+        raise FormulaError(f'not a cell reference: {ref}')
+    return int(m.group(2))-1,col_index(m.group(1))
+
+
+def parse_literal(text):
+    # what Excel stores when text that is not a formula is typed into a cell
+    if not isinstance(text,str):
+        return text
+    if not text:
+        return None
+    if text.startswith('\''):
+        return text[1:]
+    m = _PERCENT.match(text)
+    if m:
+        return float(m.group(1))/100
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def _tokenize(formula):
+    tokens = []
+    pos = 0
+    formula = formula.rstrip()
+    while pos < len(formula):
+        m = _TOKEN.match(formula,pos)
+        if not m or m.end() == pos:
+            raise FormulaError(f'cannot read {formula[pos:]!r}')
+        kind = m.lastgroup
+        tokens.append((kind,m.group(kind)))
+        pos = m.end()
+    return tokens
+
+
+class _Parser:
+    # recursive descent over Excel's precedence, loosest first:
+    # comparison, &, + -, * /, ^, %, unary minus, : -- so -2^2 is 4 and 2^3^2 is 64 like in Excel
+
+    def __init__(self,tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None,None)
+
+    def take(self,value=None):
+        tok = self.peek()
+        if value is not None and tok[1] != value:
+            raise FormulaError(f'expected {value!r}, found {tok[1]!r}')
+        self.pos += 1
+        return tok
+
+    def is_op(self,*ops):
+        kind,value = self.peek()
+        return kind == 'op' and value in ops
+
+    def parse(self):
+        node = self.comparison()
+        if self.pos != len(self.tokens):
+            raise FormulaError(f'unexpected {self.peek()[1]!r}')
+        return node
+
+    def _binary(self,ops,operand):
+        node = operand()
+        while self.is_op(*ops):
+            op = self.take()[1]
+            node = ('bin',op,node,operand())
+        return node
+
+    def comparison(self):
+        return self._binary(('=','<>','<','>','<=','>='),self.concat)
+
+    def concat(self):
+        return self._binary(('&',),self.additive)
+
+    def additive(self):
+        return self._binary(('+','-'),self.multiplicative)
+
+    def multiplicative(self):
+        return self._binary(('*','/'),self.power)
+
+    def power(self):
+        return self._binary(('^',),self.percent)
+
+    def percent(self):
+        node = self.unary()
+        while self.is_op('%'):
+            self.take()
+            node = ('pct',node)
+        return node
+
+    def unary(self):
+        if self.is_op('-'):
+            self.take()
+            return ('neg',self.unary())
+        if self.is_op('+'):
+            self.take()
+            return self.unary()
+        return self.range()
+
+    def range(self):
+        node = self.primary()
+        if self.is_op(':'):
+            self.take()
+            end = self.primary()
+            if node[0] != 'ref' or end[0] != 'ref':
+                raise FormulaError('ranges need two cell references')
+            node = ('range',min(node[1],end[1]),min(node[2],end[2]),max(node[1],end[1]),max(node[2],end[2]))
+        return node
+
+    def primary(self):
+        kind,value = self.take()
+        if kind == 'num':
+            return ('num',float(value))
+        if kind == 'str':
+            return ('str',value.replace('""','"'))
+        if kind == 'ref':
+            return ('ref',*cell_index(value))
+        if kind == 'name':
+            if self.is_op('('):
+                self.take()
+                args = []
+                if not self.is_op(')'):
+                    args.append(self.comparison())
+                    while self.is_op(','):
+                        self.take()
+                        args.append(self.comparison())
+                self.take(')')
+                return ('call',value.upper().removeprefix('_XLFN.'),args)
+            if value.upper() in ('TRUE','FALSE'):
+                return ('bool',value.upper() == 'TRUE')
+            return ('name',value.upper())
+        if kind == 'op' and value == '(':
+            node = self.comparison()
+            self.take(')')
+            return node
+        raise FormulaError(f'unexpected {value!r}')
+
+
+@functools.lru_cache(maxsize=4096)
+def parse(formula:str):
+    # the modules emit the same formula shapes row after row, so parsed trees are shared
+    return _Parser(_tokenize(formula.removeprefix('='))).parse()
+
+
+def _number(v):
+    if v is None: return 0.
+    if isinstance(v,bool): return float(v)
+    if isinstance(v,(int,float)): return float(v)
+    try:
+        return float(v)
+    except ValueError:
+        raise FormulaError('#VALUE!')
+
+
+def _text(v):
+    if v is None: return ''
+    if isinstance(v,bool): return 'TRUE' if v else 'FALSE'
+    if isinstance(v,float): return f'{v:.15g}'
+    return str(v)
+
+
+def _values(args,numbers_only):
+    # ranges skip text and booleans the way SUM/MAX do, direct arguments are coerced
+    for arg in args:
+        if isinstance(arg,list):
+            for v in arg:
+                if numbers_only and (isinstance(v,(str,bool)) or v is None): continue
+                yield v
+        else:
+            yield arg
+
+
+def _checked(f,*args):
+    try:
+        res = f(*args)
+    except (ValueError,OverflowError,ZeroDivisionError):
+        raise FormulaError('#NUM!')
+    if isinstance(res,float) and not math.isfinite(res):
+        raise FormulaError('#NUM!')
+    return res
+
+
+def _textjoin(delim,ignore_empty,*args):
+    parts = [_text(v) for v in _values(args,False)]
+    if ignore_empty: parts = [p for p in parts if p]
+    return _text(delim).join(parts)
+
+
+_FUNCS = {
+    'EXP': lambda x: _checked(math.exp,_number(x)),
+    'LN': lambda x: _checked(math.log,_number(x)),
+    'SQRT': lambda x: _checked(math.sqrt,_number(x)),
+    'ABS': lambda x: abs(_number(x)),
+    'SUM': lambda *a: math.fsum(_number(v) for v in _values(a,True)),
+    'MAX': lambda *a: max((_number(v) for v in _values(a,True)),default=0.),
+    'MIN': lambda *a: min((_number(v) for v in _values(a,True)),default=0.),
+    'TEXTJOIN': _textjoin,
+    'TRUE': lambda: True,
+    'FALSE': lambda: False,
+}
+
+
+def _compare(op,a,b):
+    if isinstance(a,str) or isinstance(b,str):
+        a,b = _text(a).upper(),_text(b).upper()
+    else:
+        a,b = _number(a),_number(b)
+    return {'=': a == b,'<>': a != b,'<': a < b,'>': a > b,'<=': a <= b,'>=': a >= b}[op]
+
+
+def _arith(op,a,b):
+    a,b = _number(a),_number(b)
+    if op == '+': return a+b
+    if op == '-': return a-b
+    if op == '*': return a*b
+    if op == '/':
+        if b == 0: raise FormulaError('#DIV/0!')
+        return a/b
+    # Excel's ^ on floats, which is what math.pow does; 0^negative and roots of negatives are #NUM!/#DIV/0!
+    if a == 0 and b < 0: raise FormulaError('#DIV/0!')
+    return _checked(math.pow,a,b)
+
+
+class Evaluator:
+    # computes cells of one sheet from what was written to it: constants, formulas and named cells
+
+    def __init__(self,cells:dict|None=None,names:dict|None=None):
+        self.cells = cells if cells is not None else {}  # (row,col) -> (content, is formula)
+        self.names = names if names is not None else {}  # NAME -> (row,col)
+        self._cache = {}
+        self._active = set()
+
+    def set(self,row,col,content,formula=False):
+        self.cells[row,col] = (content,formula)
+        if self._cache: self._cache = {}
+
+    def name(self,ref,name):
+        self.names[name.upper()] = cell_index(ref)
+        if self._cache: self._cache = {}
+
+    def value(self,row,col):
+        key = (row,col)
+        if key in self._cache:
+            return self._cache[key]
+        if key not in self.cells:
+            return None
+        content,formula = self.cells[key]
+        if formula and isinstance(content,str) and content.startswith('='):
+            if key in self._active:
+                raise FormulaError(f'circular reference at {key}')
+            self._active.add(key)
+            try:
+                res = self._eval(parse(content))
+            finally:
+                self._active.discard(key)
+        else:
+            res = parse_literal(content) if formula else content
+            if isinstance(res,str) and res.startswith('\''): res = res[1:]
+        if isinstance(res,list):
+            raise FormulaError('#VALUE!')
+        self._cache[key] = res
+        return res
+
+    def value_of(self,name):
+        try:
+            return self.value(*self.names[name.upper()])
+        except KeyError:
+            raise FormulaError(f'#NAME? {name}')
+
+    def evaluate(self,formula:str):
+        return self._eval(parse(formula))
+
+    def _eval(self,node):
+        kind = node[0]
+        if kind in ('num','str','bool'):
+            return node[1]
+        if kind == 'ref':
+            return self.value(node[1],node[2])
+        if kind == 'name':
+            return self.value_of(node[1])
+        if kind == 'range':
+            _,r0,c0,r1,c1 = node
+            return [self.value(r,c) for r in range(r0,r1+1) for c in range(c0,c1+1)]
+        if kind == 'neg':
+            return -_number(self._eval(node[1]))
+        if kind == 'pct':
+            return _number(self._eval(node[1]))/100
+        if kind == 'bin':
+            _,op,a,b = node
+            a,b = self._eval(a),self._eval(b)
+            if op == '&': return _text(a)+_text(b)
+            if op in ('=','<>','<','>','<=','>='): return _compare(op,a,b)
+            return _arith(op,a,b)
+        if kind == 'call':
+            _,fn,args = node
+            if fn not in _FUNCS:
+                raise FormulaError(f'#NAME? {fn}')
+            return _FUNCS[fn](*[self._eval(a) for a in args])
+        raise FormulaError(f'unknown node {kind}')
@@ -1,4 +1,5 @@
 from ChemPy.Economics.Currency import Currency
+from ChemPy.Economics.Factors import factors
 
 class Material:
     CarbonSteel = 'Carbon Steel'
@@ -26,15 +27,7 @@ class Material:
 
 class SteamStream:
 
-    pres_dict = {
-        1200:11.02,
-        600:8.91,
-        300:7.81,
-        150:7.10,
-        90:6.7,
-        30:6.07,
-        0:0
-    }
+    pres_dict = factors['steam.price'].points
 
     def __init__(self,pressure,flow,heat_load):
         self.pres = pressure
@@ -42,7 +35,9 @@ class SteamStream:
         self.heatLoad = heat_load
 
     def cost(self,hours):
-        return Currency(hours*self.heatLoad*self.pres_dict[self.pres])
+        # priced on a straight line between the neighbouring headers, at the end header outside 30 .. 1200 psig;
+        # 0 psig is no steam and costs nothing
+        return Currency(hours*self.heatLoad*float(factors['steam.price'](self.pres)))
 
 
 class RawMaterial:
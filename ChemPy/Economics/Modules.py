@@ -1,9 +1,21 @@
-from ChemPy.Economics.Currency import Currency
+from ChemPy.Economics.Currency import Currency, CurrencyArray
 from ChemPy.Economics.Materials import Catalyst,SteamStream
-import xlwings as xl
+from ChemPy.Economics.Backends import Sheet
+from ChemPy.Economics.Correlations import correlations
+from ChemPy.Economics.Factors import factors
 import numpy as np
 
 
+def _one(f,*args):
+    # evaluates a vectorized kernel for a single unit. numpy's scalar power takes a different code path than the
+    # array loops, so going through a one element array keeps the per-instance and cost_batch results identical
+    return f(*(np.array([a],dtype=float) for a in args))[0]
+
+
+def _arr(x):
+    return np.asarray(x,dtype=float)
+
+
 class Module:
     Fbm = 1.0
     Fp = 1.0
@@ -11,6 +23,7 @@ class Module:
     Fm = 1.0
     corrCE = 567
     xlHeader=[]
+    batchSizeParams = ()  # cost_batch arguments that scale with the size of the unit
 
     def __init__(self,name:str,desc:str):
 
@@ -26,7 +39,7 @@ class Module:
     def generate_row_xl(self):
         return self.baseCost,self.purchCost,self.bmCost
 
-    def generate_formulas_xl(self,sh:xl.Sheet,row):
+    def generate_formulas_xl(self,sh:Sheet,row):
         return []
 
     @Currency.econ_func
@@ -41,11 +54,31 @@ class Module:
     def bm_cost_calc(self):
         return self.purchCost*(self.Fbm+(self.Fd*self.Fm*self.Fp-1))
 
+    def batch_params(self):
+        return {'Fbm':self.Fbm,'Fd':self.Fd,'Fm':self.Fm,'Fp':self.Fp}
+
+    @classmethod
+    def _batch_factors(cls,Fbm=None,Fd=None,Fm=None,Fp=None):
+        return {key: getattr(cls,key) if val is None else _arr(val)
+                for key,val in (('Fbm',Fbm),('Fd',Fd),('Fm',Fm),('Fp',Fp))}
+
+    @classmethod
+    def _batch_fm(cls,Fm=None,**params):
+        # the material factor cost_batch works with for these arguments
+        return cls.Fm if Fm is None else _arr(Fm)
+
+    @staticmethod
+    def _batch_bm_cost(res):
+        res['bmCost'] = res['purchCost']*(res['Fbm']+(res['Fd']*res['Fm']*res['Fp']-1))
+        return res
+
 
 # region Pump
 class Pump(Module):
 
+    batchSizeParams = ('flow_rate','pump_power')
     Fbm = 3.30
+    sizeAttr = 'Q'  # variable the pump correlation is written in (Q, Pb or S)
     xlHeader=['Name','Flow','Head','Size Factor','Pump Cost','Pump Power','Pump Efficiency','Brake Power',
               'Motor Efficiency','Power Consumption','Motor Cost','Cb','Cp','Fbm','Fm','Fd','Fp','Cbm']
 
@@ -59,9 +92,9 @@ class Pump(Module):
         self.Ft = type_factor_pump
         self.motorFt = type_factor_motor
 
-        self.etaP = -0.316+0.24015*np.log(self.Q)-0.01199*np.log(self.Q)**2
+        self.etaP = _one(self._pump_eff,self.Q)
         self.Pb = self.Pt/self.etaP
-        self.etaM = 0.8+0.0319*np.log(self.Pb)-0.00182*np.log(self.Pb)**2
+        self.etaM = _one(self._motor_eff,self.Pb)
         self.Pc = self.Pt/self.etaP/self.etaM
 
         self.motorBaseCost = self.motor_base_cost_calc()
@@ -73,27 +106,32 @@ class Pump(Module):
 
     def generate_row_xl(self):
         return [self.name,self.Q,'\'--','\'--',self.pumpPurchCost,self.Pt,self.etaP,self.Pb,self.etaM,self.Pc,self.motorPurchCost,
-                self.baseCost,self.purchCost,self.Fbm,self.Fd,self.Fm,self.Fp,self.bmCost]
+                self.baseCost,self.purchCost,self.Fbm,self.Fm,self.Fd,self.Fp,self.bmCost]
 
-    def generate_formulas_xl(self,sh:xl.Sheet,row):
+    def generate_formulas_xl(self,sh:Sheet,row):
 
-        sh.range(f'R{row}').name = f'BM_{self.xlNameRange}'
-        sh.range(f'M{row}').name = f'CP_{self.xlNameRange}'
+        sh.name_range(f'R{row}',f'BM_{self.xlNameRange}')
+        sh.name_range(f'M{row}',f'CP_{self.xlNameRange}')
 
         currency = [0,0,0,0,1,0,0,0,0,0,1,1,0,0,0,0,0,1]
+        size = {'Q':f'B{row}','S':f'D{row}','Pb':f'H{row}'}[self.sizeAttr]
 
         return [self.name,self.Q,'\'--',f'\'--',
-                f'=EXP(12.1656-1.1448*LN(D{row})+0.0862*LN(D{row})^2)*{self.Ft}*{self.Fm}',
-                self.Pt,f'=-0.316+0.24015*LN(B{row})-0.01199*LN(B{row})^2',f'=F{row}/G{row}',
-                f'=0.8+0.0319*LN(H{row})-0.00182*LN(H{row})^2',f'=F{row}/G{row}/I{row}',
-                f'=EXP(5.9332+0.16829*LN(J{row})-0.110056*LN(J{row})^2+0.071413*LN(J{row})^3-.0063788*LN(J{row})^4)*{self.motorFt}',
+                f'={self._pump_base_cost.formula(size)}*{self.Ft}*{self.Fm}',
+                self.Pt,f'={self._pump_eff.formula(f"B{row}")}',f'=F{row}/G{row}',
+                f'={self._motor_eff.formula(f"H{row}")}',f'=F{row}/G{row}/I{row}',
+                f'={self._motor_base_cost.formula(f"J{row}")}*{self.motorFt}',
                 f'=E{row}/{self.Ft}/{self.Fm}+K{row}/{self.motorFt}',f'=E{row}+K{row}',self.Fbm,self.Fm,self.Fd,self.Fp,
-                f'=M{row}*(N{row}+(O{row}*P{row}*Q{row}-1))'],currency
+                f'=M{row}*(N{row}+(P{row}*O{row}*Q{row}-1))'],currency
+
+    _pump_eff = correlations['pump.efficiency']
+    _motor_eff = correlations['motor.efficiency']
+    _motor_base_cost = correlations['motor.cost']
+    _pump_base_cost = correlations['none']
 
     @Currency.econ_func
     def motor_base_cost_calc(self):
-        return np.exp(5.9332+0.16829*np.log(self.Pc)-0.110056*np.log(self.Pc)**2+\
-                      0.071413*np.log(self.Pc)**3-0.0063788*np.log(self.Pc)**4)
+        return _one(self._motor_base_cost,self.Pc)
 
     @Currency.econ_func
     def motor_purch_cost_calc(self):
@@ -101,7 +139,7 @@ class Pump(Module):
 
     @Currency.econ_func
     def pump_base_cost_calc(self):
-        return 0
+        return _one(self._pump_base_cost,getattr(self,self.sizeAttr))
 
     @Currency.econ_func
     def pump_purch_cost_calc(self):
@@ -115,9 +153,43 @@ class Pump(Module):
     def purch_cost_calc(self):
         return self.pumpPurchCost+self.motorPurchCost
 
+    def batch_params(self):
+        return {**super().batch_params(),'flow_rate':self.Q,'pump_power':self.Pt,
+                'type_factor_pump':self.Ft,'type_factor_motor':self.motorFt}
+
+    @classmethod
+    def cost_batch(cls,flow_rate,pump_power,head=None,type_factor_pump=1.0,type_factor_motor=1.0,
+                   Fbm=None,Fd=None,Fm=None,Fp=None):
+
+        res = cls._batch_factors(Fbm,Fd,Fm,Fp)
+        res['Q'] = Q = _arr(flow_rate)
+        res['Pt'] = Pt = _arr(pump_power)
+        Ft,motorFt = _arr(type_factor_pump),_arr(type_factor_motor)
+
+        res['etaP'] = etaP = cls._pump_eff(Q)
+        res['Pb'] = Pb = Pt/etaP
+        res['etaM'] = etaM = cls._motor_eff(Pb)
+        res['Pc'] = Pt/etaP/etaM
+        if head is not None:
+            res['H'] = _arr(head)
+            res['S'] = Q*np.sqrt(res['H'])
+        elif cls.sizeAttr == 'S':
+            raise ValueError(f'{cls.__name__}.cost_batch needs head')
+
+        res['motorBaseCost'] = CurrencyArray(cls._motor_base_cost(res['Pc']))
+        res['motorPurchCost'] = res['motorBaseCost']*motorFt
+        res['pumpBaseCost'] = CurrencyArray(cls._pump_base_cost(res[cls.sizeAttr]))
+        res['pumpPurchCost'] = res['pumpBaseCost']*Ft*res['Fm']
+        res['baseCost'] = res['pumpBaseCost']+res['motorBaseCost']
+        res['purchCost'] = res['pumpPurchCost']+res['motorPurchCost']
+
+        return cls._batch_bm_cost(res)
+
 
 class CentrifugalPump(Pump):
 
+    sizeAttr = 'S'
+
     def __init__(self,name,desc,flow_rate,pump_power,head:float,type_factor=1.0,motor_type_factor=1.0,**kwargs):
 
         self.S = flow_rate * np.sqrt(head) # size factor
@@ -125,9 +197,10 @@ class CentrifugalPump(Pump):
 
         super().__init__(name,desc,flow_rate,pump_power,type_factor,motor_type_factor,**kwargs)
 
-    @Currency.econ_func
-    def pump_base_cost_calc(self):
-        return np.exp(12.1656-1.1448*np.log(self.S)+0.0862*np.log(self.S)**2)
+    _pump_base_cost = correlations['pump.centrifugal']
+
+    def batch_params(self):
+        return {**super().batch_params(),'head':self.H}
 
     def generate_row_xl(self):
         res = super().generate_row_xl()
@@ -135,7 +208,7 @@ class CentrifugalPump(Pump):
         res[3] = self.S
         return res
 
-    def generate_formulas_xl(self,sh:xl.Sheet,row):
+    def generate_formulas_xl(self,sh:Sheet,row):
         res = super().generate_formulas_xl(sh,row)
         res[0][2]=self.H
         res[0][3]=f'=B{row}*SQRT(C{row})'
@@ -144,22 +217,21 @@ class CentrifugalPump(Pump):
 
 class ExternalGearPump(Pump):
 
-    @Currency.econ_func
-    def pump_base_cost_calc(self):
-        return np.exp(8.2816-0.2918*np.log(self.Q)+0.0743*np.log(self.Q)**2)
+    _pump_base_cost = correlations['pump.external_gear']
 
 
 class ReciprocatingPlungerPump(Pump):
 
-    @Currency.econ_func
-    def pump_base_cost_calc(self):
-        return np.exp(7.9361+0.26986*np.log(self.Pb)+0.06718*np.log(self.Pb)**2)
+    sizeAttr = 'Pb'
+
+    _pump_base_cost = correlations['pump.reciprocating_plunger']
 # endregion
 
 
 # region Compressor
 class Compressor(Module):
 
+    batchSizeParams = ('pump_power',)
     xlHeader = ['Name','Pt','ηP','ηM','Pc','Cb','Cp','Fbm','Fm','Fd','Fp','Cbm']
     Fbm = 2.15
 
@@ -171,22 +243,45 @@ class Compressor(Module):
         self.Pc = self.Pt/self.etaP/self.etaM
         super().__init__(name,desc)
 
+    _base_cost = correlations['none']
+
+    @Currency.econ_func
+    def base_cost_calc(self):
+        return _one(self._base_cost,self.Pc)
+
     @Currency.econ_func
     def purch_cost_calc(self):
         return self.baseCost*self.Fd*self.Fm
 
+    def batch_params(self):
+        return {**super().batch_params(),'pump_power':self.Pt,'comp_eff':self.etaP,'motor_eff':self.etaM}
+
+    @classmethod
+    def cost_batch(cls,pump_power,comp_eff=0.75,motor_eff=1.0,Fbm=None,Fd=None,Fm=None,Fp=None):
+
+        res = cls._batch_factors(Fbm,Fd,Fm,Fp)
+        res['Pt'] = _arr(pump_power)
+        res['etaP'] = _arr(comp_eff)
+        res['etaM'] = _arr(motor_eff)
+        res['Pc'] = res['Pt']/res['etaP']/res['etaM']
+
+        res['baseCost'] = CurrencyArray(cls._base_cost(res['Pc']))
+        res['purchCost'] = res['baseCost']*res['Fd']*res['Fm']
+
+        return cls._batch_bm_cost(res)
+
     def generate_row_xl(self):
         return [self.name,self.Pt,self.etaP,self.etaM,self.Pc,self.baseCost,self.purchCost,
                 self.Fbm,self.Fm,self.Fd,self.Fp,self.bmCost]
 
-    def generate_formulas_xl(self,sh:xl.Sheet,row):
+    def generate_formulas_xl(self,sh:Sheet,row):
 
         a = self.name
         b = self.Pt
         c = self.etaP
         d = self.etaM
         e = f'=B{row}/C{row}/D{row}'
-        f = '' # i = 5
+        f = f'={self._base_cost.formula(f"E{row}")}'
         g = f'=F{row}*{self.Fm}*{self.Fd}'
         h = self.Fbm
         i = self.Fm
@@ -194,8 +289,8 @@ class Compressor(Module):
         k = self.Fp
         l = f'=G{row}*(H{row}+(I{row}*J{row}*K{row}-1))'
 
-        sh.range(f'G{row}').name = f'CP_{self.xlNameRange}'
-        sh.range(f'L{row}').name = f'BM_{self.xlNameRange}'
+        sh.name_range(f'G{row}',f'CP_{self.xlNameRange}')
+        sh.name_range(f'L{row}',f'BM_{self.xlNameRange}')
 
         cur = [0,0,0,0,0,1,1,0,0,0,0,1]
         res = [a,b,c,d,e,f,g,h,i,j,k,l]
@@ -205,43 +300,25 @@ class Compressor(Module):
 
 class CentrifugalCompressor(Compressor):
 
-    @Currency.econ_func
-    def base_cost_calc(self):
-        return np.exp(9.1553+0.63*np.log(self.Pc))
-
-    def generate_formulas_xl(self,sh:xl.Sheet,row):
-        res,cur = super().generate_formulas_xl(sh,row)
-        res[5] = f'=EXP(9.1553+0.63*LN(E{row}))'
-        return res,cur
+    _base_cost = correlations['compressor.centrifugal']
 
 
 class ReciprocatingCompressor(Compressor):
 
-    @Currency.econ_func
-    def base_cost_calc(self):
-        return np.exp(4.6762+1.23*np.log(self.Pc))
-
-    def generate_formulas_xl(self,sh:xl.Sheet,row):
-        res,cur = super().generate_formulas_xl(sh,row)
-        res[5]=f'=EXP(4.6762+1.23*LN(E{row}))'
-        return res,cur
+    _base_cost = correlations['compressor.reciprocating']
 
 
 class ScrewCompressor(Compressor):
 
-    @Currency.econ_func
-    def base_cost_calc(self):
-        return np.exp(8.2496+0.7243*np.log(self.Pc))
-
-    def generate_formulas_xl(self,sh:xl.Sheet,row):
-        res,cur = super().generate_formulas_xl(sh,row)
-        res[5]=f'=EXP(8.2496+0.7243*LN(E{row}))'
-        return res,cur
+    _base_cost = correlations['compressor.screw']
 # endregion
 
 #region Fan
 class Fan(Module):
 
+    batchSizeParams = ('flow_rate',)
+    xlHeader = ['Name','Q','H','Fh','ηF','ηM','Pc','Cb','Cp','Fbm','Fm','Fd','Fp','Cbm']
+
     def __init__(self,name,desc,head_factor:float,flow_rate:float,
                  head:float,fan_eff=0.7,motor_eff=0.9,**kwargs):
 
@@ -257,40 +334,84 @@ class Fan(Module):
 
         super().__init__(name,desc)
 
+    _base_cost = correlations['none']
+
+    @Currency.econ_func
+    def base_cost_calc(self):
+        return _one(self._base_cost,self.Q)
+
     @Currency.econ_func
     def purch_cost_calc(self):
         return self.baseCost*self.Fh*self.Fm
 
+    def batch_params(self):
+        return {**super().batch_params(),'head_factor':self.Fh,'flow_rate':self.Q,'head':self.H,
+                'fan_eff':self.etaF,'motor_eff':self.etaM}
+
+    @classmethod
+    def cost_batch(cls,head_factor,flow_rate,head,fan_eff=0.7,motor_eff=0.9,Fbm=None,Fd=None,Fm=None,Fp=None):
+
+        res = cls._batch_factors(Fbm,Fd,Fm,Fp)
+        res['Fh'] = _arr(head_factor)
+        res['Q'] = _arr(flow_rate)
+        res['H'] = _arr(head)
+        res['etaF'] = _arr(fan_eff)
+        res['etaM'] = _arr(motor_eff)
+        res['Pc'] = res['Q'] * res['H'] / (6350*res['etaF']*res['etaM'])
+
+        res['baseCost'] = CurrencyArray(cls._base_cost(res['Q']))
+        res['purchCost'] = res['baseCost']*res['Fh']*res['Fm']
+
+        return cls._batch_bm_cost(res)
+
     def generate_row_xl(self):
         return [self.name,self.Q,self.H,self.Fh,self.etaF,self.etaM,self.Pc,self.baseCost,self.purchCost,
                 self.Fbm,self.Fm,self.Fd,self.Fp,self.bmCost]
 
+    def generate_formulas_xl(self,sh:Sheet,row):
+
+        sh.name_range(f'I{row}',f'CP_{self.xlNameRange}')
+        sh.name_range(f'N{row}',f'BM_{self.xlNameRange}')
+
+        a = self.name
+        b = self.Q
+        c = self.H
+        d = self.Fh
+        e = self.etaF
+        f = self.etaM
+        g = f'=B{row}*C{row}/(6350*E{row}*F{row})'
+        h = f'={self._base_cost.formula(f"B{row}")}'
+        i = f'=H{row}*D{row}*K{row}'
+        j = self.Fbm
+        k = self.Fm
+        l = self.Fd
+        m = self.Fp
+        n = f'=I{row}*(J{row}+(L{row}*K{row}*M{row}-1))'
+
+        res = [a,b,c,d,e,f,g,h,i,j,k,l,m,n]
+        cur = [0,0,0,0,0,0,0,1,1,0,0,0,0,1]
+
+        return res,cur
+
 
 class CentrifugalBackwardFan(Fan):
 
-    @Currency.econ_func
-    def base_cost_calc(self):
-        return np.exp(11.4152-1.3805*np.log(self.Q)+0.1139*np.log(self.Q)**2)
+    _base_cost = correlations['fan.centrifugal_backward']
 
 
 class CentrifugalStraightFan(Fan):
-    @Currency.econ_func
-    def base_cost_calc(self):
-        return np.exp(12.1667-1.6407*np.log(self.Q)+0.1328*np.log(self.Q)**2)
+
+    _base_cost = correlations['fan.centrifugal_straight']
 
 
 class VaneAxialFan(Fan):
 
-    @Currency.econ_func
-    def base_cost_calc(self):
-        return np.exp(9.6487-0.97566*np.log(self.Q)+0.08532*np.log(self.Q)**2)
+    _base_cost = correlations['fan.vane_axial']
 
 
 class PropellerFan(Fan):
 
-    @Currency.econ_func
-    def base_cost_calc(self):
-        return np.exp(6.16328-0.28635*np.log(self.Q)+0.04866*np.log(self.Q)**2)
+    _base_cost = correlations['fan.propeller']
 #endregion
 
 # region Heat Exchanger/Fired Heater
@@ -298,20 +419,14 @@ class PropellerFan(Fan):
 
 class HeatExchanger(Module):
 
+    batchSizeParams = ('area',)
     Fbm = 3.17
-    fl_dict = {
-        8:1.25,
-        12:1.12,
-        16:1.05,
-        20:1.0
-    }
+    fl_dict = factors['hx.tube_length'].points
 
     twVolFlow = 0  # gpm
     twMassFlow = 0  # lb/h
     steamStream = SteamStream(0, 0, 0)
 
-    baseCostXlFormula = ''
-
     xlHeader = ['Name','P','Fp','Tube Length','Area','Fl','Fbm','Fm','Fd','Cb','Cp','Cbm']
 
     def __init__(self,name,desc,tube_length,pressure,area,a=0.0,b=0.0,**kwargs):
@@ -321,26 +436,72 @@ class HeatExchanger(Module):
         self.P = pressure
         self.A = area
 
-        self.Fm = a+(self.A/100)**b
-        self.Fl = self.fl_func(tube_length) if tube_length not in self.fl_dict else self.fl_dict[tube_length]
-        self.Fp = 0.9803+0.018*(self.P/100)+0.0017*(self.P/100)**2
-
-        self.Fp = self.Fp if self.Fp > 1 else 1
+        self.a = a
+        self.b = b
+        self.Fm = _one(self._material_factor,self.A,a,b)
+        self.Fl = self.fl_func(tube_length)
+        self.Fp = _one(self._pressure_factor,self.P)
 
         super().__init__(name,desc)
 
+    @staticmethod
+    def _material_factor(A,a,b):
+        return a+(A/100)**b
+
+    @staticmethod
+    def _pressure_factor(P):
+        Fp = correlations['hx.pressure_factor'](P)
+        return np.where(Fp > 1,Fp,1.0)
+
+    @classmethod
+    def _length_factor(cls,L):
+        return factors['hx.tube_length'](L)
+
+    _base_cost = correlations['none']
+
+    @Currency.econ_func
+    def base_cost_calc(self):
+        return _one(self._base_cost,self.A)
+
     @Currency.econ_func
     def purch_cost_calc(self):
         return self.Fp*self.Fm*self.Fl*self.baseCost
 
+    def batch_params(self):
+        # Fm follows the area, so the material coefficients go in rather than Fm itself
+        res = {key: val for key,val in super().batch_params().items() if key != 'Fm'}
+        return {**res,'tube_length':self.tubeLength,'pressure':self.P,'area':self.A,'a':self.a,'b':self.b}
+
+    @classmethod
+    def _batch_fm(cls,area,a=0.0,b=0.0,Fm=None,**params):
+        return cls._material_factor(_arr(area),_arr(a),_arr(b)) if Fm is None else _arr(Fm)
+
+    @classmethod
+    def cost_batch(cls,tube_length,pressure,area,a=0.0,b=0.0,Fbm=None,Fd=None,Fm=None,Fp=None):
+
+        res = cls._batch_factors(Fbm,Fd,Fm,Fp)
+        res['tubeLength'] = _arr(tube_length)
+        res['P'] = _arr(pressure)
+        res['A'] = _arr(area)
+
+        if Fm is None: res['Fm'] = cls._material_factor(res['A'],_arr(a),_arr(b))
+        if Fp is None: res['Fp'] = cls._pressure_factor(res['P'])
+
+        res['Fl'] = cls._length_factor(res['tubeLength'])
+
+        res['baseCost'] = CurrencyArray(cls._base_cost(res['A']))
+        res['purchCost'] = res['Fp']*res['Fm']*res['Fl']*res['baseCost']
+
+        return cls._batch_bm_cost(res)
+
     def generate_row_xl(self):
         return [self.name,self.P,self.Fp,self.tubeLength,self.A,self.Fl,
                 self.Fbm,self.Fm,self.Fd,self.baseCost,self.purchCost,self.bmCost]
 
-    def generate_formulas_xl(self,sh:xl.Sheet,row):
+    def generate_formulas_xl(self,sh:Sheet,row):
 
-        sh.range(f'k{row}').name = f'CP_{self.xlNameRange}'
-        sh.range(f'l{row}').name = f'BM_{self.xlNameRange}'
+        sh.name_range(f'k{row}',f'CP_{self.xlNameRange}')
+        sh.name_range(f'l{row}',f'BM_{self.xlNameRange}')
 
         a = self.name
         b = self.P
@@ -351,9 +512,9 @@ class HeatExchanger(Module):
         g = self.Fbm
         h = self.Fm
         i = self.Fd
-        j = self.baseCostXlFormula.format(row=row)
+        j = f'={self._base_cost.formula(f"E{row}")}'
         k = f'=C{row}*h{row}*F{row}*j{row}'
-        l = f'=k{row}*(g{row}+(h{row}*h{row}*c{row}-1))'
+        l = f'=k{row}*(g{row}+(i{row}*h{row}*c{row}-1))'
 
         res = [a,b,c,d,e,f,g,h,i,j,k,l]
         cur = [0,0,0,0,0,0,0,0,0,1,1,1]
@@ -362,60 +523,36 @@ class HeatExchanger(Module):
 
     @staticmethod
     def fl_func(L):
-        tl = np.array([8, 12, 16, 20])
-        fl = np.array([1.25, 1.12, 1.05, 1.00])
-
-        fl_y = fl * tl
-        fl_x = np.array([tl, np.ones_like(tl), -fl]).T
-
-        res_fl = np.linalg.solve(fl_x.T @ fl_x, fl_x.T @ fl_y)
-        res_fl[1] -= res_fl[0] * res_fl[2]
-
-        def fl_corr(L):
-            return res_fl[0] + res_fl[1] / (L + res_fl[2])
-
-        return round(fl_corr(L),2)
+        # tabulated lengths exactly, anything else from the fit, which is made once and kept
+        return factors['hx.tube_length'](L)
 
 
 class FloatingHeadHx(HeatExchanger):
 
-    baseCostXlFormula = '=EXP(12.0310-0.8709*LN(E{row})+0.09005*LN(E{row})^2)'
-
-    @Currency.econ_func
-    def base_cost_calc(self):
-        return np.exp(12.0310-0.8709*np.log(self.A)+0.09005*np.log(self.A)**2)
+    _base_cost = correlations['hx.floating_head']
 
 
 class FixedHeadHx(HeatExchanger):
 
     Fd=0.85
 
-    baseCostXlFormula = '=EXP(11.4185-0.9228*LN(E{row})+0.09861*LN(E{row})^2)'
-
-    @Currency.econ_func
-    def base_cost_calc(self):
-        return np.exp(11.4185-0.9228*np.log(self.A)+0.09861*np.log(self.A)**2)
+    _base_cost = correlations['hx.fixed_head']
 
 
 class UtubeHx(HeatExchanger):
 
-    @Currency.econ_func
-    def base_cost_calc(self):
-        return np.exp(11.5510-0.9186*np.log(self.A)+0.09790*np.log(self.A)**2)
+    _base_cost = correlations['hx.u_tube']
 
 
 class KettleHx(HeatExchanger):
 
     Fd = 1.35
-    baseCostXlFormula = '=EXP(12.3310-0.8709*LN(E{row})+0.09005*LN(E{row})^2)'
-
-    @Currency.econ_func
-    def base_cost_calc(self):
-        return np.exp(12.3310-0.8709*np.log(self.A)+0.09005*np.log(self.A)**2)
+    _base_cost = correlations['hx.kettle']
 
 
 class FiredHeater(Module):
 
+    batchSizeParams = ('heat_duty',)
     ngFlow = 0
     Fbm = 2.19
     xlHeader = ['Name','P','Fp','Q','Fbm','Fm','Fd','Cb','Cp','Cbm']
@@ -424,34 +561,53 @@ class FiredHeater(Module):
         for key,value in kwargs.items(): self.__dict__[key]=value
         self.Q = heat_duty
         self.P = pressure
-        self.Fp = 0.986-0.0035*(self.P/500)+0.0175*(self.P/500)**2
+        self.Fp = _one(self._pressure_factor,self.P)
         super().__init__(name,desc)
 
+    _pressure_factor = correlations['fired_heater.pressure_factor']
+    _base_cost = correlations['fired_heater']
+
     @Currency.econ_func
     def base_cost_calc(self):
-        return np.exp(-0.15241+0.785*np.log(self.Q))
+        return _one(self._base_cost,self.Q)
 
     @Currency.econ_func
     def purch_cost_calc(self):
         return self.Fp*self.Fm*self.baseCost
 
+    def batch_params(self):
+        return {**super().batch_params(),'heat_duty':self.Q,'pressure':self.P}
+
+    @classmethod
+    def cost_batch(cls,heat_duty,pressure,Fbm=None,Fd=None,Fm=None,Fp=None):
+
+        res = cls._batch_factors(Fbm,Fd,Fm,Fp)
+        res['Q'] = _arr(heat_duty)
+        res['P'] = _arr(pressure)
+        if Fp is None: res['Fp'] = cls._pressure_factor(res['P'])
+
+        res['baseCost'] = CurrencyArray(cls._base_cost(res['Q']))
+        res['purchCost'] = res['Fp']*res['Fm']*res['baseCost']
+
+        return cls._batch_bm_cost(res)
+
     def generate_row_xl(self):
         return [self.name,self.P,self.Fp,self.Q,
                 self.Fbm,self.Fm,self.Fd,self.baseCost,self.purchCost,self.bmCost]
 
-    def generate_formulas_xl(self,sh:xl.Sheet,row):
+    def generate_formulas_xl(self,sh:Sheet,row):
 
-        sh.range(f'i{row}').name=f'CP_{self.xlNameRange}'
-        sh.range(f'j{row}').name=f'BM_{self.xlNameRange}'
+        sh.name_range(f'i{row}',f'CP_{self.xlNameRange}')
+        sh.name_range(f'j{row}',f'BM_{self.xlNameRange}')
 
         a = self.name
         b = self.P
-        c = f'=0.986-0.0035*(b{row}/500)+0.0175*(b{row}/500)^2'
+        c = f'={self._pressure_factor.formula(f"b{row}")}'
         d = self.Q
         e = self.Fbm
         f = self.Fm
         g = self.Fd
-        h = f'=EXP(-0.15241+0.785*LN(d{row}))'
+        h = f'={self._base_cost.formula(f"d{row}")}'
         i = f'=c{row}*f{row}*h{row}'
         j = f'=i{row}*(e{row}+(c{row}*f{row}*g{row}-1))'
 
@@ -465,6 +621,9 @@ class FiredHeater(Module):
 # region Vessel
 class Vessel(Module):
 
+    batchSizeParams = ('weight',)
+    needsLength = False  # the platform cost depends on the vessel length too
+
     def __init__(self,name,desc,weight,inside_diameter,**kwargs):
         for key,val in kwargs.items(): self.__dict__[key]=val
 
@@ -476,13 +635,16 @@ class Vessel(Module):
 
         super().__init__(name,desc)
 
+    _shell_cost = correlations['none']
+    _pl_cost = correlations['none']
+
     @Currency.econ_func
     def pl_cost_calc(self):
-        return 0
+        return _one(self._pl_cost,self.Di,getattr(self,'L',np.nan))
 
     @Currency.econ_func
     def shell_cost_calc(self):
-        return 0
+        return _one(self._shell_cost,self.W)*self.Fm
 
     @Currency.econ_func
     def purch_cost_calc(self):
@@ -492,27 +654,47 @@ class Vessel(Module):
     def bm_cost_calc(self):
         return self.Cv/self.Fm*(self.Fbm+(self.Fm*self.Fd*self.Fp-1))+self.Cpl
 
+    def batch_params(self):
+        return {**super().batch_params(),'weight':self.W,'inside_diameter':self.Di}
+
+    @classmethod
+    def cost_batch(cls,weight,inside_diameter,length=None,Fbm=None,Fd=None,Fm=None,Fp=None):
+
+        res = cls._batch_factors(Fbm,Fd,Fm,Fp)
+        res['W'] = _arr(weight)
+        res['Di'] = _arr(inside_diameter)
+        if length is not None:
+            res['L'] = _arr(length)
+        elif cls.needsLength:
+            raise ValueError(f'{cls.__name__}.cost_batch needs length')
+
+        res['Cv'] = CurrencyArray(cls._shell_cost(res['W'])*res['Fm'])
+        res['Cpl'] = CurrencyArray(cls._pl_cost(res['Di'],res.get('L',np.nan)))
+        res['baseCost'] = CurrencyArray(np.zeros_like(res['Cv'].values))
+        res['purchCost'] = res['Fm']*res['Cv']+res['Cpl']
+        res['bmCost'] = res['Cv']/res['Fm']*(res['Fbm']+(res['Fm']*res['Fd']*res['Fp']-1))+res['Cpl']
+
+        return res
+
 
 class HorizontalVessel(Vessel):
 
-    xlHeader = ['Name','D','W','Fbm','Fd','Fm','Fp','Cv','Cpl','Cbm']
+    xlHeader = ['Name','D','W','Fbm','Fd','Fm','Fp','Cv','Cpl','Cp','Cbm']
     Fbm=3.05
 
-    @Currency.econ_func
-    def shell_cost_calc(self):
-        return np.exp(5.6336+0.4599*np.log(self.W)+0.00582*np.log(self.W)**2)*self.Fm
+    _shell_cost = correlations['vessel.horizontal.shell']
 
-    @Currency.econ_func
-    def pl_cost_calc(self):
-        return 2275*self.Di**0.2094
+    @staticmethod
+    def _pl_cost(Di,L):
+        return correlations['vessel.horizontal.platform'](Di)
 
     def generate_row_xl(self):
-        return [self.name,self.Di,self.W,self.Fbm,self.Fd,self.Fm,self.Fp,self.Cv,self.Cpl,self.bmCost]
+        return [self.name,self.Di,self.W,self.Fbm,self.Fd,self.Fm,self.Fp,self.Cv,self.Cpl,self.purchCost,self.bmCost]
 
-    def generate_formulas_xl(self,sh:xl.Sheet,row):
+    def generate_formulas_xl(self,sh:Sheet,row):
 
-        sh.range(f'H{row}').name=f'CP_{self.xlNameRange}'
-        sh.range(f'J{row}').name=f'BM_{self.xlNameRange}'
+        sh.name_range(f'J{row}',f'CP_{self.xlNameRange}')
+        sh.name_range(f'K{row}',f'BM_{self.xlNameRange}')
 
         a = self.name
         b = self.Di
@@ -521,12 +703,13 @@ class HorizontalVessel(Vessel):
         e = self.Fd
         f = self.Fm
         g = self.Fp
-        h = f'=EXP(5.6336+0.4599*LN(c{row})+.00582*LN(c{row})^2)*f{row}'
-        i = f'=2275*b{row}^0.2094'
-        j = f'=h{row}/f{row}*(d{row}+(e{row}*f{row}*g{row}-1))+i{row}'
+        h = f'={self._shell_cost.formula(f"c{row}")}*f{row}'
+        i = f'={correlations["vessel.horizontal.platform"].formula(f"b{row}")}'
+        j = f'=f{row}*h{row}+i{row}'
+        k = f'=h{row}/f{row}*(d{row}+(f{row}*e{row}*g{row}-1))+i{row}'
 
-        res = [a,b,c,d,e,f,g,h,i,j]
-        cur = [0,0,0,0,0,0,0,1,1,1]
+        res = [a,b,c,d,e,f,g,h,i,j,k]
+        cur = [0,0,0,0,0,0,0,1,1,1,1]
 
         return res,cur
 
@@ -534,7 +717,8 @@ class HorizontalVessel(Vessel):
 class VerticalVessel(Vessel):
     Fbm = 4.16
 
-    xlHeader = ['Name','D','L','W','Fbm','Fm','Fd','Fp','Cv','Cpl','Cbm']
+    xlHeader = ['Name','D','L','W','Fbm','Fm','Fd','Fp','Cv','Cpl','Cp','Cbm']
+    needsLength = True
 
     def __init__(self,name,desc,weight,inside_diameter,length,**kwargs):
 
@@ -542,22 +726,20 @@ class VerticalVessel(Vessel):
 
         super().__init__(name,desc,weight,inside_diameter,**kwargs)
 
-    @Currency.econ_func
-    def shell_cost_calc(self):
-        return np.exp(7.1390+0.18255*np.log(self.W)+0.02297*np.log(self.W)**2)*self.Fm
+    _shell_cost = correlations['vessel.vertical.shell']
+    _pl_cost = correlations['vessel.vertical.platform']
 
-    @Currency.econ_func
-    def pl_cost_calc(self):
-        return 410*self.Di**0.7396*self.L**0.70684
+    def batch_params(self):
+        return {**super().batch_params(),'length':self.L}
 
     def generate_row_xl(self):
         return [self.name,self.Di,self.L,self.W,self.Fbm,self.Fm,
-                self.Fd,self.Fp,self.Cv,self.Cpl,self.bmCost]
+                self.Fd,self.Fp,self.Cv,self.Cpl,self.purchCost,self.bmCost]
 
-    def generate_formulas_xl(self,sh:xl.Sheet,row):
+    def generate_formulas_xl(self,sh:Sheet,row):
 
-        sh.range(f'i{row}').name=f'CP_{self.xlNameRange}'
-        sh.range(f'k{row}').name=f'BM_{self.xlNameRange}'
+        sh.name_range(f'k{row}',f'CP_{self.xlNameRange}')
+        sh.name_range(f'l{row}',f'BM_{self.xlNameRange}')
 
         a = self.name
         b = self.Di
@@ -567,12 +749,13 @@ class VerticalVessel(Vessel):
         f = self.Fm
         g = self.Fd
         h = self.Fp
-        i = f'=EXP(7.139+0.18255*LN(d{row})+0.02297*LN(d{row})^2)*f{row}'
-        j = f'=410*b{row}^0.7396*c{row}^0.70684'
-        k = f'=i{row}/f{row}*(e{row}+(f{row}*g{row}*h{row}-1))+j{row}'
+        i = f'={self._shell_cost.formula(f"d{row}")}*f{row}'
+        j = f'={self._pl_cost.formula(f"b{row}",f"c{row}")}'
+        k = f'=f{row}*i{row}+j{row}'
+        l = f'=i{row}/f{row}*(e{row}+(f{row}*g{row}*h{row}-1))+j{row}'
 
-        res = [a,b,c,d,e,f,g,h,i,j,k]
-        cur = [0,0,0,0,0,0,0,0,1,1,1]
+        res = [a,b,c,d,e,f,g,h,i,j,k,l]
+        cur = [0,0,0,0,0,0,0,0,1,1,1,1]
 
         return res,cur
 
@@ -585,11 +768,7 @@ class Column(Module):
 
     class Trays:
 
-        Fs_dict = {
-            24:1,
-            18:1.4,
-            12:2.2
-        }
+        Fs_dict = factors['column.tray_spacing'].points
         Ft_dict = {
             'Sieve':0,
             'Valve':0.4,
@@ -603,7 +782,7 @@ class Column(Module):
             self.Fm = Fm
 
             self.Fnt = 1 if self.N > 20 else 2.25/1.0414**self.N
-            self.Fs = self.Fs_dict[tray_spacing]
+            self.Fs = float(factors['column.tray_spacing'](tray_spacing))
             self.Ft = self.Ft_dict[tray_type]
 
             self.Fbm = self.Fm+self.Fs+self.Ft
@@ -619,9 +798,9 @@ class Column(Module):
 
         self.trayFactor = self.trays.N*self.trays.Fnt*self.trays.Fm
 
-        self.Cv = Currency(np.exp(10.5449-0.4672*np.log(self.W)+0.05482*np.log(self.W)**2))*self.Fm
-        self.Cpl = Currency(341*self.D**0.63316*self.L**0.80161)
-        self.Ctrays = Currency(468*np.exp(0.1482*self.D))*self.trayFactor
+        self.Cv = Currency(correlations['column.shell'](self.W))*self.Fm
+        self.Cpl = Currency(correlations['column.platform'](self.D,self.L))
+        self.Ctrays = Currency(correlations['column.trays'](self.D))*self.trayFactor
 
         super().__init__(name,desc)
 
@@ -638,10 +817,10 @@ class Column(Module):
         return [self.name,self.D,self.L,self.W,self.trays.N,self.trays.Fnt,self.trays.Fbm,self.Fbm,self.Fm,self.Fd,
                 self.Fp,self.Cv,self.Cpl,self.Ctrays,self.purchCost,self.bmCost]
 
-    def generate_formulas_xl(self,sh:xl.Sheet,row):
+    def generate_formulas_xl(self,sh:Sheet,row):
 
-        sh.range(f'o{row}').name = f'CP_{self.xlNameRange}'
-        sh.range(f'p{row}').name = f'BM_{self.xlNameRange}'
+        sh.name_range(f'o{row}',f'CP_{self.xlNameRange}')
+        sh.name_range(f'p{row}',f'BM_{self.xlNameRange}')
 
         a = self.name
         b = self.D
@@ -654,9 +833,9 @@ class Column(Module):
         i = self.Fm
         j = self.Fd
         k = self.Fp
-        l = f'=EXP(10.5449-0.4672*LN(d{row})+0.05482*LN(d{row})^2)*i{row}'
-        m = f'=341*b{row}^0.63316*c{row}^0.80161'
-        n = f'=468*EXP(0.1482*b{row})*{self.trayFactor}'
+        l = f'={correlations["column.shell"].formula(f"d{row}")}*i{row}'
+        m = f'={correlations["column.platform"].formula(f"b{row}",f"c{row}")}'
+        n = f'={correlations["column.trays"].formula(f"b{row}")}*{self.trayFactor}'
         o = f'=l{row}+m{row}+n{row}'
         p = f'=l{row}/i{row}*(h{row}+(i{row}*j{row}*k{row}-1))+m{row}+n{row}*g{row}'
 
@@ -686,10 +865,9 @@ class VerticalReactor(VerticalVessel):
 # region Tanks
 class Tank(Module):
 
+    batchSizeParams = ('volume',)
     xlHeader = ['Name','Volume','Fbm','Fm','Fd','Fp','Ctank','Cbm']
 
-    xlPurchCostFormula = ''
-
     corrCE = 567
     Fbm=4.16
 
@@ -700,14 +878,34 @@ class Tank(Module):
 
         super().__init__(name,desc)
 
+    _purch_cost = correlations['none']
+
+    @Currency.econ_func
+    def purch_cost_calc(self):
+        return _one(self._purch_cost,self.volume)
+
+    def batch_params(self):
+        return {**super().batch_params(),'volume':self.volume}
+
+    @classmethod
+    def cost_batch(cls,volume,Fbm=None,Fd=None,Fm=None,Fp=None):
+
+        res = cls._batch_factors(Fbm,Fd,Fm,Fp)
+        res['volume'] = _arr(volume)
+
+        res['purchCost'] = CurrencyArray(cls._purch_cost(res['volume']))
+        res['baseCost'] = CurrencyArray(np.zeros_like(res['volume']))
+
+        return cls._batch_bm_cost(res)
+
     def generate_row_xl(self):
         return [self.name,self.volume,self.Fbm,self.Fm,
                 self.Fd,self.Fp,self.purchCost,self.bmCost]
 
-    def generate_formulas_xl(self,sh:xl.Sheet,row):
+    def generate_formulas_xl(self,sh:Sheet,row):
 
-        sh.range(f'g{row}').name=f'CP_{self.xlNameRange}'
-        sh.range(f'h{row}').name=f'BM_{self.xlNameRange}'
+        sh.name_range(f'g{row}',f'CP_{self.xlNameRange}')
+        sh.name_range(f'h{row}',f'BM_{self.xlNameRange}')
 
         a = self.name
         b = self.volume
@@ -715,7 +913,7 @@ class Tank(Module):
         d = self.Fm
         e = self.Fd
         f = self.Fp
-        g = self.xlPurchCostFormula.format(row=row)
+        g = f'={self._purch_cost.formula(f"b{row}")}'
         h = f'=g{row}*(c{row}+(e{row}*f{row}*d{row}-1))'
 
         res = [a,b,c,d,e,f,g,h]
@@ -726,53 +924,29 @@ class Tank(Module):
 
 class OpenTank(Tank):
 
-    xlPurchCostFormula = '=18*b{row}^0.73'
-
-    @Currency.econ_func
-    def purch_cost_calc(self):
-        return 18*self.volume**0.73
+    _purch_cost = correlations['tank.open']
 
 
 class ConeRoofTank(Tank):
-    xlPurchCostFormula = '=265*b{row}^0.513'
-
-    @Currency.econ_func
-    def purch_cost_calc(self):
-        return 265*self.volume**0.513
+    _purch_cost = correlations['tank.cone_roof']
 
 
 class FloatingRoofTank(Tank):
 
-    xlPurchCostFormula = '=475*b{row}^0.507'
-
-    @Currency.econ_func
-    def purch_cost_calc(self):
-        return 475*self.volume**.507
+    _purch_cost = correlations['tank.floating_roof']
 
 
 class SphericalLPTank(Tank):
 
-    xlPurchCostFormula = '=68*b{row}^0.72'
-
-    @Currency.econ_func
-    def purch_cost_calc(self):
-        return 68*self.volume**0.72
+    _purch_cost = correlations['tank.spherical_lp']
 
 
 class SphericalHPTank(Tank):
 
-    xlPurchCostFormula = '=53*b{row}^0.78'
-
-    @Currency.econ_func
-    def purch_cost_calc(self):
-        return 53*self.volume**0.78
+    _purch_cost = correlations['tank.spherical_hp']
 
 
 class GasHoldersTank(Tank):
 
-    xlPurchCostFormula = '=3595*(b{row}*7.48052)^0.43'
-
-    @Currency.econ_func
-    def purch_cost_calc(self):
-        return 3595*(self.volume*7.48052)**0.43
+    _purch_cost = correlations['tank.gas_holder']
 # endregion
@@ -0,0 +1,175 @@
+import numpy as np
+
+from ChemPy.Economics import CapitalCostBuildUp
+from ChemPy.Economics.Currency import CurrencyArray
+from ChemPy.Economics.Modules import *
+from ChemPy.Economics.Registry import ModuleRegistry
+
+
+class Distribution:
+
+    def sample(self,rng:np.random.Generator,size):
+        raise NotImplementedError
+
+
+class Fixed(Distribution):
+
+    def __init__(self,value):
+        self.value = value
+
+    def sample(self,rng,size):
+        return np.full(size,float(self.value))
+
+
+class Uniform(Distribution):
+
+    def __init__(self,low,high):
+        self.low = low
+        self.high = high
+
+    def sample(self,rng,size):
+        return rng.uniform(self.low,self.high,size)
+
+
+class Normal(Distribution):
+
+    def __init__(self,mean,sd):
+        self.mean = mean
+        self.sd = sd
+
+    def sample(self,rng,size):
+        return rng.normal(self.mean,self.sd,size)
+
+
+class Triangular(Distribution):
+
+    def __init__(self,low,mode,high):
+        self.low = low
+        self.mode = mode
+        self.high = high
+
+    def sample(self,rng,size):
+        return rng.triangular(self.low,self.mode,self.high,size)
+
+
+def _dist(d):
+    return d if isinstance(d,Distribution) else Fixed(d)
+
+
+class MonteCarloResult:
+
+    def __init__(self,samples:dict):
+        self.samples = samples
+
+    def __getitem__(self, key):
+        return self.samples[key]
+
+    def percentiles(self,key='TCI',q=(10,50,90)):
+        return self.samples[key].percentile(q)
+
+    def summary(self,q=(10,50,90)):
+        return {key: self.percentiles(key,q) for key in self.samples if isinstance(self.samples[key],CurrencyArray)}
+
+
+class CapitalCostMonteCarlo:
+
+    chainKeys = ['totEscPurchCost','totEscBmCost','instrumentAndControls','TBM','sitePrep','service','DPI',
+                 'contingencyFee','contractorsFee','TDC','land','royalties','startup','TPI','wc','TCI']
+
+    def __init__(self,modules:list[Module]|ModuleRegistry,CE=800,size=None,material=None,factors:dict|None=None,
+                 module_size:dict|None=None,wc=None,seed=None,chunk_size=10_000):
+
+        self.mods = modules
+        self.CE = _dist(CE)
+        self.size = _dist(1.0 if size is None else size)
+        self.material = _dist(1.0 if material is None else material)
+        self.factors = {key: _dist(val) for key,val in (factors if factors else {}).items()}
+        self.moduleSize = {key: _dist(val) for key,val in (module_size if module_size else {}).items()}
+        self.wc = wc
+        self.seed = seed
+        self.chunkSize = chunk_size
+
+        for key in self.factors:
+            if key not in CapitalCostBuildUp.factorNames:
+                raise KeyError(f'{key} is not one of {CapitalCostBuildUp.factorNames}')
+
+        # modules that have a batch correlation are stacked per class once, every other module (columns, plain
+        # modules) only contributes its fixed cost
+        self.groups = {}
+        self.fixedPurchCost = self.fixedBmCost = 0.
+        for m in self.mods:
+            if hasattr(type(m),'cost_batch'):
+                self.groups.setdefault(type(m),[]).append(m)
+            else:
+                self.fixedPurchCost += float(m.purchCost)/m.corrCE
+                self.fixedBmCost += float(m.bmCost)/m.corrCE
+
+        self.groupParams = {}
+        for cls,mods in self.groups.items():
+            params = [m.batch_params() for m in mods]
+            self.groupParams[cls] = (
+                {key: np.array([p[key] for p in params],dtype=float) for key in params[0]},
+                np.array([m.corrCE for m in mods],dtype=float),
+                [m.name for m in mods]
+            )
+
+        reg = ModuleRegistry.of(modules)
+        self.catalystCost = reg.total('reactors','catalyst.cost')
+        self.steamFlow = reg.total('hxs','steamStream.flow')
+        self.twFlow = reg.total('hxs','twMassFlow')
+
+    def _size_multipliers(self,rng,n,names):
+        mult = self.size.sample(rng,(n,len(names)))
+        for j,name in enumerate(names):
+            if name in self.moduleSize:
+                mult[:,j] = self.moduleSize[name].sample(rng,n)
+        return mult
+
+    def _evaluate(self,rng,n):
+
+        CE = self.CE.sample(rng,n)
+        factors = {key: dist.sample(rng,n) for key,dist in self.factors.items()}
+
+        purch = np.full(n,self.fixedPurchCost)
+        bm = np.full(n,self.fixedBmCost)
+        pumpPower = np.zeros(n)
+        compPower = np.zeros(n)
+        fanPower = np.zeros(n)
+
+        for cls,(params,corrCE,names) in self.groupParams.items():
+            sizeMult = self._size_multipliers(rng,n,names)
+            matMult = self.material.sample(rng,(n,len(names)))
+
+            kwargs = {key: val[None,:]*sizeMult if key in cls.batchSizeParams else val for key,val in params.items()}
+            # the material multiplier goes on top of the Fm of the sampled size (heat exchanger Fm follows the area)
+            kwargs['Fm'] = cls._batch_fm(**kwargs)*matMult
+            res = cls.cost_batch(**kwargs)
+
+            purch += (res['purchCost'].values/corrCE).sum(axis=1)
+            bm += (res['bmCost'].values/corrCE).sum(axis=1)
+            if issubclass(cls,Pump):
+                pumpPower += res['Pc'].sum(axis=1)
+            elif issubclass(cls,Compressor):
+                compPower += res['Pc'].sum(axis=1)
+            elif issubclass(cls,Fan):
+                fanPower += res['Pc'].sum(axis=1)
+
+        escPurch = CurrencyArray(purch*CE)
+        escBm = CurrencyArray(bm*CE)
+        allocated = CapitalCostBuildUp.utility_allocation(self.steamFlow,self.twFlow,pumpPower,compPower,CE,fanPower)
+        chain = CapitalCostBuildUp.investment_chain(escPurch,escBm,self.catalystCost,allocated,self.wc,**factors)
+
+        return {'CE':CE,'totEscPurchCost':escPurch,'totEscBmCost':escBm,**chain}
+
+    def run(self,n=10_000):
+
+        rng = np.random.default_rng(self.seed)
+
+        chunks = [self._evaluate(rng,min(self.chunkSize,n-start)) for start in range(0,n,self.chunkSize)]
+
+        samples = {'CE': np.concatenate([c['CE'] for c in chunks])}
+        for key in self.chainKeys:
+            samples[key] = CurrencyArray(np.concatenate([np.broadcast_to(np.asarray(c[key],dtype=float),len(c['CE']))
+                                                         for c in chunks]))
+
+        return MonteCarloResult(samples)
@@ -0,0 +1,125 @@
+from ChemPy.Economics.Modules import *
+
+
+class Category:
+
+    def __init__(self,key:str,title:str|None,types,sums:tuple=(),section=True):
+        self.key = key
+        self.title = title
+        self.types = types
+        self.sums = ('purchCost','bmCost',*sums)  # attributes (dotted paths allowed) kept as running totals
+        self.section = section  # written as a block of the report sheets
+
+    @property
+    def header(self):
+        return (self.types[0] if isinstance(self.types,tuple) else self.types).xlHeader
+
+
+def _attr(m,path):
+    for name in path.split('.'): m = getattr(m,name)
+    return float(m)
+
+
+class ModuleRegistry:
+
+    # report order; a module lands in every category it is an instance of (reactors are vessels too)
+    categories = [
+        Category('pumps','PUMPS',Pump,('Pc',)),
+        Category('comps','COMPRESSORS',Compressor,('Pc',)),
+        Category('fans','FANS',Fan,('Pc',)),
+        Category('hxs','HEAT EXCHANGERS',HeatExchanger,('steamStream.flow','twMassFlow','twVolFlow')),
+        Category('fHeat','FIRED HEATERS',FiredHeater,('ngFlow',)),
+        Category('columns','COLUMNS',Column),
+        Category('verticalVessels','Vertical Vessels',VerticalVessel),
+        Category('horizontalVessels','Horizontal Vessels',HorizontalVessel),
+        Category('tanks','Tanks',Tank),
+        Category('reactors',None,(HorizontalReactor,VerticalReactor),('catalyst.cost',),section=False),
+    ]
+
+    def __init__(self,modules:list[Module]=()):
+
+        self.mods = []
+        self.members = {cat.key: [] for cat in self.categories}
+        self.totals = {cat.key: dict.fromkeys(cat.sums,0.) for cat in self.categories}
+        self.byCE = {}  # correlation CE -> [modules, purchase cost, bare module cost], unescalated
+        self._typeCats = {}
+
+        for m in modules: self.add(m)
+
+    @classmethod
+    def of(cls,modules):
+        return modules if isinstance(modules,ModuleRegistry) else cls(modules)
+
+    def __getitem__(self, key):
+        return self.members[key]
+
+    def __iter__(self):
+        return iter(self.mods)
+
+    def __len__(self):
+        return len(self.mods)
+
+    def categories_of(self,m:Module):
+        # resolved once per module class, not per module
+        t = type(m)
+        if t not in self._typeCats:
+            self._typeCats[t] = [cat for cat in self.categories if issubclass(t,cat.types)]
+        return self._typeCats[t]
+
+    def sections(self):
+        for cat in self.categories:
+            if cat.section and self.members[cat.key]: yield cat,self.members[cat.key]
+
+    def count(self,key):
+        return len(self.members[key])
+
+    def total(self,key,attr):
+        return self.totals[key][attr]
+
+    def _account(self,m:Module,cats,sign):
+
+        ce = self.byCE.setdefault(m.corrCE,[0,0.,0.])
+        ce[0] += sign
+        if ce[0] == 0: del self.byCE[m.corrCE]
+        else:
+            ce[1] += sign*float(m.purchCost)
+            ce[2] += sign*float(m.bmCost)
+
+        for cat in cats:
+            tot = self.totals[cat.key]
+            if not self.members[cat.key]:
+                # nothing left in the category, drop the rounding residue of the running sums
+                for attr in tot: tot[attr] = 0.
+                continue
+            for attr in cat.sums: tot[attr] += sign*_attr(m,attr)
+
+    def add(self,m:Module):
+        cats = self.categories_of(m)
+        self.mods.append(m)
+        for cat in cats: self.members[cat.key].append(m)
+        self._account(m,cats,1)
+
+    def remove(self,m:Module):
+        cats = self.categories_of(m)
+        self.mods.remove(m)
+        for cat in cats: self.members[cat.key].remove(m)
+        self._account(m,cats,-1)
+
+    def replace(self,old:Module,new:Module):
+        oldCats = self.categories_of(old)
+        newCats = self.categories_of(new)
+        self.mods[self.mods.index(old)] = new
+        for cat in self.categories:
+            bucket = self.members[cat.key]
+            if cat in oldCats and cat in newCats: bucket[bucket.index(old)] = new
+            elif cat in oldCats: bucket.remove(old)
+            elif cat in newCats: bucket.append(new)
+        self._account(old,oldCats,-1)
+        self._account(new,newCats,1)
+
+    def find(self,m:Module|str):
+        if isinstance(m,str):
+            for mod in self.mods:
+                if mod.name == m: return mod
+            raise KeyError(m)
+        return m
@@ -0,0 +1,100 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from ChemPy.Economics import CapitalCostBuildUp, OperatingCosts
+
+
+def evaluate(modules,sales=(),costs=(),CE=800,wc=None):
+    # the numbers of one plant that go into the scenario table
+    cap = CapitalCostBuildUp(modules,CE,wc)
+    op = OperatingCosts(sales,costs,cap.registry)
+    reg = cap.registry
+    return {
+        'totPurchCost': float(cap.totPurchCost),
+        'totBmCost': float(cap.totBmCost),
+        'TBM': float(cap.TBM),
+        'TDC': float(cap.TDC),
+        'TCI': float(cap.TCI),
+        'elec': float(op.totElec),
+        'TW': float(op.totTW),
+        'NG': float(op.totNG),
+        'steam': float(reg.total('hxs','steamStream.flow')),
+        'elecCost': float(op.elecCost),
+        'twCost': float(op.twCost),
+        'ngCost': float(op.ngCost),
+        'saleValue': float(op.saleValue),
+        'costValue': float(op.costValue),
+    }
+
+
+def _run_chunk(build,chunk,CE,wc):
+    # runs in the worker: the plants are built there from their parameters, only floats travel back
+    res = []
+    for i,params in chunk:
+        plant = build(**params)
+        modules,sales,costs = plant if isinstance(plant,tuple) else (plant,(),())
+        res.append((i,evaluate(modules,sales,costs,CE,wc)))
+    return res
+
+
+class ScenarioRunner:
+    # evaluates many plant configurations on a process pool. A scenario is a dict of parameters and `build` turns
+    # one into the plant's modules (or a (modules, sales, costs) tuple), so only the parameters are pickled to the
+    # workers and a row of floats comes back. `build` has to be importable by the workers, i.e. a module level
+    # function.
+    #
+    # scenarios go out in chunks so the pool is not flooded with tiny tasks; at most two chunks per worker are in
+    # flight, which is what lets a cancel take effect quickly
+
+    def __init__(self,build,CE=800,wc=None,workers:int|None=None,chunk_size:int|None=None):
+        self.build = build
+        self.CE = CE
+        self.wc = wc
+        self.workers = os.cpu_count() if workers is None else workers
+        self.chunkSize = chunk_size
+
+    def _chunks(self,scenarios):
+        n = len(scenarios)
+        size = self.chunkSize if self.chunkSize else max(1,n//(4*max(self.workers,1)))
+        items = list(enumerate(scenarios))
+        return [items[a:a+size] for a in range(0,n,size)]
+
+    def run(self,scenarios:list[dict],progress=None,cancel=None):
+        # one row per finished scenario, in scenario order, with its parameters and results. progress(done, total)
+        # is called as chunks come back; cancel is anything with is_set() (a threading or multiprocessing Event),
+        # once it is set no new chunk starts and the rows finished so far are returned
+        import pandas as pd
+        scenarios = list(scenarios)
+        chunks = self._chunks(scenarios)
+        rows = {}
+
+        def collect(res):
+            rows.update(res)
+            if progress: progress(len(rows),len(scenarios))
+
+        if self.workers <= 1:
+            for chunk in chunks:
+                if cancel is not None and cancel.is_set(): break
+                collect(_run_chunk(self.build,chunk,self.CE,self.wc))
+        else:
+            with ProcessPoolExecutor(self.workers) as pool:
+                pending = set()
+                todo = iter(chunks)
+                while True:
+                    stop = cancel is not None and cancel.is_set()
+                    while not stop and len(pending) < 2*self.workers:
+                        chunk = next(todo,None)
+                        if chunk is None: break
+                        pending.add(pool.submit(_run_chunk,self.build,chunk,self.CE,self.wc))
+                    if not pending: break
+                    done,pending = wait(pending,return_when=FIRST_COMPLETED)
+                    for fut in done: collect(fut.result())
+                    if stop:
+                        for fut in pending: fut.cancel()
+                        # what is already running still finishes, and is kept
+                        for fut in pending:
+                            if not fut.cancelled(): collect(fut.result())
+                        break
+
+        index = sorted(rows)
+        return pd.DataFrame([{**scenarios[i],**rows[i]} for i in index],index=pd.Index(index,name='scenario'))
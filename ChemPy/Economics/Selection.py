@@ -0,0 +1,91 @@
+import numpy as np
+
+from ChemPy.Economics.Currency import CurrencyArray
+from ChemPy.Economics.Modules import Compressor, Fan, HeatExchanger, Pump, Tank
+
+
+def _size_check(cls):
+    # (cost_batch result key, correlation) a design of this type has to fall inside the fitted range of
+    if issubclass(cls,Pump):
+        return cls.sizeAttr,cls._pump_base_cost
+    if issubclass(cls,HeatExchanger):
+        return 'A',cls._base_cost
+    if issubclass(cls,Compressor):
+        return 'Pc',cls._base_cost
+    if issubclass(cls,Fan):
+        return 'Q',cls._base_cost
+    if issubclass(cls,Tank):
+        return 'volume',cls._purch_cost
+    raise TypeError(f'no equipment selection for {cls.__name__}')
+
+
+def candidates(family):
+    # the concrete types of a family (Pump, HeatExchanger, Compressor, Fan, Tank), the ones with a cost correlation
+    res = []
+    for cls in family.__subclasses__():
+        res += candidates(cls) if cls.__subclasses__() else [cls]
+    return [cls for cls in res if _size_check(cls)[1].form != 'zero']
+
+
+class SelectionResult:
+    # ranked choices per duty: (duties, top) arrays of module classes, unit counts and total bare module costs,
+    # column 0 the cheapest. A slot with no feasible choice left has type None, 0 units and a NaN cost
+
+    def __init__(self,types,units,cost):
+        self.types = types
+        self.units = units
+        self.cost = cost
+
+    @property
+    def best(self):
+        return self.types[:,0]
+
+    def __len__(self):
+        return len(self.types)
+
+    def to_frame(self):
+        import pandas as pd
+        cols = {}
+        for k in range(self.types.shape[1]):
+            cols[f'type_{k}'] = [None if t is None else t.__name__ for t in self.types[:,k]]
+            cols[f'units_{k}'] = self.units[:,k]
+            cols[f'bmCost_{k}'] = np.asarray(self.cost)[:,k]
+        return pd.DataFrame(cols)
+
+
+def select(family,max_units=1,top=3,types=None,extrapolate=False,**duty):
+    # cheapest bare module cost choice for every duty. duty holds the cost_batch arguments of the family, scalars
+    # or one value per duty (e.g. flow_rate, pump_power, head for pumps; tube_length, pressure, area for heat
+    # exchangers). Every candidate type is costed as 1 .. max_units identical units in parallel, the extensive
+    # arguments (batchSizeParams) split between them, and a design only counts where each unit lies inside the
+    # range its correlation was fitted to unless extrapolate is set. All types and unit counts go through
+    # cost_batch as one (units, duties) array per type.
+    types = candidates(family) if types is None else list(types)
+    duty = {key: np.atleast_1d(np.asarray(val,dtype=float)) for key,val in duty.items()}
+    n = np.broadcast(*duty.values()).shape[0] if duty else 1
+    duty = {key: np.broadcast_to(val,(n,)) for key,val in duty.items()}
+    units = np.arange(1,max_units+1,dtype=float)[:,None]
+
+    costs = []
+    for cls in types:
+        kwargs = {key: val/units if key in cls.batchSizeParams else val for key,val in duty.items()}
+        with np.errstate(all='ignore'):
+            res = cls.cost_batch(**kwargs)
+            cost = np.broadcast_to(np.asarray(res['bmCost'],dtype=float)*units,(max_units,n))
+        key,corr = _size_check(cls)
+        ok = np.isfinite(cost)
+        if not extrapolate: ok &= np.broadcast_to(corr.in_range(res[key]),ok.shape)
+        costs.append(np.where(ok,cost,np.inf))
+
+    # rows: type major, unit count minor
+    costs = np.concatenate(costs,axis=0)
+    top = min(top,len(costs))
+    order = np.argsort(costs,axis=0,kind='stable')[:top].T
+    cost = np.take_along_axis(costs.T,order,axis=1)
+    feasible = np.isfinite(cost)
+
+    classes = np.empty(len(types),dtype=object)
+    classes[:] = types
+    return SelectionResult(np.where(feasible,classes[order//max_units],None),
+                           np.where(feasible,order % max_units+1,0),
+                           CurrencyArray(np.where(feasible,cost,np.nan)))
@@ -1,214 +1,261 @@
-import xlwings as xl
 from ChemPy.Economics.Modules import *
 from ChemPy.Economics.Materials import *
-from ChemPy.Economics.Currency import Currency
+from ChemPy.Economics.Currency import Currency, CurrencyArray
+from ChemPy.Economics.Registry import ModuleRegistry
+from ChemPy.Economics.Factors import factors
+from ChemPy.Economics.Backends import Workbook, Sheet, BufferedSheet, MemoryWorkbook, XlwingsWorkbook, XlsxWorkbook, \
+    as_workbook
+from ChemPy.Economics.Formula import Evaluator, FormulaError
 import datetime
 
 
 class Report:
 
     def __init__(self, Report_Name: str = 'ECONOMIC REPORT',Process_Modules:list[Module]=(),
-                 sales:list[RawMaterial]=(),costs:list[RawMaterial]=()):
+                 sales:list[RawMaterial]=(),costs:list[RawMaterial]=(),workbook:Workbook|None=None):
 
         self.reportName = Report_Name
         self.modules = Process_Modules
 
-        self.wb = xl.Book()
+        self.registry = ModuleRegistry(self.modules)
 
-        self.capitalCost = CapitalCostBuildUp(self.modules)
+        # a live Excel book unless a headless one (e.g. XlsxWorkbook('report.xlsx')) is handed in
+        self.wb = as_workbook(workbook) if workbook is not None else XlwingsWorkbook()
+
+        self.capitalCost = CapitalCostBuildUp(self.registry)
         self.capitalCostSheet = self.capitalCost.build_sheet(self.wb,'Capital-IF','CAPITAL COST BUILDUP -- IF',
                                                              self.reportName)
         self.capitalFormSheet = self.capitalCost.build_sheet_with_formulas(self.wb,'Capital-IF w Formula'
                                                                            ,'CAPITAL COST BUILDUP -- IF',
                                                                            self.reportName)
 
-    def __build_sheet_header(self,sh,title):
-        sh.cells[0, 0].value = title
-        sh.cells[1, 0].value = self.reportName.upper()
-        sh.cells[2, 0].value = '\'' + datetime.date.today().strftime('%d %B %Y').upper()
+    def save(self,path=None):
+        self.wb.save(path)
+
+    def __build_sheet_header(self,sh:Sheet,title):
+        sh.write(0,0,title)
+        sh.write(1,0,self.reportName.upper())
+        sh.write(2,0,'\'' + datetime.date.today().strftime('%d %B %Y').upper())
         for r in range(3):
-            sh.cells[r,0].font.bold=True
+            sh.set_bold(r,0)
 
     def __build_equipment_list(self):
 
-        sh = self.wb.sheets.add('Equipment List')
+        sh = BufferedSheet(self.wb.add_sheet('Equipment List'))
         self.__build_sheet_header(sh,'EQUIPMENT LIST')
 
         row = 4
         cols = ['Name','Description']
         for c in range(len(cols)):
-            sh.cells[row,c].value=cols[c]
-            sh.cells[row,c].font.bold=True
+            sh.write(row,c,cols[c])
+            sh.set_bold(row,c)
         row += 1
 
         for m in self.modules:
             cols = [m.name,m.desc]
             for c in range(len(cols)):
-                sh.cells[row,c].value = cols[c]
+                sh.write(row,c,cols[c])
             row += 1
 
+        sh.flush()
         return sh
 
 
 class ReportSection:
     row = 0
 
-    def build_sheet(self,wb:xl.Book,sh_name,title,report_title):
+    def build_sheet(self,wb:Workbook,sh_name,title,report_title):
 
-        sh = wb.sheets.add(sh_name,after=wb.sheets[-1])
+        # everything written to the section is buffered and reaches the backend in blocks on flush
+        sh = BufferedSheet(as_workbook(wb).add_sheet(sh_name))
 
-        sh.cells[0,0].value = title
-        sh.cells[0,0].font.bold = True
+        sh.write(0,0,title)
+        sh.set_bold(0,0)
 
-        sh.cells[1,0].value = report_title
-        sh.cells[1,0].font.bold = True
+        sh.write(1,0,report_title)
+        sh.set_bold(1,0)
 
-        sh.cells[2,0].value = '\'UPDATED ON '+datetime.date.today().strftime('%d %B %Y').upper()
-        sh.cells[2,0].font.bold = True
+        sh.write(2,0,'\'UPDATED ON '+datetime.date.today().strftime('%d %B %Y').upper())
+        sh.set_bold(2,0)
 
         return sh
 
-    def write_row(self,sh:xl.Sheet,cols:list,bold:bool|list[bool]=False):
+    def write_row(self,sh:Sheet,cols:list,bold:bool|list[bool]=False):
 
         for c in range(len(cols)):
 
             if isinstance(cols[c],Currency):
-                sh.cells[self.row,c].number_format = f'{cols[c].unit}#{"".join(cols[c].mode*[","])}.00 \"{"".join(cols[c].mode*["M"])}\"'
+                sh.set_number_format(self.row,c,f'{cols[c].unit}#{"".join(cols[c].mode*[","])}.00 \"{"".join(cols[c].mode*["M"])}\"')
 
-            sh.cells[self.row,c].value = cols[c] if type(cols[c]) == str else float(cols[c])
+            sh.write(self.row,c,cols[c] if type(cols[c]) == str else float(cols[c]))
             if type(bold) is bool:
-                sh.cells[self.row,c].font.bold = bold
+                sh.set_bold(self.row,c,bold)
             elif type(bold) is list:
-                sh.cells[self.row,c].font.bold = bold[c]
+                sh.set_bold(self.row,c,bold[c])
         self.row += 1
 
-    def write_row_form(self,sh:xl.Sheet,forms:list,curr_form:list[bool],bold:bool|list[bool]=False):
+    def write_row_form(self,sh:Sheet,forms:list,curr_form:list[bool],bold:bool|list[bool]=False):
         for c in range(len(forms)):
-            sh.cells[self.row, c].formula = forms[c]
+            sh.write_formula(self.row,c,forms[c])
             if type(bold) is bool:
-                sh.cells[self.row, c].font.bold = bold
+                sh.set_bold(self.row,c,bold)
             elif type(bold) is list:
-                sh.cells[self.row, c].font.bold = bold[c]
+                sh.set_bold(self.row,c,bold[c])
             if curr_form[c]:
-                try:
-                    mode = int(np.log(float(sh.cells[self.row,c].value))//np.log(1e3))
-                except BaseException as err:
-                    print(err)
-                    print(sh.cells[self.row,c].value)
-                    print(forms[c])
-                    raise BaseException
-                sh.cells[self.row,c].number_format = f'$#{"".join(mode*[","])}.00 \"{"".join(mode*["M"])}\"'
+                sh.set_number_format_from_value(self.row,c,self._currency_format)
         self.row += 1
 
+    @staticmethod
+    def _currency_format(value):
+        # the sheets are evaluated locally, so this only sees a non-number for empty or text cells
+        if isinstance(value,bool) or not isinstance(value,(int,float)):
+            return '$#,##0.00'
+        mode = Currency(value).mode
+        return f'$#{"".join(mode*[","])}.00 \"{"".join(mode*["M"])}\"'
+
 
 class CapitalCostBuildUp(ReportSection):
 
-    def __init__(self,modules:list[Module],CE=800,wc=None,):
+    instrumentFactor = 0.55
+    sitePrepFactor = 0.05
+    serviceFactor = 0.05
+    contingencyFactor = 0.15
+    contractorsFactor = 0.03
+    landFactor = 0.02
+    royaltiesFactor = 0.02
+    startupFactor = 0.1
+    wcFactor = 0.15
+    factorNames = ['instrumentFactor','sitePrepFactor','serviceFactor','contingencyFactor','contractorsFactor',
+                   'landFactor','royaltiesFactor','startupFactor','wcFactor']
+    utilityCE = 567
 
-        self.mods = modules
+    def __init__(self,modules:list[Module]|ModuleRegistry,CE=800,wc=None,):
 
-        self.pumps = [i for i in filter(lambda m: isinstance(m, Pump), self.mods)]
-        self.comps = [i for i in filter(lambda m: isinstance(m,Compressor),self.mods)]
-        self.hxs = [i for i in filter(lambda m: isinstance(m,HeatExchanger),self.mods)]
-        self.fHeat = [i for i in filter(lambda m: isinstance(m,FiredHeater),self.mods)]
-        self.columns = [i for i in filter(lambda m: isinstance(m,Column),self.mods)]
-        self.verticalVessels = [i for i in filter(lambda m: isinstance(m,VerticalVessel),self.mods)]
-        self.horizontalVessels = [i for i in filter(lambda m: isinstance(m,HorizontalVessel),self.mods)]
-        self.reactors = [i for i in filter(lambda m: isinstance(m,(HorizontalReactor,VerticalReactor)),self.mods)]
-        self.tanks = [i for i in filter(lambda m: isinstance(m,Tank),self.mods)]
+        self.registry = ModuleRegistry.of(modules)
+        self.mods = self.registry.mods
 
-        self.CE = CE
-        self.totPurchCost = sum([m.purchCost for m in self.mods])
-        self.totEscPurchCost = sum([m.purchCost.update_cost(CE,m.corrCE) for m in self.mods])
-        self.totBmCost = sum([m.bmCost for m in self.mods])
-        self.totEscBmCost = sum([m.bmCost.update_cost(CE,m.corrCE) for m in self.mods])
+        # the registry updates these lists in place
+        for cat in self.registry.categories: setattr(self,cat.key,self.registry[cat.key])
 
         self.reactors:list[VerticalReactor | HorizontalReactor]
-        self.catalystCost = sum([m.catalyst.cost for m in self.reactors])
-        self.instrumentAndControls = 0.55*self.totEscPurchCost
-        self.TBM = self.totEscBmCost+self.catalystCost+self.instrumentAndControls
-
-        self.sitePrep = self.service = 0.05*self.TBM
-
         self.hxs: list[HeatExchanger]
         self.pumps: list[Pump]
         self.comps: list[Compressor]
-        self.allocated = {
-            'Steam': (sum([m.steamStream.flow for m in self.hxs]),
-                      Currency(930*sum([m.steamStream.flow for m in self.hxs])**0.81).update_cost(self.CE,567)),
-            'TW': (sum([m.twMassFlow for m in self.hxs]),
-                   Currency(1100*(sum([m.twMassFlow for m in self.hxs])/500)**0.68).update_cost(self.CE,567)),
-            'Elec': (sum([m.Pc for m in self.pumps])+sum([m.Pc for m in self.comps]),
-                     Currency(2900000*((sum([m.Pc for m in self.pumps])+sum([m.Pc for m in self.comps])/1000)**0.83)).update_cost(self.CE,567))
-        }
 
-        self. DPI = self.TBM + self.sitePrep+self.service+sum([self.allocated[key][1] for key in self.allocated])
+        self._wc = wc
+        self.CE = CE
 
-        self.contingencyFee = 0.15*self.DPI
-        self.contractorsFee = 0.03*self.DPI
+    @property
+    def totPurchCost(self):
+        return Currency(sum([tot[1] for tot in self.registry.byCE.values()]))
+
+    @property
+    def totBmCost(self):
+        return Currency(sum([tot[2] for tot in self.registry.byCE.values()]))
+
+    @property
+    def catalystCost(self):
+        return Currency(self.registry.total('reactors','catalyst.cost'))
+
+    def add_module(self,m:Module):
+        if m in self.registry.mods:
+            raise ValueError(f'{m.name} is already in the capital cost buildup')
+        self.registry.add(m)
+        self.CE = self.CE
+
+    def remove_module(self,m:Module|str):
+        m = self.registry.find(m)
+        self.registry.remove(m)
+        self.CE = self.CE
+        return m
+
+    def replace_module(self,old:Module|str,new:Module):
+        old = self.registry.find(old)
+        if new is not old and new in self.registry.mods:
+            raise ValueError(f'{new.name} is already in the capital cost buildup')
+        self.registry.replace(old,new)
+        self.CE = self.CE
+        return old
+
+    @property
+    def CE(self):
+        return self._CE
+
+    @CE.setter
+    def CE(self,CE):
+        self._CE = CE
+        for key,val in self.escalate(CE).items(): setattr(self,key,val)
+
+    def escalate(self,CE):
+        # escalated totals and the downstream chain at a cost index, or at an array of them, from the cached
+        # unescalated totals -- nothing is summed over the modules again
+        reg = self.registry
+        # started from a zero of the right type, so an empty registry still gives a Currency (or a CurrencyArray
+        # for an array of CE)
+        zero = Currency(0).update_cost(CE,1)
+        res = {
+            'totEscPurchCost': sum([Currency(tot[1]).update_cost(CE,corrCE) for corrCE,tot in reg.byCE.items()],zero),
+            'totEscBmCost': sum([Currency(tot[2]).update_cost(CE,corrCE) for corrCE,tot in reg.byCE.items()],zero),
+            'allocated': self.utility_allocation(reg.total('hxs','steamStream.flow'),reg.total('hxs','twMassFlow'),
+                                                 reg.total('pumps','Pc'),reg.total('comps','Pc'),CE,
+                                                 reg.total('fans','Pc'))
+        }
+        res.update(self.investment_chain(res['totEscPurchCost'],res['totEscBmCost'],self.catalystCost,
+                                         res['allocated'],self._wc))
+        return res
+
+    @classmethod
+    def utility_allocation(cls,steam_flow,tw_flow,pump_power,comp_power,CE,fan_power=0.):
+        # works on totals of a single plant or on arrays of totals, one per scenario. Fans draw on the
+        # electrical utility like pumps do
+        cost = Currency if np.ndim(CE) == 0 and np.ndim(pump_power) == 0 and np.ndim(fan_power) == 0 else CurrencyArray
+        return {
+            'Steam': (steam_flow,cost(930*steam_flow**0.81).update_cost(CE,cls.utilityCE)),
+            'TW': (tw_flow,cost(1100*(tw_flow/500)**0.68).update_cost(CE,cls.utilityCE)),
+            'Elec': (pump_power+comp_power+fan_power,
+                     cost(2900000*((pump_power+fan_power+comp_power/1000)**0.83)).update_cost(CE,cls.utilityCE))
+        }
 
-        self.TDC = self.DPI + self.contingencyFee+self.contractorsFee
+    @classmethod
+    def investment_chain(cls,esc_purch_cost,esc_bm_cost,catalyst_cost,allocated,wc=None,**factors):
+        # TBM -> DPI -> TDC -> TPI -> TCI; any factor can be overridden by keyword (e.g. contingencyFactor=0.2),
+        # and every input may be a scalar or an array of scenarios
+        f = {key: factors.get(key,getattr(cls,key)) for key in cls.factorNames}
+        res = {}
+        res['instrumentAndControls'] = f['instrumentFactor']*esc_purch_cost
+        res['TBM'] = esc_bm_cost+catalyst_cost+res['instrumentAndControls']
 
-        self.land = self.royalties = 0.02*self.TDC
-        self.startup = 0.1*self.TDC
+        res['sitePrep'] = f['sitePrepFactor']*res['TBM']
+        res['service'] = f['serviceFactor']*res['TBM']
 
-        self.TPI = self.land+self.royalties+self.startup
+        res['DPI'] = res['TBM']+res['sitePrep']+res['service']+sum([allocated[key][1] for key in allocated])
 
-        self.wc = wc if wc else 0.15*self.TPI
+        res['contingencyFee'] = f['contingencyFactor']*res['DPI']
+        res['contractorsFee'] = f['contractorsFactor']*res['DPI']
 
-        self.TCI = self.TPI+self.wc
+        res['TDC'] = res['DPI']+res['contingencyFee']+res['contractorsFee']
 
-    def build_sheet(self,wb:xl.Book,sh_name,title,report_title):
-        sh = super().build_sheet(wb,sh_name,title,report_title)
+        res['land'] = f['landFactor']*res['TDC']
+        res['royalties'] = f['royaltiesFactor']*res['TDC']
+        res['startup'] = f['startupFactor']*res['TDC']
 
-        self.row = 4
+        res['TPI'] = res['land']+res['royalties']+res['startup']
 
-        if len(self.pumps) > 0:
-            self.write_row(sh,['PUMPS'],True)
-            self.write_row(sh, Pump.xlHeader, True)
-            for p in self.pumps:self.write_row(sh,p.generate_row_xl())
-            self.row+=1
+        res['wc'] = wc if wc else f['wcFactor']*res['TPI']
 
-        if len(self.comps) > 0:
-            self.write_row(sh,['COMPRESSORS'],True)
-            self.write_row(sh,Compressor.xlHeader,True)
-            for c in self.comps: self.write_row(sh,c.generate_row_xl())
-            self.row += 1
+        res['TCI'] = res['TPI']+res['wc']
 
-        if len(self.hxs)>0:
-            self.write_row(sh,['HEAT EXCHANGERS'],True)
-            self.write_row(sh,HeatExchanger.xlHeader,True)
-            for h in self.hxs: self.write_row(sh,h.generate_row_xl())
-            self.row+=1
+        return res
 
-        if len(self.fHeat)>0:
-            self.write_row(sh,['FIRED HEATERS'],True)
-            self.write_row(sh,FiredHeater.xlHeader,True)
-            for f in self.fHeat: self.write_row(sh,f.generate_row_xl())
-            self.row += 1
-
-        if len(self.columns)>0:
-            self.write_row(sh,['COLUMNS'],True)
-            self.write_row(sh,Column.xlHeader,True)
-            for c in self.columns: self.write_row(sh,c.generate_row_xl())
-            self.row +=1
-
-        if len(self.verticalVessels)>0:
-            self.write_row(sh,['Vertical Vessels'],True)
-            self.write_row(sh,VerticalVessel.xlHeader,True)
-            for vves in self.verticalVessels: self.write_row(sh,vves.generate_row_xl())
-            self.row+=1
+    def build_sheet(self,wb:Workbook,sh_name,title,report_title):
+        sh = super().build_sheet(wb,sh_name,title,report_title)
 
-        if len(self.horizontalVessels)>0:
-            self.write_row(sh,['Horizontal Vessels'],True)
-            self.write_row(sh,HorizontalVessel.xlHeader,True)
-            for hves in self.horizontalVessels: self.write_row(sh,hves.generate_row_xl())
-            self.row+=1
+        self.row = 4
 
-        if len(self.tanks)>0:
-            self.write_row(sh,['Tanks'],True)
-            self.write_row(sh,Tank.xlHeader,True)
-            for t in self.tanks: self.write_row(sh,t.generate_row_xl())
+        for cat,mods in self.registry.sections():
+            self.write_row(sh,[cat.title],True)
+            self.write_row(sh,cat.header,True)
+            for m in mods: self.write_row(sh,m.generate_row_xl())
             self.row+=1
 
         self.write_row(sh,['Based on CE Index',self.CE],[True,False])
@@ -229,74 +276,32 @@ class CapitalCostBuildUp(ReportSection):
         self.write_row(sh,['Working Capital',self.wc],[True,False])
         self.write_row(sh,['Total Capital Investment',self.TCI],True)
 
-        sh.autofit(axis='columns')
+        sh.autofit()
 
         return sh
 
-    def build_sheet_with_formulas(self,wb:xl.Book,sh_name,title,report_title):
+    def build_sheet_with_formulas(self,wb:Workbook,sh_name,title,report_title):
         sh=super().build_sheet(wb,sh_name,title,report_title)
 
         self.row =4
 
-        if len(self.pumps) > 0:
-            self.write_row(sh,['PUMPS'],True)
-            self.write_row(sh, Pump.xlHeader, True)
-            for p in self.pumps:self.write_row_form(sh,*p.generate_formulas_xl(sh,self.row+1))
-            self.row+=1
-
-        if len(self.comps) > 0:
-            self.write_row(sh,['COMPRESSORS'],True)
-            self.write_row(sh,Compressor.xlHeader,True)
-            for c in self.comps: self.write_row_form(sh,*c.generate_formulas_xl(sh,self.row+1))
-            self.row += 1
-
-        if len(self.hxs)>0:
-            self.write_row(sh,['HEAT EXCHANGERS'],True)
-            self.write_row(sh,HeatExchanger.xlHeader,True)
-            for h in self.hxs: self.write_row_form(sh,*h.generate_formulas_xl(sh,self.row+1))
-            self.row+=1
-
-        if len(self.fHeat)>0:
-            self.write_row(sh,['FIRED HEATERS'],True)
-            self.write_row(sh,FiredHeater.xlHeader,True)
-            for f in self.fHeat: self.write_row_form(sh,*f.generate_formulas_xl(sh,self.row+1))
-            self.row += 1
-
-        if len(self.columns)>0:
-            self.write_row(sh,['COLUMNS'],True)
-            self.write_row(sh,Column.xlHeader,True)
-            for c in self.columns: self.write_row_form(sh,*c.generate_formulas_xl(sh,self.row+1))
-            self.row +=1
-
-        if len(self.verticalVessels)>0:
-            self.write_row(sh,['Vertical Vessels'],True)
-            self.write_row(sh,VerticalVessel.xlHeader,True)
-            for vves in self.verticalVessels: self.write_row_form(sh,*vves.generate_formulas_xl(sh,self.row+1))
-            self.row+=1
-
-        if len(self.horizontalVessels)>0:
-            self.write_row(sh,['Horizontal Vessels'],True)
-            self.write_row(sh,HorizontalVessel.xlHeader,True)
-            for hves in self.horizontalVessels: self.write_row_form(sh,*hves.generate_formulas_xl(sh,self.row+1))
-            self.row+=1
-
-        if len(self.tanks)>0:
-            self.write_row(sh,['Tanks'],True)
-            self.write_row(sh,Tank.xlHeader,True)
-            for t in self.tanks: self.write_row_form(sh,*t.generate_formulas_xl(sh,self.row+1))
+        for cat,mods in self.registry.sections():
+            self.write_row(sh,[cat.title],True)
+            self.write_row(sh,cat.header,True)
+            for m in mods: self.write_row_form(sh,*m.generate_formulas_xl(sh,self.row+1))
             self.row+=1
 
         self.row += 4
         self.write_row(sh,['Projected Cost Index','','',self.CE],True)
-        sh.range(f'D{self.row}').name = 'CE'
+        sh.name_range(f'D{self.row}','CE')
         self.row+=1
         self.write_row(sh,['','Correlation Cost (CE=567)','=TEXTJOIN(" ",TRUE,"Escalated Cost (CE=",CE,")")'],True)
         self.write_row_form(sh,['Cp',f'={"+".join([f"CP_{a.xlNameRange}" for a in self.mods])}',f'=b{self.row+1}*CE/567'],
                             [False,True,True],[True,False,True])
-        sh.range(f'c{self.row}').name = 'Cp'
+        sh.name_range(f'c{self.row}','Cp')
         self.write_row_form(sh,['Cbm',f'={"+".join([f"BM_{a.xlNameRange}" for a in self.mods])}',f'=b{self.row+1}*CE/567'],
                             [False,True,True],[True,False,True])
-        sh.range(f'c{self.row}').name = 'Cbm'
+        sh.name_range(f'c{self.row}','Cbm')
         self.row+=1
         self.write_row(sh,['','Mass','Rate','Cost'],True)
         self.reactors:list[VerticalReactor | HorizontalReactor]
@@ -309,44 +314,61 @@ class CapitalCostBuildUp(ReportSection):
                                 [False,False,False,True],True)
         else:
             self.write_row(sh,['Initial Catalyst Cost','','',Currency(0)],True)
-        sh.range(f'd{self.row}').name = 'Ccat'
+        sh.name_range(f'd{self.row}','Ccat')
         self.row += 1
         self.write_row_form(sh,['Instruments and Controls','55%','Cp',f'=b{self.row+1}*Cp'],[False,False,False,True])
-        sh.range(f'd{self.row}').name = 'InstControls'
+        sh.name_range(f'd{self.row}','InstControls')
         self.write_row_form(sh,['Total Bare Module Cost','','','=Cbm+Ccat+InstControls'],[False,False,False,True],True)
-        sh.range(f'd{self.row}').name = 'TBM'
-
-
-
+        sh.name_range(f'd{self.row}','TBM')
 
+        sh.flush()
         return sh
 
-
+    def verify_formulas(self,rtol=1e-9):
+        # builds the formula sheet in memory and compares every CP_/BM_ cell with the module's own cost;
+        # returns (module name, attribute, sheet value, python value) for the ones that disagree
+        sh = self.build_sheet_with_formulas(MemoryWorkbook(),'verify','','')
+        res = []
+        for cat,mods in self.registry.sections():
+            for m in mods:
+                for prefix,attr in (('CP','purchCost'),('BM','bmCost')):
+                    expected = float(getattr(m,attr))
+                    try:
+                        value = sh.model.value_of(f'{prefix}_{m.xlNameRange}')
+                    except FormulaError as err:
+                        value = str(err)
+                    if not isinstance(value,float) or not np.isclose(value,expected,rtol=rtol,atol=0):
+                        res.append((m.name,attr,value,expected))
+        return res
 
 
 class OperatingCosts(ReportSection):
 
     opHour = 8000
+    elecPrice = 0.0711  # $/kWh
+    twPrice = 0.46  # $/1000 gal
+    ngPrice = 3.63
+    utilities = ('elec','tw','ng','steam')
 
-    def __init__(self,sales:list[RawMaterial],costs:list[RawMaterial],mods:list[Module]):
+    def __init__(self,sales:list[RawMaterial],costs:list[RawMaterial],mods:list[Module]|ModuleRegistry):
 
         self.saleMatls = sales
         self.costMatls = costs
-        self.mods = mods
+        self.registry = ModuleRegistry.of(mods)
+        self.mods = self.registry.mods
+        reg = self.registry
 
-        self.reacts = [i for i in filter(lambda m: isinstance(m,(HorizontalReactor,VerticalReactor)),self.mods)]
+        self.reacts = reg['reactors']
         self.reacts: list[HorizontalReactor | VerticalReactor]
 
         self.saleValue = sum([m.h_cost(self.opHour) for m in self.saleMatls])
-        self.costValue = sum([m.h_cost(self.opHour) for m in self.costMatls])+sum([m.catalyst.cost for m in self.reacts])
+        self.costValue = sum([m.h_cost(self.opHour) for m in self.costMatls])+reg.total('reactors','catalyst.cost')
 
-        self.pumpsComps = [i for i in filter(lambda m: isinstance(m,(Pump,Compressor)),self.mods)]
-        self.pumpsComps: list[Pump | Compressor]
-        self.totElec = sum([m.Pc for m in self.pumpsComps])
+        self.totElec = reg.total('pumps','Pc')+reg.total('comps','Pc')+reg.total('fans','Pc')
 
-        self.hxs = [i for i in filter(lambda m: isinstance(m,HeatExchanger),self.mods)]
+        self.hxs = reg['hxs']
         self.hxs: list[HeatExchanger]
-        self.totTW = sum([m.twVolFlow for m in self.hxs])
+        self.totTW = reg.total('hxs','twVolFlow')
         self.totSteam = {}
         for h in self.hxs:
             try:
@@ -354,21 +376,71 @@ class OperatingCosts(ReportSection):
             except KeyError:
                 self.totSteam[h.steamStream.pres] = h.steamStream.flow
 
-        self.fHeat = [i for i in filter(lambda m: isinstance(m,FiredHeater),self.mods)]
+        self.fHeat = reg['fHeat']
         self.fHeat:list[FiredHeater]
-        self.totNG = sum([m.ngFlow for m in self.fHeat])
+        self.totNG = reg.total('fHeat','ngFlow')
 
-        self.elecCost = self.totElec*self.opHour*Currency(0.0711)
-        self.twCost = self.totTW*self.opHour*Currency(0.46)/1000
-        self.ngCost = self.totNG*Currency(3.63)*self.opHour
+        self.elecCost = self.totElec*self.opHour*Currency(self.elecPrice)
+        self.twCost = self.totTW*self.opHour*Currency(self.twPrice)/1000
+        self.ngCost = self.totNG*Currency(self.ngPrice)*self.opHour
 
-        self.nComps = len([i for i in filter(lambda m: isinstance(m,Compressor),self.mods)])
-        self.nHxs = len(self.hxs)
-        self.nFireHeat = len(self.fHeat)
-        self.nTowers = len([i for i in filter(lambda m: isinstance(m,Column),self.mods)])
-        self.nReactors = len(self.reacts)
+        self.nComps = reg.count('comps')
+        self.nHxs = reg.count('hxs')
+        self.nFireHeat = reg.count('fHeat')
+        self.nTowers = reg.count('columns')
+        self.nReactors = reg.count('reactors')
 
         self.nOperators = 0.1*self.nComps+0.1*self.nHxs+0.3*self.nFireHeat+0.25*self.nTowers+0.3*self.nReactors
 
-
-
+    def usage(self):
+        # (modules, utilities) hourly use of every module at full load, in the units the prices are quoted in; steam
+        # is already priced at the header price of its pressure
+        res = np.zeros((len(self.mods),len(self.utilities)))
+        steam = []
+        for i,m in enumerate(self.mods):
+            keys = {cat.key for cat in self.registry.categories_of(m)}
+            if keys & {'pumps','comps','fans'}: res[i,0] = m.Pc
+            if 'fHeat' in keys: res[i,2] = m.ngFlow
+            if 'hxs' in keys:
+                res[i,1] = m.twVolFlow/1000
+                steam.append((i,m.steamStream.heatLoad,m.steamStream.pres))
+        if steam:
+            i,load,pres = zip(*steam)
+            res[list(i),3] = np.array(load)*factors['steam.price'](pres)
+        return res
+
+    def hourly(self,elec_price=None,tw_price=None,ng_price=None,steam_index=1.,load=None,module_load=None,
+               hours=8760):
+        # operating costs against hourly tariffs. Every price and load factor is a scalar or one value per hour;
+        # steam_index scales the header prices. load is the plant load, which also drives raw materials and sales,
+        # and module_load (modules, hours) overrides it for the utilities of single modules. The default load runs
+        # opHour hours a year, so flat prices give the annual totals of __init__
+        load = np.broadcast_to(np.asarray(self.opHour/hours if load is None else load,dtype=float),(hours,))
+        module_load = load if module_load is None else np.asarray(module_load,dtype=float)
+
+        P = np.empty((len(self.utilities),hours))
+        for k,(price,flat) in enumerate(((elec_price,self.elecPrice),(tw_price,self.twPrice),
+                                         (ng_price,self.ngPrice),(steam_index,1.))):
+            P[k] = flat if price is None else price
+
+        U = self.usage()
+        moduleHourly = (U @ P)*module_load
+        # summed over the modules first, so a plant wide load never builds the (modules, hours) block twice
+        byUtility = (U.T @ module_load if module_load.ndim == 2 else U.sum(0)[:,None]*load)*P
+
+        sales = sum([float(m.value) for m in self.saleMatls])*load
+        costs = sum([float(m.value) for m in self.costMatls])*load
+
+        res = {
+            'hourly': CurrencyArray(byUtility.sum(0)),
+            'byUtility': {u: CurrencyArray(byUtility[k]) for k,u in enumerate(self.utilities)},
+            'byModule': CurrencyArray(moduleHourly.sum(1)),
+            'moduleHourly': CurrencyArray(moduleHourly),
+            'sales': CurrencyArray(sales),
+            'costs': CurrencyArray(costs),
+        }
+        for k,u in enumerate(self.utilities): res[f'{u}Cost'] = Currency(byUtility[k].sum())
+        res['utilityCost'] = Currency(byUtility.sum())
+        res['saleValue'] = Currency(sales.sum())
+        res['costValue'] = Currency(costs.sum()+self.registry.total('reactors','catalyst.cost'))
+        return res
@@ -0,0 +1,449 @@
+import heapq
+import math
+
+import numpy as np
+
+from ChemPy.MER import MER
+
+# pinch design method: the network is designed from the pinch outwards, separately above and below it. Above the pinch
+# hot streams leave and cold streams enter at the pinch, so every match there needs mCp_hot <= mCp_cold; below it the
+# rule flips. Both sides run through the same routine: `d` is the direction the streams walk away from the pinch (+1
+# above, -1 below) and a match of duty Q keeps t_min at its far end while
+#     (Th - Tc - t_min) + d*Q*(1/mCp_hot - 1/mCp_cold) >= 0
+# which at the pinch (Th - Tc = t_min) is exactly the mCp rule.
+#
+# the streams leaving the pinch (hot above, cold below: the "must" side) have to be matched in full, only the others
+# get utilities, so the network meets the MER target. A match is only taken when the remaining problem can still be
+# finished without utility on the must side, and what the heuristic leaves over is finished in order of distance from
+# the pinch, which always works while that holds.
+
+
+class Match:
+
+    def __init__(self,hot,cold,Q,Th_in,Th_out,Tc_in,Tc_out,side,kind='exchanger'):
+        self.hot = hot  # stream names, None for the utility side of a heater/cooler
+        self.cold = cold
+        self.Q = Q
+        self.Th_in = Th_in
+        self.Th_out = Th_out
+        self.Tc_in = Tc_in
+        self.Tc_out = Tc_out
+        self.side = side  # 'above' / 'below' the pinch
+        self.kind = kind  # 'exchanger', 'heater' or 'cooler'
+        self.A = None
+
+    @property
+    def lmtd(self):
+        if None in (self.Th_in,self.Th_out,self.Tc_in,self.Tc_out):
+            return None
+        dT1 = self.Th_in-self.Tc_out
+        dT2 = self.Th_out-self.Tc_in
+        if dT1 <= 0 or dT2 <= 0:
+            return None
+        return dT1 if math.isclose(dT1,dT2) else (dT1-dT2)/math.log(dT1/dT2)
+
+    def __repr__(self):
+        return f'Match({self.kind}, {self.hot} -> {self.cold}, Q={self.Q:.6g}, {self.side})'
+
+
+class _Streams:
+    # one side's hot or cold streams as arrays: temperature at the pinch end of the unmatched part, far end
+    # temperature, mCp, remaining duty, and a version that retires queued candidates once the stream has changed.
+    # Split branches are appended as streams of their own under the parent's name
+
+    def __init__(self,streams):
+        self.names = [a[0] for a in streams]  # [(name, T pinch end, T far end, mCp)]
+        self.T = np.array([a[1] for a in streams],dtype=float)
+        self.far = np.array([a[2] for a in streams],dtype=float)
+        self.m = np.array([a[3] for a in streams],dtype=float)
+        self.Q = np.abs(self.far-self.T)*self.m
+        self.v = np.zeros(len(streams),dtype=int)
+
+    def __len__(self):
+        return len(self.names)
+
+    def split(self,i,mCp):
+        # branch of mCp off stream i, at its temperatures and with its share of the duty
+        self.names.append(self.names[i])
+        Q = self.Q[i]*mCp/self.m[i]
+        self.T,self.far,self.m,self.Q,self.v = (np.append(self.T,self.T[i]),np.append(self.far,self.far[i]),
+                                                np.append(self.m,mCp),np.append(self.Q,Q),np.append(self.v,0))
+        self.m[i] -= mCp
+        self.Q[i] -= Q
+        self.v[i] += 1
+        return len(self.names)-1
+
+    def unsplit(self,i):
+        # takes the branch split off stream i last back, as if it had never been split
+        self.names.pop()
+        self.m[i] += self.m[-1]
+        self.Q[i] += self.Q[-1]
+        self.v[i] -= 1
+        self.T,self.far,self.m,self.Q,self.v = self.T[:-1],self.far[:-1],self.m[:-1],self.Q[:-1],self.v[:-1]
+
+    def at(self,T,tol):
+        return [n for n in np.flatnonzero(self.Q > tol) if abs(self.T[n]-T) <= 1e-9*max(1.,abs(T))]
+
+
+class _Side:
+
+    def __init__(self,d,t_min,pinch:tuple,hot,cold,tol):
+        self.d = d
+        self.t_min = t_min
+        self.pinch = pinch  # (hot, cold) pinch temperatures
+        self.tol = tol
+        self.hot,self.cold = _Streams(hot),_Streams(cold)
+        self.heap = []
+        self.matches = []
+        self.spare = []  # [stream, distance from, distance to, Q] of the other side for utilities, see finish
+
+    @property
+    def must(self):
+        # (streams that have to be matched in full, the others), with their pinch temperatures
+        if self.d > 0:
+            return self.hot,self.cold,self.pinch
+        return self.cold,self.hot,self.pinch[::-1]
+
+    def duty(self,i,j):
+        # feasible duty of every (i, j) pair, broadcasting over index arrays. A pair that breaks the mCp rule is only
+        # good for a short match, unless the larger stream is split to the other's mCp: the branch then runs
+        # parallel to its partner and can take its full share. `split` marks the pairs where that gives more duty
+        h,c = self.hot,self.cold
+        g = h.T[i]-c.T[j]-self.t_min
+        k = self.d*(1/h.m[i]-1/c.m[j])
+        with np.errstate(divide='ignore',invalid='ignore'):
+            Qmax = np.where(k >= 0,np.inf,np.maximum(g,0)/-k)
+            ratio = np.where(h.m[i] > c.m[j],c.m[j]/h.m[i],h.m[i]/c.m[j])
+        Q = np.minimum(np.minimum(h.Q[i],c.Q[j]),Qmax)
+        Qs = np.where(h.m[i] > c.m[j],np.minimum(h.Q[i]*ratio,c.Q[j]),np.minimum(h.Q[i],c.Q[j]*ratio))
+        split = (k < 0) & (Qs > Q)
+        ok = g >= -self.tol
+        return np.where(ok,np.where(split,Qs,Q),0.),g <= self.tol,split,np.where(ok,Q,0.)
+
+    def excess(self,a=None,b=None,Q=0.):
+        # remaining problem analysis: the most the must-side heat within some distance of the pinch exceeds the
+        # other side's heat within that distance, after taking Q off must stream a and stream b. The must side can
+        # still be finished without utility while this is <= 0
+        must,free,(Pm,Pf) = self.must
+        x0,n0 = self.d*(must.T-Pm),must.Q.copy()
+        y0,m0 = self.d*(free.T-Pf),free.Q.copy()
+        if a is not None:
+            x0[a] += Q/must.m[a]
+            n0[a] -= Q
+            y0[b] += Q/free.m[b]
+            m0[b] -= Q
+        x1,y1 = x0+np.maximum(n0,0)/must.m,y0+np.maximum(m0,0)/free.m
+
+        # the difference of the two cumulative duties is piecewise linear, so its breakpoints are enough
+        pts = np.concatenate([x0,x1,y0,y1])
+        slope = np.concatenate([must.m,-must.m,-free.m,free.m])
+        order = np.argsort(pts,kind='stable')
+        pts,slope = pts[order],np.cumsum(slope[order])
+        return np.max(np.concatenate([[0.],np.cumsum(slope[:-1]*np.diff(pts))]))
+
+    def fits(self,i,j,Q):
+        # whether the (i, j) match of duty Q leaves a problem that still meets the target
+        a,b = (i,j) if self.d > 0 else (j,i)
+        return self.excess(a,b,Q) <= self.tol
+
+    def match(self,i,j,side,split=False):
+        h,c = self.hot,self.cold
+        Q = float(self.duty(i,j)[3])
+        if not self.fits(i,j,Q):
+            Q = 0.
+        if split:
+            # a branch of the larger stream, unless that leaves the rest short where the whole stream would not
+            s,n = (h,i) if h.m[i] > c.m[j] else (c,j)
+            b = s.split(n,min(h.m[i],c.m[j]))
+            i2,j2 = (b,j) if s is h else (i,b)
+            Qs = float(self.duty(i2,j2)[0])
+            if Qs > Q and self.fits(i2,j2,Qs):
+                i,j,Q = i2,j2,Qs
+            else:
+                s.unsplit(n)
+        if Q <= self.tol:
+            return
+        Th,Tc = h.T[i],c.T[j]
+        Th2,Tc2 = Th+self.d*Q/h.m[i],Tc+self.d*Q/c.m[j]
+        if self.d > 0:
+            self.matches.append(Match(h.names[i],c.names[j],Q,Th2,Th,Tc,Tc2,side))
+        else:
+            self.matches.append(Match(h.names[i],c.names[j],Q,Th,Th2,Tc2,Tc,side))
+
+        h.T[i],c.T[j] = Th2,Tc2
+        h.Q[i] -= Q
+        c.Q[j] -= Q
+        h.v[i] += 1
+        c.v[j] += 1
+        return i,j
+
+    def pinch_matches(self,side):
+        # every stream leaving the pinch (hot above, cold below) needs a partner with at least its mCp. The largest
+        # goes first and takes the smallest partner that fits, split down to its own mCp while other streams still
+        # wait for one; when none fits, the stream itself is split across the largest partners
+        above = self.d > 0
+        must,free,(T_must,T_free) = self.must
+        todo,partners = must.at(T_must,self.tol),free.at(T_free,self.tol)
+
+        for k,n in enumerate(sorted(todo,key=lambda n: -must.m[n])):
+            while partners:
+                fits = [f for f in partners if free.m[f] >= must.m[n]]
+                if fits:
+                    f = min(fits,key=lambda f: free.m[f])
+                    partners.remove(f)
+                    if k < len(todo)-1 and free.m[f] > must.m[n]:
+                        partners.append(f)
+                        f = free.split(f,must.m[n])
+                    b = n
+                else:
+                    f = max(partners,key=lambda f: free.m[f])
+                    partners.remove(f)
+                    b = must.split(n,free.m[f])
+                self.match(b,f,side) if above else self.match(f,b,side)
+                if b == n: break
+
+    def push(self,i,j):
+        i,j = (a.ravel() for a in np.broadcast_arrays(np.atleast_1d(i),np.atleast_1d(j)))
+        Q,pinch,split,_ = self.duty(i,j)
+        for n in np.flatnonzero(Q > self.tol):
+            a,b = int(i[n]),int(j[n])
+            # pinch matches first, then the must stream closest to the pinch, so what leaves the pinch is placed
+            # before heat near it is spent further out, then the largest duty: the tick-off heuristic
+            key = (not pinch[n],self.d*self.hot.T[a] if self.d > 0 else self.d*self.cold.T[b],-Q[n])
+            heapq.heappush(self.heap,(*key,a,b,self.hot.v[a],self.cold.v[b],bool(split[n])))
+
+    def finish(self,side):
+        # what the must side still holds is placed interval by interval outwards from the pinch, on the grid of
+        # every remaining stream end. A must stream takes what it can from the other side's streams in the same
+        # interval, as a branch running parallel to it, and the rest from heat the other side left in the
+        # intervals already passed. Any heat left nearer the pinch will do for what comes further out, so this never
+        # runs short while the excess is <= 0. Partners are kept from one interval to the next where they can be,
+        # and a pair that carries on with the same branches is one exchanger
+        must,free,(Pm,Pf) = self.must
+        a,b = np.flatnonzero(must.Q > self.tol),np.flatnonzero(free.Q > self.tol)
+        if not len(a):
+            return
+        x0,y0 = self.d*(must.T-Pm),self.d*(free.T-Pf)
+        x1,y1 = x0+must.Q/must.m,y0+free.Q/free.m
+        grid = np.unique(np.concatenate([x0[a],x1[a],y0[b],y1[b]]))
+        grid = grid[grid <= x1[a].max()]
+
+        runs = {}  # (must, free) -> [[Q, x from, x to, y from, y to], ...]
+        stock = []  # [free, y from, y to, mCp]: heat the other side left in the intervals passed
+        pairs,draws = {},{}  # partners of the previous interval: must -> {free: mCp}, must -> stock index
+        # what is left is judged by rate and by length rather than heat, as an interval can be short enough for
+        # any heat in it to look like rounding
+        eps,short = 1e-9*max(must.m.max(),free.m.max()),1e-9*(1+abs(grid).max())
+        grid = grid[np.diff(grid,prepend=-np.inf) > short]
+
+        def add(p,r,Q,xs,xe,ys,ye):
+            last = runs.setdefault((p,r),[])
+            if last and math.isclose(last[-1][2],xs) and math.isclose(last[-1][4],ys) and \
+                    math.isclose(last[-1][0]/(last[-1][2]-last[-1][1]),Q/(xe-xs)) and \
+                    math.isclose(last[-1][0]/(last[-1][4]-last[-1][3]),Q/(ye-ys)):
+                last[-1][0] += Q
+                last[-1][2],last[-1][4] = xe,ye
+            else:
+                last.append([Q,xs,xe,ys,ye])
+
+        for g0,g1 in zip(grid[:-1],grid[1:]):
+            dx = g1-g0
+            need = {p: must.m[p] for p in a[(x0[a] <= g0+short) & (x1[a] >= g1-short)]}
+            cap = {r: free.m[r] for r in b[(y0[b] <= g0+short) & (y1[b] >= g1-short)]}
+
+            # the same interval: last interval's partners first, then the smallest stream that covers the rest
+            now = {}
+            for p in need:
+                for r,m in pairs.get(p,{}).items():
+                    use = min(m,need[p],cap.get(r,0.))
+                    if use > eps:
+                        now.setdefault(p,{})[r] = use
+                        need[p] -= use
+                        cap[r] -= use
+            for p in need:
+                while need[p] > eps:
+                    left = [r for r in cap if cap[r] > eps]
+                    if not left: break
+                    fits = [r for r in left if cap[r] >= need[p]]
+                    r = min(fits,key=cap.get) if fits else max(left,key=cap.get)
+                    use = min(need[p],cap[r])
+                    now.setdefault(p,{})[r] = now.get(p,{}).get(r,0.)+use
+                    need[p] -= use
+                    cap[r] -= use
+            for p,rs in now.items():
+                for r,m in rs.items():
+                    add(p,r,m*dx,g0,g1,g0,g1)
+            pairs = now
+
+            # the rest from the stock, the last one drawn on first, then the nearest
+            for p in need:
+                xs = g0
+                while need[p] > eps and g1-xs > short:
+                    k = draws.get(p)
+                    if k is None or stock[k][2]-stock[k][1] <= short:
+                        full = [k for k in range(len(stock)) if stock[k][2]-stock[k][1] > short]
+                        if not full: break
+                        k = draws[p] = full[-1]
+                    r,ys,ye,m = stock[k]
+                    Q = min(need[p]*(g1-xs),(ye-ys)*m)
+                    xe,ye = xs+Q/need[p],ys+Q/m
+                    add(p,r,Q,xs,xe,ys,ye)
+                    stock[k][1] = ye
+                    xs = xe
+                    if stock[k][2]-ye <= short:
+                        stock[k][1] = stock[k][2]
+            # and what is left of this interval goes to the stock
+            for r in cap:
+                if cap[r] > eps:
+                    last = [k for k in range(len(stock)) if stock[k][0] == r]
+                    if last and stock[last[-1]][2] == g0 and math.isclose(stock[last[-1]][3],cap[r]):
+                        stock[last[-1]][2] = g1
+                    else:
+                        stock.append([r,g0,g1,cap[r]])
+
+        Ph,Pc = self.pinch
+        for (p,r),pieces in runs.items():
+            for Q,xs,xe,ys,ye in pieces:
+                if self.d > 0:
+                    self.matches.append(Match(must.names[p],free.names[r],Q,Ph+xe,Ph+xs,Pc+ys,Pc+ye,side))
+                else:
+                    self.matches.append(Match(free.names[r],must.names[p],Q,Ph-ys,Ph-ye,Pc-xe,Pc-xs,side))
+
+        # the rest of the other side, what is left in the stock and beyond the last interval, goes to utilities
+        end = grid[-1]
+        spare = [[r,ys,ye,(ye-ys)*m] for r,ys,ye,m in stock if ye-ys > short]
+        spare += [[r,max(y0[r],end),y1[r],free.m[r]*(y1[r]-max(y0[r],end))] for r in b if y1[r] > end]
+        for r,ys,ye,Q in sorted(spare,key=lambda a: (a[0],a[1])):
+            if self.spare and self.spare[-1][0] == r and math.isclose(self.spare[-1][2],ys) and \
+                    math.isclose(self.spare[-1][3]/(self.spare[-1][2]-self.spare[-1][1]),Q/(ye-ys)):
+                self.spare[-1][2:] = ye,self.spare[-1][3]+Q
+            else:
+                self.spare.append([r,ys,ye,Q])
+        must.T[a],must.Q[a] = must.far[a],0.
+        free.T[b],free.Q[b] = free.far[b],0.
+
+    def run(self,side):
+        if not len(self.hot) or not len(self.cold):
+            return self.matches
+        self.pinch_matches(side)
+
+        self.push(*np.meshgrid(np.arange(len(self.hot)),np.arange(len(self.cold)),indexing='ij'))
+        while self.heap:
+            *_,i,j,vh,vc,split = heapq.heappop(self.heap)
+            if vh != self.hot.v[i] or vc != self.cold.v[j]:
+                continue
+            res = self.match(i,j,side,split)
+            if res is None:
+                continue
+            # a split leaves the parent changed as well as the branch
+            for a in {i,res[0]}: self.push(a,np.arange(len(self.cold)))
+            for b in {j,res[1]}: self.push(np.arange(len(self.hot)),b)
+
+        self.finish(side)
+        return self.matches
+
+    def utilities(self,side):
+        # whatever the other side has left goes to utilities: heaters on cold streams above the pinch, coolers on
+        # hot streams below it
+        must,free,(Pm,Pf) = self.must
+        spare = [[r,self.d*(free.T[r]-Pf),self.d*(free.far[r]-Pf),free.Q[r]] for r in np.flatnonzero(free.Q > self.tol)]
+        res = []
+        for r,ys,ye,Q in self.spare+spare:
+            if self.d > 0:
+                res.append(Match(None,free.names[r],float(Q),None,None,Pf+ys,Pf+ye,side,'heater'))
+            else:
+                res.append(Match(free.names[r],None,float(Q),Pf-ys,Pf-ye,None,None,side,'cooler'))
+        return res
+
+
+class Network:
+
+    def __init__(self,mer:MER,matches:list[Match]):
+        self.mer = mer
+        self.matches = matches
+
+    @property
+    def exchangers(self):
+        return [m for m in self.matches if m.kind == 'exchanger']
+
+    @property
+    def heaters(self):
+        return [m for m in self.matches if m.kind == 'heater']
+
+    @property
+    def coolers(self):
+        return [m for m in self.matches if m.kind == 'cooler']
+
+    @property
+    def Q_hot(self):
+        return sum(m.Q for m in self.heaters)
+
+    @property
+    def Q_cold(self):
+        return sum(m.Q for m in self.coolers)
+
+    @property
+    def penalty(self):
+        # hot utility above the MER target, 0 up to rounding for a network from synthesize
+        return self.Q_hot-self.mer.table.hot_utility
+
+    def size(self,U=1.,hot_utility:tuple|None=None,cold_utility:tuple|None=None):
+        # A = Q/(U*LMTD) in the units of the streams. U is a number or a function of the match; heaters and coolers
+        # are sized once the utility (T_in, T_out) is given
+        for m in self.matches:
+            if m.kind == 'heater' and hot_utility is not None:
+                m.Th_in,m.Th_out = hot_utility
+            if m.kind == 'cooler' and cold_utility is not None:
+                m.Tc_in,m.Tc_out = cold_utility
+            lmtd = m.lmtd
+            m.A = None if lmtd is None else m.Q/((U(m) if callable(U) else U)*lmtd)
+        return self
+
+    def to_frame(self):
+        import pandas as pd
+        cols = ['Kind','Hot','Cold','Side','Q','Th_in','Th_out','Tc_in','Tc_out','A']
+        return pd.DataFrame([[m.kind,m.hot,m.cold,m.side,m.Q,m.Th_in,m.Th_out,m.Tc_in,m.Tc_out,m.A]
+                             for m in self.matches],columns=cols)
+
+    def to_modules(self,hx_type=None,tube_length=20,pressure=0.,prefix='E-',start=101,**kwargs):
+        # HeatExchanger modules for every sized match, ready for a Report or ModuleRegistry
+        from ChemPy.Economics.Modules import FloatingHeadHx
+        hx_type = FloatingHeadHx if hx_type is None else hx_type
+        res = []
+        for n,m in enumerate([m for m in self.matches if m.A],start=start):
+            desc = {'exchanger': f'{m.hot} / {m.cold}','heater': f'{m.cold} heater','cooler': f'{m.hot} cooler'}[m.kind]
+            res.append(hx_type(f'{prefix}{n}',desc,tube_length,pressure,m.A,**kwargs))
+        return res
+
+    def __repr__(self):
+        return f'Network({len(self.exchangers)} exchangers, {len(self.heaters)} heaters, {len(self.coolers)} coolers)'
+
+
+def synthesize(mer:MER,U=1.,hot_utility:tuple|None=None,cold_utility:tuple|None=None):
+    t_min = mer.t_min
+    hot = mer.cooled_streams
+    cold = mer.heated_streams
+    tol = 1e-9*max(1.,sum(abs(s.Enthalpy) for s in (*hot,*cold)))
+
+    # a threshold problem needs one utility only and is designed as a single side, from the end that utility is
+    # not on: from the top as if it was all below a pinch when no hot utility is needed, and from the bottom
+    # when no cold utility is
+    if mer.table.hot_utility <= tol:
+        Pc = max([s.T_out for s in cold]+[s.T_in-t_min for s in hot])
+    elif mer.table.cold_utility <= tol:
+        Pc = min([s.T_in for s in cold]+[s.T_out-t_min for s in hot])
+    else:
+        Pc = mer.pinch_temp
+    Ph = Pc+t_min
+
+    # (name, T at the pinch end, T at the far end, mCp) of each stream's part on either side
+    above = _Side(1,t_min,(Ph,Pc),
+                  [(s.Name,max(s.T_out,Ph),s.T_in,s.mCp) for s in hot if s.T_in > Ph],
+                  [(s.Name,max(s.T_in,Pc),s.T_out,s.mCp) for s in cold if s.T_out > Pc],tol)
+    below = _Side(-1,t_min,(Ph,Pc),
+                  [(s.Name,min(s.T_in,Ph),s.T_out,s.mCp) for s in hot if s.T_out < Ph],
+                  [(s.Name,min(s.T_out,Pc),s.T_in,s.mCp) for s in cold if s.T_in < Pc],tol)
+
+    matches = [*above.run('above'),*below.run('below'),*above.utilities('above'),*below.utilities('below')]
+
+    return Network(mer,matches).size(U,hot_utility,cold_utility)
@@ -1,16 +1,26 @@
-import pandas as pd
-import plotly.graph_objects as go
+import numpy as np
+
+# pandas and plotly are only imported by the methods that use them, so importing ChemPy.MER stays cheap
 
 
 class Therm_Stream:
 
-    def __init__(self,name,T_in,T_out,mCp):
+    __slots__ = ('Name','T_in','T_out','mCp','h')
+
+    def __init__(self,name,T_in,T_out,mCp,h=1.):
         self.Name = name
         self.T_in = T_in
         self.T_out = T_out
         self.mCp = mCp
-        self.dTemp = self.T_out - self.T_in
-        self.Enthalpy = self.dTemp*self.mCp
+        self.h = h  # film coefficient, only used for area targets
+
+    @property
+    def dTemp(self):
+        return self.T_out - self.T_in
+
+    @property
+    def Enthalpy(self):
+        return self.dTemp*self.mCp
 
     def __repr__(self):
         return f'''
@@ -23,73 +33,688 @@ Stream - {self.Name}:
 '''
 
 
-class MER:
+def _column(key,cast):
+    return property(lambda self: cast(getattr(self._set,key)[self._i]),
+                    lambda self,value: getattr(self._set,key).__setitem__(self._i,value))
+
+
+class _StreamView(Therm_Stream):
+    # a row of a StreamSet that reads and writes straight through to its arrays
+
+    __slots__ = ('_set','_i')
+
+    def __init__(self,streams,i):
+        self._set = streams
+        self._i = i
+
+    Name = _column('names',str)
+    T_in = _column('T_in',float)
+    T_out = _column('T_out',float)
+    mCp = _column('mCp',float)
+    h = _column('h',float)
 
-    def __init__(self,*Streams:Therm_Stream,t_min=10.):
-        self.heated_streams = [a for a in filter(lambda x: x.T_out>x.T_in,Streams)]
-        self.cooled_streams = [a for a in filter(lambda x: x.T_in>x.T_out,Streams)]
-        self.t_min = t_min
-        self.df, self.crit_Ts = self.__MER()
-        self.pinch_temp = self.df[self.df.R == 0].T_lo.iloc[0]
 
-        cols = ['Streams','Temp High','Temp Low','mCp']
-        data = [
-            *[[a.Name,a.T_out,a.T_in,a.mCp] for a in self.heated_streams],
-            *[[a.Name,a.T_in-self.t_min,a.T_out-self.t_min,a.mCp] for a in self.cooled_streams]
-        ]
+class StreamSet:
+    # streams as parallel arrays, for stream lists too long to hold as one object each. Indexing with an integer
+    # gives a Therm_Stream view of that row (the same object every time), anything else numpy takes gives a new set
 
-        self.streams_df = pd.DataFrame(data,columns=cols)
+    def __init__(self,names,T_in,T_out,mCp,h=1.):
+        self.names = np.array(names,dtype=str)
+        self.T_in,self.T_out,self.mCp = (np.array(a,dtype=float) for a in (T_in,T_out,mCp))
+        self.h = np.broadcast_to(np.asarray(h,dtype=float),self.T_in.shape).copy()
+        if not len(self.names) == len(self.T_in) == len(self.T_out) == len(self.mCp):
+            raise ValueError('names, T_in, T_out and mCp need the same length')
+        self._views = {}
 
-        cols = ['Streams','mCp','Q_below_pT','Q_above_pT']
-        data = [
-            *[[a.Name,a.mCp,a.mCp*(self.pinch_temp-a.T_in),a.mCp*(a.T_out-self.pinch_temp)] for a in self.heated_streams],
-            *[[a.Name,a.mCp,a.mCp*(self.pinch_temp-a.T_out+self.t_min),a.mCp*(a.T_in-self.t_min-self.pinch_temp)] for a in self.cooled_streams]
-        ]
+    @classmethod
+    def from_streams(cls,streams):
+        streams = list(streams)
+        return cls([a.Name for a in streams],[a.T_in for a in streams],[a.T_out for a in streams],
+                   [a.mCp for a in streams],[a.h for a in streams])
 
-        self.Q_df = pd.DataFrame(data,columns=cols)
+    @classmethod
+    def from_csv(cls,path,name='Name',T_in='T_in',T_out='T_out',mCp='mCp',h:str|None=None,**kwargs):
+        # column names default to the attribute names, kwargs go to pandas.read_csv
+        import pandas as pd
+        cols = [name,T_in,T_out,mCp,*([h] if h else [])]
+        df = pd.read_csv(path,usecols=cols,**kwargs)
+        return cls(df[name].astype(str).to_numpy(),df[T_in].to_numpy(),df[T_out].to_numpy(),df[mCp].to_numpy(),
+                   df[h].to_numpy() if h else 1.)
 
-    def __MER(self):
-        adj_c_strm = [Therm_Stream(a.Name,a.T_in - self.t_min,a.T_out-self.t_min,a.mCp) for a in self.cooled_streams]
-        self.adj_cooled_streams = adj_c_strm
+    def __len__(self):
+        return len(self.T_in)
 
-        crit_Ts = [*[a.__dict__[key] for key in ['T_in','T_out'] for a in self.heated_streams],
-                   *[a.__dict__[key] for key in ['T_in', 'T_out'] for a in adj_c_strm]]
+    def __getitem__(self,key):
+        if isinstance(key,(int,np.integer)):
+            i = int(key) % len(self) if -len(self) <= key < len(self) else None
+            if i is None:
+                raise IndexError(f'stream {key} out of range')
+            if i not in self._views:
+                self._views[i] = _StreamView(self,i)
+            return self._views[i]
+        return StreamSet(self.names[key],self.T_in[key],self.T_out[key],self.mCp[key],self.h[key])
 
-        crit_Ts = list(set(crit_Ts))
-        crit_Ts.sort(reverse=True)
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def __repr__(self):
+        return f'StreamSet({len(self)} streams)'
+
+    @property
+    def heated(self):
+        return self.T_out > self.T_in
+
+    @property
+    def cooled(self):
+        return self.T_in > self.T_out
+
+
+class ProblemTable:
+    # problem table algorithm on arrays. Every stream covers a contiguous run of temperature intervals, so the
+    # interval mCp comes from two searchsorted calls and a cumulative sum over start/stop marks instead of testing
+    # every stream against every interval; the heat cascade is a second cumulative sum.
+    #
+    # heated streams (cold, T_in < T_out) take heat from an interval, cooled streams (hot, already shifted down by
+    # t_min) give heat to it. Row 0 is the '(Steam)' row of the cascade, the intervals follow in descending order.
+
+    def __init__(self,heated_in,heated_out,heated_mCp,cooled_in,cooled_out,cooled_mCp,t_min=0.):
+        self.t_min = t_min  # only used to put the hot composite back on real temperatures
+        heated_in,heated_out,heated_mCp = (np.asarray(a) for a in (heated_in,heated_out,heated_mCp))
+        cooled_in,cooled_out,cooled_mCp = (np.asarray(a) for a in (cooled_in,cooled_out,cooled_mCp))
+
+        crit,count = np.unique(np.concatenate([heated_in,heated_out,cooled_in,cooled_out]),return_counts=True)
+        self.crit = crit[::-1]
+        self.critCount = count[::-1]  # stream ends sitting on each critical temperature
+
+        # a stream between temperatures lo < hi covers rows index(hi)+1 .. index(lo) of the table
+        self.mCp_heated,self.nHeated = self._interval_sum(self.crit,heated_out,heated_in,heated_mCp)
+        self.mCp_cooled,self.nCooled = self._interval_sum(self.crit,cooled_in,cooled_out,cooled_mCp)
+
+        # the steam row has T_hi = T_lo = 0, it only holds streams that straddle zero and never carries heat
+        steam = (heated_out >= 0) & (heated_in <= 0)
+        self.mCp_heated[0],self.nHeated[0] = heated_mCp[steam].sum(),steam.sum()
+        steam = (cooled_in >= 0) & (cooled_out <= 0)
+        self.mCp_cooled[0],self.nCooled[0] = cooled_mCp[steam].sum(),steam.sum()
+
+        # the per row columns live in one block so a new or dropped temperature is a single insert/delete
+        n = len(self.mCp_heated)
+        self._rows = np.vstack([self.mCp_heated,self.mCp_cooled,self.nHeated,self.nCooled,np.zeros((3,n))])
+        self._bind()
+        self._dead = 0  # boundaries left over from removed streams, see the incremental updates
+        self._cascade(0)
+
+    def _cascade(self,first):
+        # re-runs the cascade from row `first` down; the rows above keep their running sum
+        self.T_hi = np.concatenate([[0],self.crit[:-1]])
+        self.T_lo = np.concatenate([[0],self.crit[1:]])
+        self.mCp[first:] = self.mCp_cooled[first:]-self.mCp_heated[first:]
+        self.dH[first:] = self.mCp[first:]*(self.T_hi[first:]-self.T_lo[first:])
+        if first == 0:
+            self._cum[:] = np.cumsum(self.dH)
+        else:
+            self._cum[first:] = np.cumsum(np.concatenate([self._cum[first-1:first],self.dH[first:]]))[1:]
+        self.R = self._cum+np.max(-self._cum)
+        # the running sum carries rounding from every edit before, so a row that touches zero may come out a hair
+        # above it: anything within rounding of the stream enthalpy is zero
+        self.tol = 1e-9*np.sum((self.mCp_heated+self.mCp_cooled)*(self.T_hi-self.T_lo))
+        self.R[self.R <= self.tol] = 0.
+
+    @staticmethod
+    def _interval_sum(crit,hi,lo,mCp):
+        n = len(crit)
+        res = np.zeros(max(n,1))
+        count = np.zeros(max(n,1),dtype=int)
+        if not len(mCp):
+            return res,count
+        asc = crit[::-1]
+        start = n-np.searchsorted(asc,hi)  # index(hi)+1 in the descending order
+        stop = n-np.searchsorted(asc,lo)
+        marks = np.bincount(start,mCp,n+1)-np.bincount(stop,mCp,n+1)
+        count[:] = np.cumsum(np.bincount(start,minlength=n+1)-np.bincount(stop,minlength=n+1))[:n]
+        res[:] = np.cumsum(marks)[:n]
+        # summing the marks leaves rounding residue where the last stream ended
+        res[count == 0] = 0.
+        return res,count
+
+    # region incremental updates
+    # the rows are kept sorted by temperature: a stream end on a new temperature splits the row it falls in (both
+    # halves keep its streams). A temperature no stream ends on any more stays behind as a dead boundary, harmless
+    # to the cascade since the rows either side carry the same streams, and is picked up again if a stream comes
+    # back to it; the dead are dropped in one go once they outnumber the live ones, or before anything is read
+    # off the rows. Only the rows a stream covers change, and the cascade is re-run from the first of them
+
+    _columns = ('mCp_heated','mCp_cooled','nHeated','nCooled','mCp','dH','_cum')
+
+    def _bind(self):
+        for k,key in enumerate(self._columns):
+            setattr(self,key,self._rows[k])
+
+    def _find(self,T):
+        # (index in the descending order, whether T is already a boundary)
+        n = len(self.crit)
+        k = int(np.searchsorted(self.crit[::-1],T))
+        if k < n and self.crit[n-1-k] == T:
+            return n-1-k,True
+        return n-k,False
+
+    def _add_temp(self,T):
+        p,found = self._find(T)
+        if found:
+            if not self.critCount[p]: self._dead -= 1
+            self.critCount[p] += 1
+            return len(self.crit)
+        n = len(self.crit)
+        if self.crit.dtype.kind != 'f': self.crit = self.crit.astype(float)
+        self.crit = np.insert(self.crit,p,T)
+        self.critCount = np.insert(self.critCount,p,1)
+        if n:
+            row = max(p,1)
+            # rows above keep their place, the derived columns below are redone by _cascade
+            self._rows = np.insert(self._rows,row,self._rows[:,p] if 0 < p < n else 0,axis=1)
+            self._bind()
+        return max(p-1,0)
+
+    def _remove_temp(self,T):
+        p,found = self._find(T)
+        if not found or not self.critCount[p]:
+            raise KeyError(f'{T} is not a critical temperature')
+        self.critCount[p] -= 1
+        if not self.critCount[p]:
+            self._dead += 1
+        return len(self.crit)
+
+    def compact(self):
+        # drops the dead boundaries, merging the rows either side of each
+        if not self._dead:
+            return
+        live = self.critCount > 0
+        # an interval survives if its lower end is live and some live temperature lies above it
+        keep = np.concatenate(([True],live[1:] & (np.cumsum(live)[:-1] > 0)))
+        self.crit,self.critCount = self.crit[live],self.critCount[live]
+        self._rows = self._rows[:,keep]
+        self._bind()
+        self._dead = 0
+        self._cascade(0)
+
+    def _cover(self,hi,lo,mCp,heated,sign):
+        n = len(self.crit)
+        start,stop = self._find(hi)[0]+1,self._find(lo)[0]+1
+        vals,counts = (self.mCp_heated,self.nHeated) if heated else (self.mCp_cooled,self.nCooled)
+        vals[start:stop] += sign*mCp
+        counts[start:stop] += sign
+        empty = counts[start:stop] == 0
+        vals[start:stop][empty] = 0.
+        if hi >= 0 >= lo:
+            vals[0] += sign*mCp
+            counts[0] += sign
+            if not counts[0]: vals[0] = 0.
+            return 0
+        return start if n else 0
+
+    def add(self,hi,lo,mCp,heated):
+        # one stream between lo < hi (cooled streams already shifted by t_min)
+        first = min(self._add_temp(hi),self._add_temp(lo))
+        first = min(first,self._cover(hi,lo,mCp,heated,1))
+        self._cascade(min(first,len(self.mCp_heated)-1))
+
+    def remove(self,hi,lo,mCp,heated):
+        first = self._cover(hi,lo,mCp,heated,-1)
+        self._remove_temp(hi),self._remove_temp(lo)
+        if self._dead > len(self.crit)//2:
+            self.compact()
+        else:
+            self._cascade(min(first,len(self.mCp_heated)-1))
+    # endregion
+
+    @property
+    def crit_Ts(self):
+        self.compact()
+        return self.crit.tolist()
+
+    @property
+    def pinch_temp(self):
+        # a dead boundary is never the first to reach zero: the live one above it is on the same straight line
+        return self.T_lo[np.flatnonzero((self.R <= self.tol) & np.concatenate(([True],self.critCount[1:] > 0)))[0]]
+
+    @property
+    def hot_utility(self):
+        return self.R[0]
+
+    @property
+    def cold_utility(self):
+        return self.R[-1]
+
+    # region curves
+    # temperature vs cumulative enthalpy, ascending in temperature, read off the intervals already in the table
+
+    def _composite(self,mCp):
+        self.compact()
+        dH = (mCp*(self.T_hi-self.T_lo))[1:][::-1]
+        T = self.crit[::-1]
+        used = np.flatnonzero(mCp[1:][::-1])
+        if not len(used):
+            return np.zeros(0),np.zeros(0)
+        # drop the intervals below the coldest and above the hottest stream of the curve
+        lo,hi = used[0],used[-1]+1
+        return T[lo:hi+1],np.concatenate([[0.],np.cumsum(dH[lo:hi])])
+
+    def hot_composite(self):
+        T,H = self._composite(self.mCp_cooled)
+        return T+self.t_min,H
+
+    def cold_composite(self):
+        # starts at the cold utility, so the curves are t_min apart at the pinch
+        T,H = self._composite(self.mCp_heated)
+        return T,H+self.cold_utility
+
+    def grand_composite(self):
+        # shifted temperatures vs the heat cascade, the steam row is the cascade at the top temperature
+        self.compact()
+        return self.crit[::-1],self.R[::-1].copy()
+    # endregion
+
+    @staticmethod
+    def sweep(heated_in,heated_out,heated_mCp,cooled_in,cooled_out,cooled_mCp,t_min,chunk=2_000_000):
+        # hot utility, cold utility and pinch temperature for every t_min at once, cooled temperatures unshifted.
+        # Each t_min gets its own row of stream temperatures, sorted descending without merging duplicates (a zero
+        # width interval adds nothing), and the cascade is the cumulative sum along the row. Rows are processed
+        # `chunk` cells at a time to bound memory.
+        heated_in,heated_out,heated_mCp = (np.asarray(a,dtype=float) for a in (heated_in,heated_out,heated_mCp))
+        cooled_in,cooled_out,cooled_mCp = (np.asarray(a,dtype=float) for a in (cooled_in,cooled_out,cooled_mCp))
+        t_min = np.atleast_1d(np.asarray(t_min,dtype=float))
+
+        # going down in temperature a heated stream starts demanding at T_out, a cooled one starts giving at T_in
+        marks = np.concatenate([-heated_mCp,heated_mCp,cooled_mCp,-cooled_mCp])
+        fixed = np.concatenate([heated_out,heated_in])
+        shifted = np.concatenate([cooled_in,cooled_out])
+
+        Q_hot,Q_cold,pinch = (np.zeros(len(t_min)) for _ in range(3))
+        if not len(marks):
+            return Q_hot,Q_cold,pinch
+
+        tol = 1e-9*(np.sum(heated_mCp*np.abs(heated_out-heated_in))+np.sum(cooled_mCp*np.abs(cooled_in-cooled_out)))
+        step = max(1,chunk//len(marks))
+        for a in range(0,len(t_min),step):
+            t = t_min[a:a+step,None]
+            T = np.concatenate([np.broadcast_to(fixed,(len(t),len(fixed))),shifted-t],axis=1)
+            order = np.argsort(-T,axis=1,kind='stable')
+            T = np.take_along_axis(T,order,axis=1)
+            mCp = np.cumsum(marks[order],axis=1)
+
+            # R[:, 0] is the steam row, R[:, j] the cascade at the j-th temperature
+            R = np.zeros(T.shape)
+            np.cumsum(mCp[:,:-1]*(T[:,:-1]-T[:,1:]),axis=1,out=R[:,1:])
+            # the first row within rounding of the lowest, and utilities within rounding of zero are zero, as in
+            # _cascade
+            low = R.min(axis=1)
+            i = np.argmax(R <= low[:,None]+tol,axis=1)
+            Q_hot[a:a+step] = np.where(-low > tol,-low,0.)
+            Q_cold[a:a+step] = np.where(R[:,-1]-low > tol,R[:,-1]-low,0.)
+            # like MER.pinch_temp, 0 when the cascade never runs short
+            pinch[a:a+step] = np.where(i > 0,T[np.arange(len(t)),i],0.)
+
+        return Q_hot,Q_cold,pinch
+
+    def to_frame(self):
+        import pandas as pd
+        self.compact()
+        return pd.DataFrame({
+            'Interval': ['(Steam)',*range(1,len(self.R))],
+            'T_hi': self.T_hi,
+            'T_lo': self.T_lo,
+            'mCp': self.mCp,
+            'dH': self.dH,
+            'R': self.R,
+        })
+
+
+def _curve(hi,lo,mCp,h):
+    # composite of streams between lo < hi: breakpoints T ascending, enthalpy H(T) and G(T) = integral of sum(mCp/h)
+    # dT, the area-weighted duty Bath's formula needs. Same start/stop marks as ProblemTable._interval_sum
+    T = np.unique(np.concatenate([hi,lo]))
+    start,stop = np.searchsorted(T,lo),np.searchsorted(T,hi)
+    dT = np.diff(T)
+    res = []
+    for w in (mCp,mCp/h):
+        seg = np.cumsum(np.bincount(start,w,len(T))-np.bincount(stop,w,len(T)))[:-1]
+        res.append(np.concatenate([[0.],np.cumsum(seg*dT)]))
+    return T,*res
+
+
+def _at(H,T,x,mid):
+    # T on the curve at enthalpies x, read off the segment holding mid; a gap in the curve (flat H) is never picked
+    k = np.clip(np.searchsorted(H,mid,side='right')-1,0,len(H)-2)
+    return T[k]+(x-H[k])*(T[k+1]-T[k])/(H[k+1]-H[k])
+
+
+def _segments(names,spans):
+    # one polyline for many segments, plotly breaks the line at None
+    x,y = [],[]
+    for name,(a,b) in zip(names,spans):
+        x += [name,name,None]
+        y += [a,b,None]
+    return x,y
+
+
+def decimate(x,y,max_points=2000):
+    # thin a piecewise linear curve for display: collinear interior points go first, then an even stride that
+    # keeps both ends
+    x,y = np.asarray(x,dtype=float),np.asarray(y,dtype=float)
+    if len(x) <= max_points:
+        return x,y
+    dx,dy = np.diff(x),np.diff(y)
+    bend = np.abs(dx[:-1]*dy[1:]-dy[:-1]*dx[1:]) > 1e-12*(np.abs(dx[:-1]*dy[1:])+np.abs(dy[:-1]*dx[1:]))
+    keep = np.concatenate([[True],bend,[True]])
+    x,y = x[keep],y[keep]
+    if len(x) > max_points:
+        i = np.unique(np.linspace(0,len(x)-1,max_points).round().astype(int))
+        x,y = x[i],y[i]
+    return x,y
+
+
+def save_figure(fig,path,**kwargs):
+    # write a figure without opening a browser: .html is self contained, anything else (png, svg, pdf) is a
+    # static image and needs plotly's kaleido engine
+    path = str(path)
+    if path.lower().endswith(('.html','.htm')):
+        fig.write_html(path,auto_open=False,**kwargs)
+    else:
+        fig.write_image(path,**kwargs)
+    return path
 
-        columns = ['Interval','T_hi','T_lo','mCp','dH','R']
-        data = [
-            ['(Steam)',0,0,0,0,0],
-            *[[i+1,crit_Ts[i],crit_Ts[i+1],0,0,0] for i in range(len(crit_Ts)-1)]
-        ]
 
-        df = pd.DataFrame(data,columns=columns)
-        for row_i in range(len(df.iloc[:])):
-            row = df.iloc[row_i].copy()
-            mCp = 0
-            for s in self.heated_streams:
-                if s.T_out >= row.T_hi and row.T_lo >= s.T_in:
-                    mCp -= s.mCp
+class MER:
 
-            for s in adj_c_strm:
-                if s.T_in >= row.T_hi and s.T_out <= row.T_lo:
-                    mCp += s.mCp
+    merge_above = 100  # stream count from which the diagrams draw one trace per style instead of one per stream
 
-            row.mCp = mCp
-            row.dH = mCp * (row.T_hi-row.T_lo)
-            row.R = row.dH if row_i == 0 else row.dH + df.iloc[row_i-1].R
+    def __init__(self,*Streams:Therm_Stream|StreamSet,t_min=10.):
+        self.t_min = t_min
 
-            df.iloc[row_i] = row
+        # the table is built from the arrays; the per stream objects are only made once something asks for them
+        loose = [a for a in Streams if not isinstance(a,StreamSet)]
+        sets = [a for a in Streams if isinstance(a,StreamSet)]
+        T_in,T_out,mCp = (np.concatenate([np.array([getattr(a,key) for a in loose]),*[getattr(a,key) for a in sets]])
+                          for key in ('T_in','T_out','mCp'))
+        heated,cooled = T_out > T_in,T_in > T_out
+
+        self.table = ProblemTable(
+            T_in[heated],T_out[heated],mCp[heated],
+            T_in[cooled]-self.t_min,T_out[cooled]-self.t_min,mCp[cooled],
+            t_min=self.t_min
+        )
 
-        df.R += max(-df.R)
+        self._pending = Streams
+        self._frames = {}
+
+    def _index(self):
+        # insertion ordered, so streams can be dropped or edited in place without scanning a list
+        if self._pending is None:
+            return
+        streams = [b for a in self._pending for b in (a if isinstance(a,StreamSet) else [a])]
+        self._heated = {id(a): a for a in streams if a.T_out > a.T_in}
+        self._cooled = {id(a): a for a in streams if a.T_in > a.T_out}
+        self._byName = {a.Name: a for a in (*self._heated.values(),*self._cooled.values())}
+        self._pending = None
+
+    # region results
+    # the tables are built on first use and dropped whenever the stream set changes
+
+    def _frame(self,key,build):
+        if key not in self._frames:
+            self._frames[key] = build()
+        return self._frames[key]
+
+    @property
+    def heated_streams(self):
+        self._index()
+        return self._frame('heated',lambda: list(self._heated.values()))
+
+    @property
+    def cooled_streams(self):
+        self._index()
+        return self._frame('cooled',lambda: list(self._cooled.values()))
+
+    @property
+    def df(self):
+        return self._frame('df',self.table.to_frame)
+
+    @property
+    def crit_Ts(self):
+        return self.table.crit_Ts
+
+    @property
+    def pinch_temp(self):
+        return self.table.pinch_temp
+
+    @property
+    def adj_cooled_streams(self):
+        return self._frame('adj',lambda: [Therm_Stream(a.Name,a.T_in-self.t_min,a.T_out-self.t_min,a.mCp)
+                                          for a in self.cooled_streams])
+
+    @property
+    def streams_df(self):
+        def build():
+            import pandas as pd
+            cols = ['Streams','Temp High','Temp Low','mCp']
+            data = [
+                *[[a.Name,a.T_out,a.T_in,a.mCp] for a in self.heated_streams],
+                *[[a.Name,a.T_in-self.t_min,a.T_out-self.t_min,a.mCp] for a in self.cooled_streams]
+            ]
+            return pd.DataFrame(data,columns=cols)
+        return self._frame('streams',build)
+
+    @property
+    def Q_df(self):
+        def build():
+            import pandas as pd
+            pT = self.pinch_temp
+            cols = ['Streams','mCp','Q_below_pT','Q_above_pT']
+            data = [
+                *[[a.Name,a.mCp,a.mCp*(pT-a.T_in),a.mCp*(a.T_out-pT)] for a in self.heated_streams],
+                *[[a.Name,a.mCp,a.mCp*(pT-a.T_out+self.t_min),a.mCp*(a.T_in-self.t_min-pT)]
+                  for a in self.cooled_streams]
+            ]
+            return pd.DataFrame(data,columns=cols)
+        return self._frame('Q',build)
+    # endregion
+
+    # region stream updates
+    def _place(self,s:Therm_Stream,sign):
+        if s.T_out > s.T_in:
+            (self.table.add if sign > 0 else self.table.remove)(s.T_out,s.T_in,s.mCp,True)
+        elif s.T_in > s.T_out:
+            (self.table.add if sign > 0 else self.table.remove)(s.T_in-self.t_min,s.T_out-self.t_min,s.mCp,False)
+        self._frames = {}
+
+    def _lookup(self,stream):
+        # a Therm_Stream or the name of one
+        self._index()
+        s = self._byName.get(stream) if isinstance(stream,str) else stream
+        for streams in (self._heated,self._cooled):
+            if id(s) in streams:
+                return streams,s
+        raise KeyError(f'no stream {stream}')
+
+    def _file(self,s:Therm_Stream):
+        # heated or cooled; a stream that neither heats nor cools stays out of the targets
+        streams = self._heated if s.T_out > s.T_in else self._cooled if s.T_in > s.T_out else None
+        if streams is not None:
+            streams[id(s)] = s
+            self._place(s,1)
+
+    def add_stream(self,s:Therm_Stream):
+        self._index()
+        self._byName[s.Name] = s
+        self._file(s)
+        return s
+
+    def remove_stream(self,stream):
+        streams,s = self._lookup(stream)
+        del streams[id(s)]
+        if self._byName.get(s.Name) is s: del self._byName[s.Name]
+        self._place(s,-1)
+        return s
+
+    def update_stream(self,stream,T_in=None,T_out=None,mCp=None):
+        streams,s = self._lookup(stream)
+        heated = streams is self._heated
+        self._place(s,-1)
+        s.T_in = s.T_in if T_in is None else T_in
+        s.T_out = s.T_out if T_out is None else T_out
+        s.mCp = s.mCp if mCp is None else mCp
+
+        # keeps its place unless it turned from heated to cooled or the other way round
+        if heated == (s.T_out > s.T_in) and s.T_out != s.T_in:
+            self._place(s,1)
+        else:
+            del streams[id(s)]
+            self._file(s)
+        return s
+    # endregion
+
+    def composite_curves(self):
+        # {'hot': (T, H), 'cold': (T, H)}, real temperatures
+        return {'hot': self.table.hot_composite(),'cold': self.table.cold_composite()}
+
+    def grand_composite_curve(self):
+        return self.table.grand_composite()
+
+    # region area targets
+    # Bath's formula on the balanced composite curves (process streams plus utilities): within every enthalpy
+    # interval the streams are taken as vertical counter-current exchange, A = sum over intervals of
+    # sum(q_i/h_i)/LMTD. Areas come out in the units of the streams and film coefficients.
+
+    @staticmethod
+    def _utility(utility,Q,T,h,d):
+        # (T_in, T_out) or (T_in, T_out, h), d = -1 for the hot utility and +1 for the cold one. An isothermal
+        # utility gets a tiny glide so it still has an mCp
+        T_in,T_out,*rest = utility if utility is not None else (T,T)
+        if T_in == T_out:
+            T_out = T_in+d*1e-6*max(1.,abs(T_in))
+        return T_in,T_out,Q/abs(T_in-T_out),rest[0] if rest else h
+
+    def area_target(self,hot_utility:tuple|None=None,cold_utility:tuple|None=None,h=1.):
+        # {'area', 'units', 'units_above', 'units_below'}; utilities default to isothermal ones just outside the
+        # stream temperatures
+        hot,cold = self.cooled_streams,self.heated_streams
+        Q_hot,Q_cold = self.table.hot_utility,self.table.cold_utility
+        streams = [*hot,*cold]
+        if not streams:
+            return {'area': 0.,'units': 0,'units_above': 0,'units_below': 0}
+        tol = 1e-9*max(1.,sum(abs(s.Enthalpy) for s in streams))
+
+        rows = [(s.T_in,s.T_out,s.mCp,s.h) for s in hot]
+        if Q_hot > tol:
+            rows.append(self._utility(hot_utility,Q_hot,max(s.T_out for s in cold)+self.t_min,h,-1))
+        hi,lo,mCp,hh = (np.array(a,dtype=float) for a in zip(*rows))
+        Th,Hh,Gh = _curve(hi,lo,mCp,hh)
+
+        rows = [(s.T_in,s.T_out,s.mCp,s.h) for s in cold]
+        if Q_cold > tol:
+            rows.append(self._utility(cold_utility,Q_cold,min(s.T_out for s in hot)-self.t_min,h,1))
+        lo,hi,mCp,hc = (np.array(a,dtype=float) for a in zip(*rows))
+        Tc,Hc,Gc = _curve(hi,lo,mCp,hc)
+
+        # enthalpy intervals: every kink of either curve, both curves start at H = 0 at their cold end
+        H = np.unique(np.concatenate([Hh,Hc]))
+        H = H[H <= min(Hh[-1],Hc[-1])]
+        H = H[np.concatenate([[True],np.diff(H) > tol])]
+        area = 0.
+        if len(H) > 1:
+            a,b = H[:-1],H[1:]
+            mid = (a+b)/2
+            th_lo,th_hi = _at(Hh,Th,a,mid),_at(Hh,Th,b,mid)
+            tc_lo,tc_hi = _at(Hc,Tc,a,mid),_at(Hc,Tc,b,mid)
+            dT1,dT2 = th_hi-tc_hi,th_lo-tc_lo
+            same = np.isclose(dT1,dT2)
+            lmtd = np.where(same,dT1,(dT1-dT2)/np.log(np.where(same,2.,dT1/dT2)))
+            duty = np.interp(th_hi,Th,Gh)-np.interp(th_lo,Th,Gh)+np.interp(tc_hi,Tc,Gc)-np.interp(tc_lo,Tc,Gc)
+            area = float(np.sum(duty/lmtd))
+
+        # N-1 units on either side of the pinch, or over the whole problem when it has no pinch
+        Pc = self.pinch_temp
+        t = self.t_min
+        if Q_hot > tol and Q_cold > tol:
+            above = sum(s.T_out > Pc for s in cold)+sum(s.T_in-t > Pc for s in hot)+1
+            below = sum(s.T_in < Pc for s in cold)+sum(s.T_out-t < Pc for s in hot)+1
+        else:
+            above,below = len(streams)+(Q_hot > tol)+(Q_cold > tol),0
+        above,below = max(int(above)-1,0),max(int(below)-1,0)
+
+        return {'area': area,'units': above+below,'units_above': above,'units_below': below}
+
+    def capital_target(self,hx_type=None,tube_length=20,pressure=0.,**kwargs):
+        # bare module cost of the target area split evenly over the minimum number of units, kwargs go to
+        # area_target. The area has to be in ft2 for the HeatExchanger correlations
+        from ChemPy.Economics.Modules import FloatingHeadHx
+        hx_type = FloatingHeadHx if hx_type is None else hx_type
+        target = self.area_target(**kwargs)
+        if not target['units']:
+            return {**target,'cost': 0.}
+        res = hx_type.cost_batch(tube_length,pressure,np.full(target['units'],target['area']/target['units']))
+        return {**target,'cost': res['bmCost'].sum()}
+    # endregion
+
+    def network(self,**kwargs):
+        # heat exchanger network by the pinch design method, see ChemPy.HEN.synthesize
+        from ChemPy.HEN import synthesize
+        return synthesize(self,**kwargs)
+
+    @staticmethod
+    def sweep(streams,t_min_values):
+        # energy targets over a range of t_min without building an MER for each one
+        import pandas as pd
+        if not isinstance(streams,StreamSet):
+            streams = StreamSet.from_streams(streams)
+        heated,cooled = streams.heated,streams.cooled
+
+        t_min = np.atleast_1d(np.asarray(t_min_values,dtype=float))
+        Q_hot,Q_cold,pinch = ProblemTable.sweep(
+            streams.T_in[heated],streams.T_out[heated],streams.mCp[heated],
+            streams.T_in[cooled],streams.T_out[cooled],streams.mCp[cooled],
+            t_min
+        )
 
-        return df, crit_Ts
+        return pd.DataFrame({'t_min': t_min,'Q_hot': Q_hot,'Q_cold': Q_cold,'pinch_temp': pinch})
 
-    def generate_pinch_diagram(self):
+    # region figures
+    def _merged_diagram(self,groups,levels,span,webgl):
+        # same-style segments share a trace, so the figure has a handful of traces whatever the stream count
+        import plotly.graph_objects as go
+        Trace = go.Scattergl if webgl else go.Scatter
         fig = go.Figure()
 
+        for streams,color in groups:
+            if not streams: continue
+            x,y = _segments([s.Name for s in streams],[(s.T_in,s.T_out) for s in streams])
+            # webgl has no angled marker symbols
+            fig.add_trace(Trace(x=x,y=y,line=dict(color=color),mode='lines') if webgl else
+                          Trace(x=x,y=y,line=dict(color=color),
+                                marker=dict(size=10,symbol='arrow-bar-up',angleref='previous')))
+
+        fig.add_trace(
+            Trace(
+                x=[a for _ in levels for a in (*span,None)],
+                y=[a for t in levels for a in (t,t,None)],
+                line=dict(dash='dash',color='#000'),
+                mode='lines'
+            )
+        )
+
+        return fig
+
+    def _merge(self,merge,n):
+        return n >= self.merge_above if merge is None else merge
+
+    def generate_pinch_diagram(self,merge:bool|None=None,webgl=False):
+        import plotly.graph_objects as go
+
         streams = [*self.heated_streams,*self.cooled_streams]
+        if self._merge(merge,len(streams)):
+            return self._merged_diagram([(self.heated_streams,'#ff0000'),(self.cooled_streams,'#0000ff')],
+                                        [self.pinch_temp],[streams[0].Name,streams[-1].Name],webgl)
+
+        fig = go.Figure()
 
         for s in streams:
             fig.add_trace(
@@ -123,7 +748,21 @@ class MER:
 
         return fig
 
-    def generate_hi_diagram(self):
+    def generate_hi_diagram(self,merge:bool|None=None,webgl=False):
+        import plotly.graph_objects as go
+
+        if self._merge(merge,len(self.heated_streams)+len(self.cooled_streams)):
+            fig = self._merged_diagram([(self.heated_streams,'#ff0000'),(self.adj_cooled_streams,'#0000ff')],
+                                       self.crit_Ts,[self.heated_streams[0].Name,self.cooled_streams[-1].Name],
+                                       webgl)
+            fig.update_layout(
+                showlegend=False,
+                # a tick per critical temperature only while they can be told apart
+                yaxis=dict(showgrid=False,tickvals=self.crit_Ts if len(self.crit_Ts) <= 50 else None),
+                xaxis=dict(showgrid=False)
+            )
+            return fig
+
         fig = go.Figure()
 
         i = 1
@@ -189,14 +828,47 @@ class MER:
 
         return fig
 
+    def generate_composite_diagram(self,max_points=2000,webgl=False):
+        import plotly.graph_objects as go
+        Trace = go.Scattergl if webgl else go.Scatter
+        fig = go.Figure()
+
+        for (name,(T,H)),color in zip(self.composite_curves().items(),('#ff0000','#0000ff')):
+            H,T = decimate(H,T,max_points)
+            fig.add_trace(Trace(x=H,y=T,name=name,line=dict(color=color),mode='lines'))
+
+        fig.update_layout(xaxis=dict(title='H'),yaxis=dict(title='T'))
+        return fig
+
+    def generate_gcc_diagram(self,max_points=2000,webgl=False):
+        import plotly.graph_objects as go
+        Trace = go.Scattergl if webgl else go.Scatter
+        fig = go.Figure()
+
+        T,H = self.grand_composite_curve()
+        H,T = decimate(H,T,max_points)
+        fig.add_trace(Trace(x=H,y=T,line=dict(color='#000'),mode='lines'))
+        fig.add_trace(Trace(x=[0,H.max()],y=2*[self.pinch_temp],line=dict(dash='dash',color='#000'),mode='lines'))
+
+        fig.update_layout(showlegend=False,xaxis=dict(title='R'),yaxis=dict(title='shifted T'))
+        return fig
+    # endregion
+
+
+def example():
+    xyl = Therm_Stream('XYL',285,150,0.5039*50e-3)
+    cyh = Therm_Stream('CYH',260,150,0.5693*44e-3)
+    ben = Therm_Stream('BEN',140,250,0.4411*90e-3)
+    tol = Therm_Stream('TOL',275,140,0.5021*46e-3)
+    nhc = Therm_Stream('NHC',160,300,0.5777*50e-3)
+
+    res = MER(xyl,cyh,ben,tol,nhc,t_min=20)
+
+    res.generate_pinch_diagram().show()
+    print(res.Q_df)
 
-xyl = Therm_Stream('XYL',285,150,0.5039*50e-3)
-cyh = Therm_Stream('CYH',260,150,0.5693*44e-3)
-ben = Therm_Stream('BEN',140,250,0.4411*90e-3)
-tol = Therm_Stream('TOL',275,140,0.5021*46e-3)
-nhc = Therm_Stream('NHC',160,300,0.5777*50e-3)
+    return res
 
-res = MER(xyl,cyh,ben,tol,nhc,t_min=20)
 
-res.generate_pinch_diagram().show()
-print(res.Q_df)
+if __name__ == '__main__':
+    example()
@@ -0,0 +1,34 @@
+import timeit
+
+from ChemPy.Economics.Currency import Currency
+
+
+def bench(n=200_000):
+
+    a = Currency(12345.6)
+    b = Currency(789.01)
+    costs = [Currency(1000.0 + i) for i in range(1000)]
+
+    cases = {
+        'construct': lambda: Currency(12345.6),
+        'add': lambda: a + b,
+        'add float': lambda: a + 10.0,
+        'mul': lambda: a * 1.15,
+        'sub': lambda: a - b,
+        'div': lambda: a / 3.0,
+        'update_cost': lambda: a.update_cost(800, 567),
+        'sum 1000': lambda: sum(costs),
+    }
+
+    res = {}
+    for key, f in cases.items():
+        reps = n if key != 'sum 1000' else n // 1000
+        t = min(timeit.repeat(f, number=reps, repeat=3))
+        res[key] = reps / t * (1000 if key == 'sum 1000' else 1)
+
+    return res
+
+
+if __name__ == '__main__':
+    for key, ops in bench().items():
+        print(f'{key:<12} {ops:>14,.0f} ops/s')
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+# every measurement runs in a fresh interpreter, the way a worker process pays for it
+_PROBE = '''
+import sys, time
+t = time.perf_counter()
+import {module}
+dt = time.perf_counter() - t
+heavy = [m for m in ('numpy', 'pandas', 'plotly', 'xlwings', 'openpyxl') if m in sys.modules]
+print(dt * 1000, ','.join(heavy))
+'''
+
+MODULES = ['numpy', 'ChemPy.Economics', 'ChemPy.Economics.MonteCarlo', 'ChemPy.MER']
+
+
+def bench(modules=MODULES, repeat=5):
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join([root, os.environ.get('PYTHONPATH', '')])}
+
+    res = {}
+    for module in modules:
+        times = []
+        for _ in range(repeat):
+            out = subprocess.run([sys.executable, '-c', _PROBE.format(module=module)], env=env,
+                                 capture_output=True, text=True, check=True).stdout.split()
+            times.append(float(out[0]))
+        res[module] = (sorted(times)[len(times) // 2], out[1] if len(out) > 1 else '')
+
+    return res
+
+
+if __name__ == '__main__':
+    for module, (ms, heavy) in bench().items():
+        print(f'{module:<30} {ms:>8.1f} ms   loads: {heavy or "-"}')
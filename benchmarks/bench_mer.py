@@ -0,0 +1,51 @@
+import time
+
+import numpy as np
+
+from ChemPy.MER import ProblemTable
+
+
+def streams(n, seed=0):
+    # n random process streams, half heated and half cooled, shifted by t_min=10 like MER does
+    rng = np.random.default_rng(seed)
+    lo = rng.uniform(20, 500, n)
+    hi = lo + rng.uniform(5, 200, n)
+    mCp = rng.uniform(0.1, 5, n)
+    h, c = slice(0, n // 2), slice(n // 2, n)
+    return lo[h], hi[h], mCp[h], hi[c] - 10, lo[c] - 10, mCp[c]
+
+
+def bench(sizes=(100, 1_000, 5_000, 20_000), repeat=7):
+    res = {}
+    for n in sizes:
+        args = streams(n)
+        times = []
+        for _ in range(repeat):
+            t = time.perf_counter()
+            table = ProblemTable(*args)
+            table.pinch_temp
+            times.append(time.perf_counter() - t)
+        res[n] = sorted(times)[repeat // 2] * 1000
+    return res
+
+
+def bench_sweep(n=1_000, points=(10, 100, 500), repeat=5):
+    hi_in, hi_out, hi_mCp, c_in, c_out, c_mCp = streams(n)
+    args = (hi_in, hi_out, hi_mCp, c_in + 10, c_out + 10, c_mCp)
+    res = {}
+    for k in points:
+        t_min = np.linspace(1, 50, k)
+        times = []
+        for _ in range(repeat):
+            t = time.perf_counter()
+            ProblemTable.sweep(*args, t_min)
+            times.append(time.perf_counter() - t)
+        res[k] = sorted(times)[repeat // 2] * 1000
+    return res
+
+
+if __name__ == '__main__':
+    for n, ms in bench().items():
+        print(f'{n:>8} streams {ms:>8.2f} ms')
+    for k, ms in bench_sweep().items():
+        print(f'{k:>8} t_min values, 1000 streams {ms:>8.2f} ms')
@@ -0,0 +1,29 @@
+import os
+import time
+
+from ChemPy.Economics import *
+from ChemPy.Economics.Scenarios import ScenarioRunner
+
+
+def plant(scale=1.0, pumps=10, hxs=20):
+    # a made up flowsheet whose size grows with the parameters
+    mods = [CentrifugalPump(f'P-{i}', 'pump', 300 * scale, 20 * scale, 150) for i in range(pumps)]
+    mods += [FloatingHeadHx(f'E-{i}', 'hx', 20, 150, 1500 * scale) for i in range(hxs)]
+    mods += [CentrifugalCompressor('C-1', 'comp', 3000 * scale), FiredHeater('H-1', 'fh', 30e6 * scale, 800, ngFlow=30)]
+    return mods
+
+
+def bench(n=400, workers=(1, 2, 4, os.cpu_count())):
+    scenarios = [{'scale': 0.5 + i / n, 'pumps': 10 + i % 7, 'hxs': 20 + i % 11} for i in range(n)]
+    res = {}
+    for w in sorted(set(workers)):
+        t = time.perf_counter()
+        ScenarioRunner(plant, workers=w).run(scenarios)
+        res[w] = time.perf_counter() - t
+    return res
+
+
+if __name__ == '__main__':
+    res = bench()
+    for w, dt in res.items():
+        print(f'{w:>3} workers {dt * 1000:>9.1f} ms   x{res[1] / dt:.2f}')
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from ChemPy.HEN import synthesize
+from ChemPy.MER import MER, Therm_Stream
+
+
+def bundled():
+    # the streams of ChemPy.MER.example
+    return [Therm_Stream('XYL',285,150,0.5039*50e-3),Therm_Stream('CYH',260,150,0.5693*44e-3),
+            Therm_Stream('BEN',140,250,0.4411*90e-3),Therm_Stream('TOL',275,140,0.5021*46e-3),
+            Therm_Stream('NHC',160,300,0.5777*50e-3)]
+
+
+def random_streams(seed,n):
+    rng = np.random.default_rng(seed)
+    T,m = rng.uniform(20,600,(n,2)),rng.uniform(.1,5,n)
+    if seed % 2: T,m = np.round(T),np.round(m,1)
+    return [Therm_Stream(f'S{i}',*T[i],m[i]) for i in range(n)]
+
+
+def check(mer,net):
+    streams = [*mer.heated_streams,*mer.cooled_streams]
+    tol = 1e-6*max(1.,sum(abs(s.Enthalpy) for s in streams))
+    assert abs(net.penalty) <= tol
+    assert net.Q_hot == pytest.approx(mer.table.hot_utility,abs=tol)
+    assert net.Q_cold == pytest.approx(mer.table.cold_utility,abs=tol)
+    assert all(m.side == 'above' for m in net.heaters)
+    assert all(m.side == 'below' for m in net.coolers)
+    for m in net.exchangers:
+        assert m.Th_in-m.Tc_out >= mer.t_min-1e-6
+        assert m.Th_out-m.Tc_in >= mer.t_min-1e-6
+    for s in mer.cooled_streams:
+        assert sum(m.Q for m in net.matches if m.hot == s.Name) == pytest.approx(s.mCp*(s.T_in-s.T_out),abs=tol)
+    for s in mer.heated_streams:
+        assert sum(m.Q for m in net.matches if m.cold == s.Name) == pytest.approx(s.mCp*(s.T_out-s.T_in),abs=tol)
+
+
+def test_bundled_example():
+    mer = MER(*bundled(),t_min=20)
+    check(mer,synthesize(mer))
+
+
+def test_textbook_example():
+    mer = MER(Therm_Stream('H1',150,60,2),Therm_Stream('H2',90,60,8),Therm_Stream('C1',20,125,2.5),
+              Therm_Stream('C2',25,100,3),t_min=10)
+    net = synthesize(mer)
+    check(mer,net)
+    assert (mer.table.hot_utility,mer.table.cold_utility) == pytest.approx((67.5,0.))
+
+
+def test_greedy_order_strands_a_stream():
+    mer = MER(Therm_Stream('S0',330,230,1),Therm_Stream('S1',90,380,2),Therm_Stream('S2',380,270,2),
+              Therm_Stream('S3',200,270,5),Therm_Stream('S4',170,180,6),Therm_Stream('S5',270,80,6),t_min=10)
+    assert mer.pinch_temp == 200
+    assert mer.table.hot_utility == pytest.approx(30)
+    check(mer,synthesize(mer))
+
+
+@pytest.mark.parametrize('seed',range(60))
+def test_random(seed):
+    n = int(np.random.default_rng(seed).integers(2,14))
+    mer = MER(*random_streams(seed,n),t_min=(0,5,10,20)[seed % 4])
+    check(mer,synthesize(mer))
+
+
+def test_threshold():
+    # only cold utility
+    mer = MER(Therm_Stream('H1',300,100,3),Therm_Stream('C1',50,200,2),t_min=10)
+    assert mer.table.hot_utility == pytest.approx(0)
+    check(mer,synthesize(mer))
+    # only hot utility
+    mer = MER(Therm_Stream('H1',300,100,2),Therm_Stream('C1',50,250,3),t_min=10)
+    assert mer.table.cold_utility == pytest.approx(0)
+    check(mer,synthesize(mer))
+
+
+@pytest.mark.parametrize('n',[50,200])
+def test_large(n):
+    mer = MER(*random_streams(n,n))
+    check(mer,synthesize(mer))
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from ChemPy.MER import MER, Therm_Stream
+
+
+def random_stream(rng,name):
+    # temperatures on a 5 degree grid, so stream ends and pinches land on the same temperatures often, and mCps
+    # that do not add up exactly in binary
+    T_in,T_out = rng.choice(np.arange(4,80)*5.,2,replace=False)
+    return Therm_Stream(name,float(T_in),float(T_out),round(float(rng.uniform(.1,5)),2))
+
+
+def check(mer):
+    fresh = MER(*[Therm_Stream(s.Name,s.T_in,s.T_out,s.mCp) for s in (*mer.heated_streams,*mer.cooled_streams)],
+                t_min=mer.t_min)
+    table,ref = mer.table,fresh.table
+    tol = 1e-9*max(1.,sum(abs(s.Enthalpy) for s in (*fresh.heated_streams,*fresh.cooled_streams)))
+    assert mer.pinch_temp == fresh.pinch_temp
+    assert table.hot_utility == pytest.approx(ref.hot_utility,abs=tol)
+    assert table.cold_utility == pytest.approx(ref.cold_utility,abs=tol)
+    # a threshold problem stays one
+    assert (table.hot_utility == 0) == (ref.hot_utility == 0)
+    assert (table.cold_utility == 0) == (ref.cold_utility == 0)
+    # the dead boundaries an incremental table keeps are left out of the comparison
+    live = table.critCount > 0
+    rows = np.concatenate(([True],live[1:] & (np.cumsum(live)[:-1] > 0)))
+    assert table.R[rows] == pytest.approx(ref.R,abs=tol)
+
+
+@pytest.mark.parametrize('seed',range(300))
+def test_incremental_matches_rebuild(seed):
+    rng = np.random.default_rng(seed)
+    mer = MER(*[random_stream(rng,f'S{i}') for i in range(int(rng.integers(2,8)))],t_min=float(rng.choice([0,10,20])))
+    names = [s.Name for s in (*mer.heated_streams,*mer.cooled_streams)]
+    for k in range(30):
+        op = rng.choice(['add','remove','update']) if len(names) > 1 else 'add'
+        if op == 'add':
+            names.append(mer.add_stream(random_stream(rng,f'N{k}')).Name)
+        elif op == 'remove':
+            mer.remove_stream(names.pop(int(rng.integers(len(names)))))
+        else:
+            s = random_stream(rng,'')
+            mer.update_stream(names[int(rng.integers(len(names)))],s.T_in,s.T_out,s.mCp)
+        check(mer)
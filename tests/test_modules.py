@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from ChemPy.Economics.Currency import Currency
+from ChemPy.Economics.Materials import Catalyst
+from ChemPy.Economics.Modules import *
+
+
+def batch_classes(family=Module):
+    # every type with a cost correlation of its own: the ones below the family roots (Pump, Compressor, ...), and
+    # a root nothing derives from (FiredHeater)
+    res = []
+    for cls in family.__subclasses__():
+        if hasattr(cls,'cost_batch') and (family is not Module or not cls.__subclasses__()): res.append(cls)
+        res += batch_classes(cls)
+    return res
+
+
+def make(cls,k):
+    # the k-th of a few units of a type, sizes spread over the fitted ranges
+    name = f'{cls.__name__}-{k}'
+    if issubclass(cls,CentrifugalPump):
+        return cls(name,'',(100,300,900)[k],(5,20,60)[k],(50,150,400)[k])
+    if issubclass(cls,Pump):
+        return cls(name,'',(20,50,150)[k],(5,20,60)[k],type_factor_pump=(1,1.2,1.5)[k])
+    if issubclass(cls,Compressor):
+        return cls(name,'',(500,1500,3000)[k],comp_eff=(0.7,0.75,0.8)[k])
+    if issubclass(cls,Fan):
+        return cls(name,'',(1,1.5,2)[k],(2000,5000,20000)[k],(2,5,10)[k])
+    if issubclass(cls,HeatExchanger):
+        return cls(name,'',(8,16,20)[k],(50,150,400)[k],(300,1500,5000)[k],a=(0,1.75,2.7)[k],b=(0,0.13,0.07)[k])
+    if issubclass(cls,FiredHeater):
+        return cls(name,'',(5e6,30e6,100e6)[k],(100,800,1500)[k])
+    if issubclass(cls,(VerticalReactor,HorizontalReactor)):
+        catalyst = Catalyst('cat',Currency(10),1000)
+        if issubclass(cls,VerticalReactor):
+            return cls(name,'',(10e3,40e3,100e3)[k],(4,7,10)[k],(15,25,40)[k],catalyst)
+        return cls(name,'',(10e3,40e3,100e3)[k],(4,7,10)[k],catalyst)
+    if issubclass(cls,VerticalVessel):
+        return cls(name,'',(10e3,40e3,100e3)[k],(4,7,10)[k],(15,25,40)[k])
+    if issubclass(cls,Vessel):
+        return cls(name,'',(10e3,40e3,100e3)[k],(4,7,10)[k])
+    if issubclass(cls,Tank):
+        return cls(name,'',(1e3,1e4,5e4)[k])
+    raise TypeError(f'no test units for {cls.__name__}')
+
+
+@pytest.mark.parametrize('cls',batch_classes(),ids=lambda cls: cls.__name__)
+def test_cost_batch_matches_modules(cls):
+    mods = [make(cls,k) for k in range(3)]
+    params = [m.batch_params() for m in mods]
+    res = cls.cost_batch(**{key: np.array([p[key] for p in params],dtype=float) for key in params[0]})
+
+    assert np.all(res['purchCost'].values > 0)
+    for attr in ('purchCost','bmCost'):
+        assert res[attr].values == pytest.approx([float(getattr(m,attr)) for m in mods],rel=1e-12)
+    if hasattr(mods[0],'Pc'):
+        assert res['Pc'] == pytest.approx([m.Pc for m in mods],rel=1e-12)